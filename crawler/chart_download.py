@@ -0,0 +1,278 @@
+import argparse
+import glob
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+from chart_ingest import SOURCE_PATH
+
+mylogger = logging.getLogger(__name__)
+
+# 미국, 호주, 태국, 베트남, 인도, 프랑스, 독일, 일본, 대만, 덴마크, 스위스
+COUNTRIES = ['us', 'au', 'th', 'vn', 'in', 'fr', 'de', 'jp', 'tw', 'dk', 'ch']
+CHART_URL = "https://charts.spotify.com/charts/view/regional-{country}-weekly/{date}"
+LOGIN_URL = "https://charts.spotify.com/charts/view/regional-global-daily/2023-05-25"
+
+WORKERS = 4                 # 동시에 다운로드하는 worker (browser / http session) 수
+RETRIES = 3                 # 실패한 (국가, 일자) 재시도 횟수
+DOWNLOAD_TIMEOUT = 60       # 다운로드 완료를 기다리는 최대 시간(초)
+RETRY_WAIT = 5              # 재시도 전 대기 시간(초) - 시도할 때마다 2배
+
+
+def chart_file_name(country, date):
+    return f"regional-{country}-weekly-{date}.csv"
+
+
+def chart_dates(years=3, end_date=None):
+    """
+    (오늘일자-5일)로부터 years 년간 weekly 날짜 ('yyyy-mm-dd', 최신순)
+    """
+    current_date = end_date or datetime.now() - timedelta(days=5)
+    last_date = current_date - timedelta(days=(years * 365))
+    dates = []
+    while current_date >= last_date:
+        dates.append(current_date.strftime("%Y-%m-%d"))
+        current_date -= timedelta(weeks=1)
+    return dates
+
+
+class HttpDownloader:
+    """
+    chart csv 를 HTTP 로 바로 받는 worker (csv 주소를 알 때 / local 대체 서버 test)
+    - url_template : {country}, {date} 를 채워서 요청
+    """
+
+    def __init__(self, url_template, headers=None, timeout=DOWNLOAD_TIMEOUT):
+        import requests
+
+        self.url_template = url_template
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+
+    def download(self, country, date, file_path):
+        res = self.session.get(self.url_template.format(country=country, date=date), timeout=self.timeout)
+        res.raise_for_status()
+        if not res.content.startswith(b'rank,'):
+            raise ValueError(f"chart csv 가 아님 :: {res.content[:50]}")
+
+        # 받는 도중 종료되어도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 rename
+        with open(file_path + '.tmp', 'wb') as f:
+            f.write(res.content)
+        os.replace(file_path + '.tmp', file_path)
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserDownloader:
+    """
+    Chrome 으로 chart 페이지의 csv 다운로드 버튼을 누르는 worker
+    - worker 마다 별도 Chrome + 별도 다운로드 폴더 (다른 worker 의 파일과 섞이지 않음)
+    - time.sleep 대신 버튼이 나타날 때까지 / 다운로드 파일이 완성될 때까지 대기
+    """
+
+    def __init__(self, download_path, username, password, timeout=DOWNLOAD_TIMEOUT, headless=True):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        self.download_path = os.path.abspath(download_path)
+        self.timeout = timeout
+        os.makedirs(self.download_path, exist_ok=True)
+
+        options = webdriver.ChromeOptions()
+        options.add_experimental_option("prefs", {"download.default_directory": self.download_path})
+        if headless:
+            options.add_argument("--headless=new")
+        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        self.login(username, password)
+
+    def wait_element(self, xpath):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        return WebDriverWait(self.driver, self.timeout).until(expected_conditions.element_to_be_clickable((By.XPATH, xpath)))
+
+    def login(self, username, password):
+        from selenium.webdriver.support import expected_conditions
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver.get(LOGIN_URL)
+        self.wait_element('//*[@id="__next"]/div/div/main/div[2]/div/header/div/div[2]/a[3]/div[1]').click()
+        self.wait_element('//*[@id="login-username"]').send_keys(username)
+        self.wait_element('//*[@id="login-password"]').send_keys(password)
+        self.wait_element('//*[@id="login-button"]').click()
+        # 로그인 후 chart 페이지로 돌아올 때까지 대기
+        WebDriverWait(self.driver, self.timeout).until(expected_conditions.url_contains("charts.spotify.com/charts"))
+
+    def wait_download(self, file_name):
+        """
+        다운로드 폴더에 file_name 이 생기고 .crdownload 가 없어질 때까지 대기
+        """
+        file_path = os.path.join(self.download_path, file_name)
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if os.path.exists(file_path) and not glob.glob(os.path.join(self.download_path, '*.crdownload')):
+                return file_path
+            time.sleep(0.2)
+        raise TimeoutError(f"다운로드 시간 초과 :: {file_name}")
+
+    def download(self, country, date, file_path):
+        self.driver.get(CHART_URL.format(country=country, date=date))
+        self.wait_element('//*[@id="__next"]/div/div/main/div[2]/div[3]/div/div/a/button').click()
+        shutil.move(self.wait_download(chart_file_name(country, date)), file_path)
+
+    def close(self):
+        self.driver.quit()
+
+
+class ChartDownloadScheduler:
+    """
+    (국가, 일자) 전체를 worker 들이 나눠서 다운로드
+    - 이미 받은 파일은 건너뜀 (중간에 종료 후 다시 실행하면 남은 것만)
+    - 실패하면 RETRY_WAIT * 2^n 초 뒤 다른 worker 가 다시 시도 (최대 retries 번)
+    - make_downloader(worker 번호) : worker 마다 downloader 생성 (browser 1개 / http session 1개)
+    """
+
+    def __init__(self, make_downloader, output_path=SOURCE_PATH, workers=WORKERS, retries=RETRIES, retry_wait=RETRY_WAIT):
+        self.make_downloader = make_downloader
+        self.output_path = output_path
+        self.workers = workers
+        self.retries = retries
+        self.retry_wait = retry_wait
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.failed = []
+        self.waiting = 0                # 재시도 대기 중인 task 수
+        self.counter = {"download": 0, "skip": 0, "retry": 0, "fail": 0}
+
+    def worker(self, worker_id):
+        try:
+            downloader = self.make_downloader(worker_id)
+        except Exception as e:
+            mylogger.info(f"WORKER {worker_id} START ERROR || {e}")
+            return
+
+        try:
+            while True:
+                task = self.queue.get()
+                if task is None:
+                    break
+                country, date, attempt = task
+
+                file_path = os.path.join(self.output_path, chart_file_name(country, date))
+                try:
+                    downloader.download(country, date, file_path)
+                    with self.lock:
+                        self.counter["download"] += 1
+                except Exception as e:
+                    if attempt < self.retries:
+                        mylogger.info(f"RETRY {attempt + 1} || {country} {date} {e}")
+                        self.retry_later((country, date, attempt + 1), self.retry_wait * 2 ** attempt)
+                    else:
+                        mylogger.info(f"FAIL || {country} {date} {e}")
+                        with self.lock:
+                            self.counter["fail"] += 1
+                            self.failed.append((country, date, str(e)))
+                finally:
+                    self.queue.task_done()
+        finally:
+            downloader.close()
+
+    def retry_later(self, task, delay):
+        """
+        delay 초 뒤 queue 에 다시 추가 - 기다리는 동안 worker 는 다른 task 처리
+        """
+        def put():
+            self.queue.put(task)
+            with self.lock:
+                self.waiting -= 1
+
+        with self.lock:
+            self.counter["retry"] += 1
+            self.waiting += 1
+        timer = threading.Timer(delay, put)
+        timer.daemon = True
+        timer.start()
+
+    def drain(self, error):
+        while True:
+            try:
+                task = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            country, date, _ = task
+            self.counter["fail"] += 1
+            self.failed.append((country, date, error))
+            self.queue.task_done()
+
+    def run(self, countries, dates):
+        """
+        return 실패한 [(국가, 일자, 에러), ...]
+        """
+        os.makedirs(self.output_path, exist_ok=True)
+        for country in countries:
+            for date in dates:
+                if os.path.exists(os.path.join(self.output_path, chart_file_name(country, date))):
+                    self.counter["skip"] += 1
+                else:
+                    self.queue.put((country, date, 0))
+        mylogger.info(f"DOWNLOAD || task count :: {self.queue.qsize()} skip :: {self.counter['skip']}")
+
+        threads = [threading.Thread(target=self.worker, args=(worker_id,), daemon=True) for worker_id in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        # 모든 task (재시도 포함) 가 끝나면 worker 종료 - 살아있는 worker 가 없으면 남은 task 는 실패 처리
+        while self.queue.unfinished_tasks != 0 or self.waiting != 0:
+            if not any(thread.is_alive() for thread in threads) and self.waiting == 0:
+                self.drain("worker 없음")
+                break
+            time.sleep(0.5)
+        for _ in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join()
+
+        mylogger.info(f"DOWNLOAD || {self.counter}")
+        return self.failed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["browser", "http"], default="browser",
+                        help="browser : Chrome 으로 다운로드 버튼 클릭 / http : --url-template 로 csv 직접 요청")
+    parser.add_argument("--url-template", default="http://127.0.0.1:8780/charts/regional-{country}-weekly/{date}.csv",
+                        help="http mode 의 csv 주소 ({country}, {date})")
+    parser.add_argument("--output", default=SOURCE_PATH, help="chart csv 저장 폴더")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    parser.add_argument("--years", type=int, default=3, help="최근 몇 년치 weekly chart")
+    parser.add_argument("--countries", default=",".join(COUNTRIES))
+    parser.add_argument("--no-headless", action="store_true", help="Chrome 창 표시")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.mode == "http":
+        def make_downloader(worker_id):
+            return HttpDownloader(args.url_template)
+    else:
+        # 로그인 정보는 환경 변수로
+        username, password = os.environ["SPOTIFY_CHART_ID"], os.environ["SPOTIFY_CHART_PASSWORD"]
+
+        def make_downloader(worker_id):
+            return BrowserDownloader(os.path.join(args.output, f".worker_{worker_id}"), username, password,
+                                     headless=not args.no_headless)
+
+    scheduler = ChartDownloadScheduler(make_downloader, args.output, args.workers, args.retries)
+    failed = scheduler.run(args.countries.split(","), chart_dates(args.years))
+    for country, date, error in failed:
+        mylogger.info(f"FAILED || {country} {date} {error}")
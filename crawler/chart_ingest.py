@@ -0,0 +1,169 @@
+import argparse
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+mylogger = logging.getLogger(__name__)
+
+SOURCE_PATH = './spotify_files/'          # chart csv 다운로드 폴더
+OUTPUT_PATH = './spotify_result/'         # country_code=xx/date=yyyy-mm-dd/ 로 나눠서 저장
+COMBINED_FILE = 'weekly_top200_combined.csv'
+
+# regional-us-weekly-2023-05-25.csv
+FILENAME_PATTERN = re.compile(r'^regional-([a-z]+)-weekly-(\d{4}-\d{2}-\d{2})\.csv$')
+
+# 다운로드한 chart csv 의 컬럼 타입 (파일마다 추론하지 않음)
+CHART_DTYPES = {
+    'rank': 'int16',
+    'uri': 'string',
+    'artist_names': 'string',
+    'track_name': 'string',
+    'source': 'string',
+    'peak_rank': 'int16',
+    'previous_rank': 'int16',
+    'weeks_on_chart': 'int16',
+    'streams': 'int64',
+}
+HEADER = ['rank', 'track_id', 'artist_names', 'track_name', 'source', 'peak_rank', 'previous_rank',
+          'weeks_on_chart', 'streams', 'country_code', 'date']
+# partition 의 chart.csv 컬럼 타입 (country_code / date 는 폴더명)
+PARTITION_DTYPES = {('track_id' if name == 'uri' else name): dtype for name, dtype in CHART_DTYPES.items()}
+
+
+def parse_filename(filename):
+    """
+    파일명 -> (국가 코드, 일자 'yyyy-mm-dd') / chart 파일이 아니면 None
+    """
+    match = FILENAME_PATTERN.match(filename)
+    return match.groups() if match else None
+
+
+def partition_path(output_path, country, date):
+    return os.path.join(output_path, f'country_code={country}', f'date={date}')
+
+
+def list_chart_files(source_path):
+    """
+    source_path 의 chart 파일 [(파일명, 국가 코드, 일자), ...] (국가, 일자 순)
+    """
+    files = []
+    for filename in os.listdir(source_path):
+        parsed = parse_filename(filename)
+        if parsed is not None:
+            files.append((filename, *parsed))
+    return sorted(files, key=lambda file: (file[1], file[2]))
+
+
+def read_chart(file_path):
+    """
+    chart csv 1개 읽기 (컬럼 정리는 합친 뒤 한번에)
+    """
+    return pd.read_csv(file_path, dtype=CHART_DTYPES)
+
+
+def read_charts(file_paths, workers=None):
+    """
+    chart csv 여러 개를 동시에 읽기 - workers 가 1 이면 process 를 띄우지 않음
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [read_chart(file_path) for file_path in file_paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_chart, file_paths, chunksize=max(1, len(file_paths) // (workers * 4))))
+
+
+def combine_charts(frames, files):
+    """
+    파일별 dataframe 을 한번에 합친 뒤 HEADER 순서로 정리
+    - uri -> track_id, 파일명의 국가 / 일자를 row 수만큼 반복해서 추가
+    """
+    df = pd.concat(frames, ignore_index=True)
+    lengths = [len(frame) for frame in frames]
+    df['uri'] = df['uri'].str.rsplit(':', n=1).str[-1]
+    df = df.rename(columns={'uri': 'track_id'})
+    df['country_code'] = pd.Categorical(np.repeat([country for _, country, _ in files], lengths))
+    df['date'] = pd.to_datetime(np.repeat([date for _, _, date in files], lengths))
+    return df[HEADER]
+
+
+def ingest(source_path=SOURCE_PATH, output_path=OUTPUT_PATH, workers=None, combined=True):
+    """
+    아직 저장하지 않은 chart 파일만 읽어서 country_code / date 별로 저장
+    - 파일 읽기는 process pool 로 동시에, pd.concat 은 마지막에 1번만
+    - 이미 partition 폴더가 있는 (국가, 일자) 는 건너뜀
+    - combined 이면 weekly_top200_combined.csv 에 새 row 추가 (없으면 전체 partition 으로 생성)
+    - return 새로 저장한 파일 수
+    """
+    combined_path = os.path.join(output_path, COMBINED_FILE)
+    rebuild = combined and not os.path.exists(combined_path) and os.path.exists(output_path) and \
+        any(name.startswith('country_code=') for name in os.listdir(output_path))
+
+    files = [file for file in list_chart_files(source_path)
+             if not os.path.exists(os.path.join(partition_path(output_path, file[1], file[2]), 'chart.csv'))]
+    mylogger.info(f"INGEST || new file count :: {len(files)}")
+
+    if len(files) != 0:
+        frames = read_charts([os.path.join(source_path, filename) for filename, _, _ in files], workers)
+        new_df = combine_charts(frames, files)
+
+        for (country, date), df in new_df.groupby(['country_code', 'date'], sort=False, observed=True):
+            path = partition_path(output_path, country, date.strftime('%Y-%m-%d'))
+            os.makedirs(path, exist_ok=True)
+            # 중간에 종료되어도 다음 실행에서 다시 저장하도록 임시 파일로 쓴 뒤 rename
+            df.drop(columns=['country_code', 'date']).to_csv(os.path.join(path, 'chart.csv.tmp'), index=False)
+            os.replace(os.path.join(path, 'chart.csv.tmp'), os.path.join(path, 'chart.csv'))
+
+    if rebuild:
+        # 통합 파일 없이 partition 만 있으면 전체 partition 으로 다시 생성
+        load_partitions(output_path).to_csv(combined_path, index=False)
+    elif combined and len(files) != 0:
+        # 새 partition 만 기존 통합 파일 뒤에 추가 (처음이면 header 포함해서 생성)
+        new_df.to_csv(combined_path, mode='a', header=not os.path.exists(combined_path), index=False)
+    if combined:
+        mylogger.info(f"INGEST || combined file :: {combined_path}")
+
+    return len(files)
+
+
+def load_partitions(output_path=OUTPUT_PATH, countries=None):
+    """
+    저장된 partition 을 하나의 dataframe 으로 (countries 로 국가 선택)
+    """
+    partitions = []
+    for country_dir in sorted(os.listdir(output_path)):
+        if not country_dir.startswith('country_code='):
+            continue
+        country = country_dir.split('=', 1)[1]
+        if countries is not None and country not in countries:
+            continue
+        for date_dir in sorted(os.listdir(os.path.join(output_path, country_dir))):
+            file_path = os.path.join(output_path, country_dir, date_dir, 'chart.csv')
+            if date_dir.startswith('date=') and os.path.exists(file_path):
+                partitions.append((file_path, country, date_dir.split('=', 1)[1]))
+
+    if len(partitions) == 0:
+        return pd.DataFrame(columns=HEADER)
+
+    frames = [pd.read_csv(file_path, dtype=PARTITION_DTYPES) for file_path, _, _ in partitions]
+    lengths = [len(frame) for frame in frames]
+    df = pd.concat(frames, ignore_index=True)
+    df['country_code'] = pd.Categorical(np.repeat([country for _, country, _ in partitions], lengths))
+    df['date'] = pd.to_datetime(np.repeat([date for _, _, date in partitions], lengths))
+    return df[HEADER]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default=SOURCE_PATH, help="다운로드한 chart csv 폴더")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="country_code / date 별 저장 폴더")
+    parser.add_argument("--workers", type=int, default=None, help="csv 읽는 process 수 (기본 : cpu 수)")
+    parser.add_argument("--no-combined", action="store_true", help=f"{COMBINED_FILE} 저장 안 함")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    ingest(args.source, args.output, args.workers, combined=not args.no_combined)
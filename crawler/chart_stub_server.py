@@ -0,0 +1,66 @@
+import argparse
+import hashlib
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# /charts/regional-us-weekly-2023-05-25.csv 형식 대신 /charts/regional-us-weekly/2023-05-25.csv
+PATH_PATTERN = re.compile(r'^/charts/regional-([a-z]+)-weekly/(\d{4}-\d{2}-\d{2})\.csv$')
+HEADER = 'rank,uri,artist_names,track_name,source,peak_rank,previous_rank,weeks_on_chart,streams\n'
+
+
+def make_chart(country, date, size=200):
+    """
+    (국가, 일자) 마다 항상 같은 내용의 가짜 top 200 csv
+    """
+    rng = random.Random(hashlib.md5(f"{country}-{date}".encode()).hexdigest())
+    lines = [HEADER]
+    for rank in range(1, size + 1):
+        track_id = ''.join(rng.choice('0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(22))
+        lines.append(f'{rank},spotify:track:{track_id},"Artist {rng.randint(1, 500)}",Track {track_id[:6]},Label,'
+                     f'{rng.randint(1, rank)},{rng.choice([-1, rng.randint(1, 200)])},{rng.randint(1, 100)},{rng.randint(10000, 5000000)}\n')
+    return ''.join(lines).encode('utf-8')
+
+
+class ChartHandler(BaseHTTPRequestHandler):
+    """
+    chart_download.py --mode http 를 test 하기 위한 local chart 서버
+    - latency 초 대기 후 응답, fail_rate 확률로 500 응답
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True      # keep-alive 에서 header / body 를 따로 write -> Nagle + delayed ACK 로 요청마다 40ms 대기
+    latency = 0.0
+    fail_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body, content_type='text/csv'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        match = PATH_PATTERN.match(self.path)
+        if match is None:
+            return self.send(404, b'not found', 'text/plain')
+        if random.random() < self.fail_rate:
+            return self.send(500, b'error', 'text/plain')
+        self.send(200, make_chart(*match.groups()))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--latency", type=float, default=0.2, help="응답 지연(초)")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="500 응답 비율")
+    args = parser.parse_args()
+
+    ChartHandler.latency = args.latency
+    ChartHandler.fail_rate = args.fail_rate
+    ThreadingHTTPServer(('127.0.0.1', args.port), ChartHandler).serve_forever()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# crawler 폴더 기준으로 import (python3 chart_ingest.py 와 동일)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+import os
+
+import pandas as pd
+import pytest
+
+from chart_ingest import COMBINED_FILE, HEADER, ingest, list_chart_files, load_partitions, parse_filename, partition_path
+from chart_stub_server import make_chart
+
+
+def write_chart(source_path, country, date, size=200):
+    os.makedirs(source_path, exist_ok=True)
+    with open(os.path.join(source_path, f'regional-{country}-weekly-{date}.csv'), 'wb') as f:
+        f.write(make_chart(country, date, size))
+
+
+@pytest.fixture
+def source_path(tmp_path):
+    source_path = str(tmp_path / "spotify_files")
+    for country in ["kr", "us"]:
+        for date in ["2023-05-18", "2023-05-25"]:
+            write_chart(source_path, country, date)
+    return source_path
+
+
+def test_parse_filename():
+    assert parse_filename('regional-kr-weekly-2023-05-25.csv') == ('kr', '2023-05-25')
+    assert parse_filename('regional-kr-daily-2023-05-25.csv') is None
+    assert parse_filename('regional-kr-weekly-2023-05-25.csv.tmp') is None
+
+
+def test_list_chart_files(source_path):
+    open(os.path.join(source_path, 'notes.txt'), 'w').close()
+    assert [file[1:] for file in list_chart_files(source_path)] == \
+        [('kr', '2023-05-18'), ('kr', '2023-05-25'), ('us', '2023-05-18'), ('us', '2023-05-25')]
+
+
+def test_ingest_partitions(tmp_path, source_path):
+    output_path = str(tmp_path / "spotify_result")
+    assert ingest(source_path, output_path, workers=1) == 4
+
+    chart = pd.read_csv(os.path.join(partition_path(output_path, 'kr', '2023-05-25'), 'chart.csv'))
+    assert list(chart.columns) == [name for name in HEADER if name not in ('country_code', 'date')]
+    assert len(chart) == 200
+    assert chart['rank'].tolist() == list(range(1, 201))
+    assert not chart['track_id'].str.startswith('spotify:').any()
+
+    source = pd.read_csv(os.path.join(source_path, 'regional-kr-weekly-2023-05-25.csv'))
+    assert chart['track_id'].tolist() == source['uri'].str.rsplit(':', n=1).str[-1].tolist()
+
+    combined = pd.read_csv(os.path.join(output_path, COMBINED_FILE))
+    assert list(combined.columns) == HEADER
+    assert len(combined) == 800
+    assert combined.groupby(['country_code', 'date']).size().to_dict() == {
+        ('kr', '2023-05-18'): 200, ('kr', '2023-05-25'): 200, ('us', '2023-05-18'): 200, ('us', '2023-05-25'): 200}
+
+
+def test_ingest_only_new_files(tmp_path, source_path):
+    output_path = str(tmp_path / "spotify_result")
+    ingest(source_path, output_path, workers=1)
+    assert ingest(source_path, output_path, workers=1) == 0
+
+    write_chart(source_path, 'kr', '2023-06-01', size=50)
+    assert ingest(source_path, output_path, workers=1) == 1
+
+    combined = pd.read_csv(os.path.join(output_path, COMBINED_FILE))
+    assert len(combined) == 850
+    assert (combined['date'] == '2023-06-01').sum() == 50
+    assert len(load_partitions(output_path)) == 850
+
+
+def test_rebuild_combined_from_partitions(tmp_path, source_path):
+    output_path = str(tmp_path / "spotify_result")
+    ingest(source_path, output_path, workers=1, combined=False)
+    assert not os.path.exists(os.path.join(output_path, COMBINED_FILE))
+
+    # 통합 파일 없이 partition 만 있으면 전체 partition 으로 다시 생성
+    assert ingest(source_path, output_path, workers=1) == 0
+    combined = pd.read_csv(os.path.join(output_path, COMBINED_FILE))
+    assert len(combined) == 800
+
+
+def test_load_partitions(tmp_path, source_path):
+    output_path = str(tmp_path / "spotify_result")
+    ingest(source_path, output_path, workers=1, combined=False)
+
+    df = load_partitions(output_path, countries=['us'])
+    assert list(df.columns) == HEADER
+    assert set(df['country_code']) == {'us'}
+    assert sorted(df['date'].dt.strftime('%Y-%m-%d').unique()) == ['2023-05-18', '2023-05-25']
+    assert str(df['rank'].dtype) == 'int16'
+
+    assert len(load_partitions(output_path, countries=['jp'])) == 0
+
+
+def test_process_pool_matches_single_process(tmp_path, source_path):
+    ingest(source_path, str(tmp_path / "single"), workers=1)
+    ingest(source_path, str(tmp_path / "pool"), workers=2)
+
+    single = pd.read_csv(os.path.join(tmp_path / "single", COMBINED_FILE))
+    pool = pd.read_csv(os.path.join(tmp_path / "pool", COMBINED_FILE))
+    pd.testing.assert_frame_equal(single, pool)
@@ -0,0 +1,267 @@
+import argparse
+import datetime
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from work_queue import find_previous_result
+
+mylogger = logging.getLogger(__name__)
+
+RESULT_PATH = './result/'
+AGGREGATE_PATH = './aggregate/'
+TOP_GROUPS = 10             # 유명 K-pop 그룹 수 (followers 순)
+
+# dashboard 에서 비교하는 audio feature
+FEATURES = ['acousticness', 'danceability', 'energy', 'instrumentalness', 'liveness', 'loudness',
+            'speechiness', 'tempo', 'valence', 'duration_ms']
+
+# 원본 csv 에서 읽는 컬럼 타입 (나머지 컬럼은 읽지 않음)
+TRACK_DTYPES = dict({'id': 'string', 'artist_id': 'string', 'album_id': 'string'}, **{feature: 'float64' for feature in FEATURES})
+ARTIST_DTYPES = {'id': 'string', 'name': 'string', 'genre': 'string', 'polularity': 'int16', 'followers': 'int64'}
+CHART_DTYPES = {'rank': 'int16', 'track_id': 'string', 'artist_names': 'string', 'streams': 'int64',
+                'country_code': 'category', 'date': 'string'}
+
+# 저장하는 table 별 컬럼 타입 (feature 평균 / 분위수는 float32)
+TABLE_DTYPES = {
+    "artist_feature_profile": dict(
+        {'artist_id': 'string', 'artist_name': 'string', 'group_type': 'category', 'popularity': 'int16',
+         'followers': 'int64', 'track_count': 'int32'},
+        **{feature: 'float32' for feature in FEATURES}),
+    "group_feature_comparison": {
+        'group': 'string', 'group_type': 'category', 'feature': 'category', 'track_count': 'int32',
+        'mean': 'float32', 'std': 'float32', 'p25': 'float32', 'p50': 'float32', 'p75': 'float32'},
+    "chart_daily": {
+        'date': 'string', 'country_code': 'category', 'artist_id': 'string', 'artist_name': 'string',
+        'best_rank': 'int16', 'track_count': 'int16', 'streams': 'int64'},
+    "chart_artist_peak": {
+        'artist_id': 'string', 'artist_name': 'string', 'peak_rank': 'int16', 'peak_date': 'string',
+        'peak_country': 'string', 'chart_days': 'int32', 'country_count': 'int16', 'total_streams': 'int64',
+        'first_date': 'string', 'last_date': 'string'},
+}
+
+
+def find_result(file_name, ymd, result_path=RESULT_PATH):
+    """
+    result/<ymd>/file_name - 없으면 ymd 이전의 가장 최근 결과
+    """
+    file_path = os.path.join(result_path, ymd, file_name)
+    if os.path.exists(file_path):
+        return file_path
+    return find_previous_result(result_path, file_name, ymd)
+
+
+def read_tracks(file_path):
+    """
+    track csv -> id / artist_id / album_id / feature 컬럼만 (track id 중복 제거)
+    """
+    df = pd.read_csv(file_path, usecols=list(TRACK_DTYPES), dtype=TRACK_DTYPES)
+    return df.drop_duplicates('id', ignore_index=True)
+
+
+def read_artists(file_path):
+    """
+    artist csv -> genre 로 boy_group / girl_group / other 구분
+    """
+    df = pd.read_csv(file_path, usecols=list(ARTIST_DTYPES), dtype=ARTIST_DTYPES).drop_duplicates('id', ignore_index=True)
+    df['group_type'] = np.select([df['genre'].str.contains('boy group', regex=False).fillna(False).to_numpy(bool),
+                                  df['genre'].str.contains('girl group', regex=False).fillna(False).to_numpy(bool)],
+                                 ['boy_group', 'girl_group'], 'other')
+    return df
+
+
+def group_mean(codes, values, group_count):
+    """
+    codes (row 별 group 번호) 기준 feature 평균 - feature 마다 np.bincount 1번
+    - NaN (audio feature 없는 track) 은 평균에서 제외
+    - return (group 별 row 수, group x feature 평균)
+    """
+    valid = ~np.isnan(values)
+    means = np.full((group_count, values.shape[1]), np.nan)
+    for idx in range(values.shape[1]):
+        sums = np.bincount(codes, weights=np.where(valid[:, idx], values[:, idx], 0.0), minlength=group_count)
+        counts = np.bincount(codes, weights=valid[:, idx], minlength=group_count)
+        np.divide(sums, counts, out=means[:, idx], where=counts != 0)
+    return np.bincount(codes, minlength=group_count), means
+
+
+def artist_feature_profile(tracks, artists):
+    """
+    K-pop artist 별 track 수 / feature 평균 (5) K-pop 아티스트 별 오디오 특성)
+    """
+    codes, artist_ids = pd.factorize(tracks['artist_id'])
+    track_count, means = group_mean(codes, tracks[FEATURES].to_numpy(float), len(artist_ids))
+
+    df = pd.DataFrame(means, columns=FEATURES)
+    df.insert(0, 'artist_id', artist_ids)
+    df.insert(1, 'track_count', track_count)
+
+    artists = artists.rename(columns={'id': 'artist_id', 'name': 'artist_name', 'polularity': 'popularity'})
+    df = df.merge(artists[['artist_id', 'artist_name', 'group_type', 'popularity', 'followers']], on='artist_id', how='inner')
+    return df.sort_values('followers', ascending=False, ignore_index=True)
+
+
+def top_groups(artists, count=TOP_GROUPS):
+    """
+    followers 가 많은 boy / girl group artist id
+    """
+    groups = artists[artists['group_type'] != 'other']
+    return groups.nlargest(count, 'followers')[['id', 'name']].itertuples(index=False)
+
+
+def feature_stats(values):
+    """
+    track x feature 배열 -> feature 별 (track 수, 평균, 표준편차, 25 / 50 / 75 분위수)
+    """
+    with np.errstate(invalid='ignore'):
+        p25, p50, p75 = np.nanpercentile(values, [25, 50, 75], axis=0) if len(values) else np.full((3, values.shape[1]), np.nan)
+    return {
+        'track_count': np.count_nonzero(~np.isnan(values), axis=0),
+        'mean': np.nanmean(values, axis=0) if len(values) else np.full(values.shape[1], np.nan),
+        'std': np.nanstd(values, axis=0) if len(values) else np.full(values.shape[1], np.nan),
+        'p25': p25, 'p50': p50, 'p75': p75,
+    }
+
+
+def group_feature_comparison(tracks, global_tracks, artists, top_count=TOP_GROUPS):
+    """
+    Global / K-pop 전체 / boy group / girl group / 유명 그룹별 feature 분포 (4) 오디오 특성 비교)
+    """
+    values = tracks[FEATURES].to_numpy(float)
+    group_type = tracks['artist_id'].map(artists.set_index('id')['group_type']).to_numpy(object)
+
+    groups = [('global', 'global', global_tracks[FEATURES].to_numpy(float)), ('kpop', 'kpop', values)]
+    for name in ['boy_group', 'girl_group']:
+        groups.append((f'kpop_{name}', name, values[group_type == name]))
+    for artist_id, name in top_groups(artists, top_count):
+        groups.append((name, 'top_group', values[(tracks['artist_id'] == artist_id).to_numpy(bool)]))
+
+    frames = []
+    for name, kind, group_values in groups:
+        stats = pd.DataFrame(feature_stats(group_values))
+        stats.insert(0, 'feature', FEATURES)
+        stats.insert(0, 'group_type', kind)
+        stats.insert(0, 'group', name)
+        frames.append(stats)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_chart(file_path, tracks, artists):
+    """
+    weekly_top200_combined.csv 중 K-pop artist 의 row (artist_id 추가)
+    - track_id 가 추출한 K-pop track 이면 그 artist, 아니면 artist_names 의 첫 이름이 K-pop artist 인 row
+    """
+    chart = pd.read_csv(file_path, usecols=list(CHART_DTYPES), dtype=CHART_DTYPES)
+    artist_id = chart['track_id'].map(tracks.set_index('id')['artist_id'])
+    first_name = chart['artist_names'].str.split(', ', n=1).str[0]
+    artist_id = artist_id.fillna(first_name.map(artists.drop_duplicates('name').set_index('name')['id']))
+
+    chart['artist_id'] = artist_id
+    chart = chart[artist_id.notna()].reset_index(drop=True)
+    chart['artist_name'] = chart['artist_id'].map(artists.set_index('id')['name'])
+    return chart
+
+
+def chart_daily(chart):
+    """
+    일자 / 국가 / artist 별 최고 순위, chart 에 든 track 수, streams 합계 (3) 차트 순위 추이)
+    """
+    df = chart.groupby(['date', 'country_code', 'artist_id', 'artist_name'], observed=True, sort=True).agg(
+        best_rank=('rank', 'min'), track_count=('rank', 'size'), streams=('streams', 'sum'))
+    return df.reset_index()
+
+
+def chart_artist_peak(chart):
+    """
+    artist 별 최고 순위 (일자 / 국가), chart 에 든 일자 / 국가 수, streams 합계 (3) 최고 순위)
+    """
+    grouped = chart.groupby(['artist_id', 'artist_name'], sort=False)
+    df = grouped.agg(chart_days=('date', 'nunique'), country_count=('country_code', 'nunique'),
+                     total_streams=('streams', 'sum'), first_date=('date', 'min'), last_date=('date', 'max'))
+
+    # 순위 -> 일자 순으로 정렬 후 artist 별 첫 row 가 최고 순위
+    peak = chart.sort_values(['rank', 'date'], kind='stable').drop_duplicates('artist_id').set_index('artist_id')
+    df = df.reset_index()
+    df.insert(2, 'peak_rank', df['artist_id'].map(peak['rank']))
+    df.insert(3, 'peak_date', df['artist_id'].map(peak['date']))
+    df.insert(4, 'peak_country', df['artist_id'].map(peak['country_code']).astype('string'))
+    return df.sort_values(['peak_rank', 'total_streams'], ascending=[True, False], ignore_index=True)
+
+
+def save_table(df, name, output_path, parquet=False):
+    """
+    TABLE_DTYPES 타입으로 csv (+ parquet) 저장 - return 저장한 파일 경로 list
+    """
+    df = df[list(TABLE_DTYPES[name])].astype(TABLE_DTYPES[name])
+    file_paths = [os.path.join(output_path, name + '.csv')]
+    df.to_csv(file_paths[0], index=False, float_format='%.6g')
+    if parquet:
+        file_paths.append(os.path.join(output_path, name + '.parquet'))
+        df.to_parquet(file_paths[1], index=False, compression='zstd')
+    mylogger.info(f"AGGREGATE SAVE || {name} row count :: {len(df)}")
+    return file_paths
+
+
+def aggregate(ymd, chart_path=None, output_path=None, top_count=TOP_GROUPS, parquet=False):
+    """
+    result/<ymd> 결과 -> dashboard 용 집계 table (./aggregate/<ymd>/)
+    - track / artist csv 는 필요한 컬럼만 typed 로 읽고, group 별 평균은 np.bincount, 분위수는 np.nanpercentile 로 한번에
+    - chart_path (weekly_top200_combined.csv) 가 있으면 일자별 / artist 별 chart table 도 저장
+    - return 저장한 파일 경로 list
+    """
+    output_path = output_path or os.path.join(AGGREGATE_PATH, ymd)
+    os.makedirs(output_path, exist_ok=True)
+
+    track_path = find_result('kpop_artist_album_track_data.csv', ymd)
+    artist_path = find_result('kpop_artist_data.csv', ymd)
+    global_path = find_result('global_popular_track.csv', ymd)
+    mylogger.info(f"AGGREGATE || track :: {track_path} artist :: {artist_path} global :: {global_path}")
+
+    start = time.time()
+    tracks, artists = read_tracks(track_path), read_artists(artist_path)
+    global_tracks = read_tracks(global_path) if global_path else tracks.iloc[:0]
+    mylogger.info(f"AGGREGATE LOAD || track :: {len(tracks)} artist :: {len(artists)} global track :: {len(global_tracks)} time :: {time.time() - start:.2f}s")
+
+    file_paths = save_table(artist_feature_profile(tracks, artists), "artist_feature_profile", output_path, parquet)
+    file_paths += save_table(group_feature_comparison(tracks, global_tracks, artists, top_count), "group_feature_comparison", output_path, parquet)
+
+    if chart_path is not None:
+        chart = read_chart(chart_path, tracks, artists)
+        mylogger.info(f"AGGREGATE CHART || {chart_path} K-pop row count :: {len(chart)}")
+        file_paths += save_table(chart_daily(chart), "chart_daily", output_path, parquet)
+        file_paths += save_table(chart_artist_peak(chart), "chart_artist_peak", output_path, parquet)
+
+    mylogger.info(f"AGGREGATE DONE || {output_path} time :: {time.time() - start:.2f}s")
+    return file_paths
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ymd", default=datetime.datetime.now().strftime('%Y%m%d'),
+                        help="집계할 result/<ymd> (없는 파일은 이전 가장 최근 결과 사용)")
+    parser.add_argument("--chart", default=None,
+                        help="crawler 의 weekly_top200_combined.csv 경로 (지정하면 chart table 도 저장)")
+    parser.add_argument("--top", type=int, default=TOP_GROUPS, help="비교할 유명 K-pop 그룹 수 (followers 순)")
+    parser.add_argument("--parquet", action="store_true", help="csv 와 함께 parquet (zstd) 저장")
+    parser.add_argument("--upload", action="store_true", help="집계 table 을 S3 (spotify-kpop-analysis/aggregate/<ymd>/) 에 upload")
+    parser.add_argument("--s3-bucket", default="spotify-kpop-analysis")
+    parser.add_argument("--s3-endpoint", default=None, help="S3 호환 서버 주소 (local test 용)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    file_paths = aggregate(args.ymd, args.chart, top_count=args.top, parquet=args.parquet)
+
+    if args.upload:
+        from s3_uploader import S3Uploader
+
+        uploader = S3Uploader(args.s3_bucket, prefix=f"aggregate/{args.ymd}/", endpoint_url=args.s3_endpoint)
+        for file_path in file_paths:
+            uploader.upload(file_path, gzip=False)
+        for s3_file_url, size in uploader.wait():
+            mylogger.info(f"upload S3 bucket {s3_file_url} size :: {size}")
+        uploader.close()
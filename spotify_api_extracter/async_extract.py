@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import deque
+
+import http_client
+import spotify_api
+from response_cache import make_key
+from spotify_api import chunk_list, change_feature, is_complete_tracklist, is_guest_track, make_album_result, make_credit_result, make_track_result
+
+# extract.py 의 __main__ 에서 make_log 로 만든 logger 로 교체
+mylogger = logging.getLogger(__name__)
+
+
+class AsyncSpotifyClient:
+    """
+    asyncio 기반 Spotify API 호출
+    - 동시 요청 수는 semaphore(concurrency)로 제한
+    - 요청마다 semaphore 안에서 token_pool 의 가장 여유있는 credential 을 lease (spotify_api.spotify_get 과 동일)
+    """
+
+    def __init__(self, session, token_pool, concurrency):
+        self.session = session
+        self.token_pool = token_pool
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(self, url, params=None, headers=None):
+        """
+        GET 호출 (cache 없이) - spotify_api.rate_limiter 를 통과, 429는 Retry-After 동안 전체 요청 중지 후 재시도
+        - return (status_code, 응답 text, ETag)
+        """
+        retries = 0
+
+        while True:
+            async with self.semaphore:
+                # semaphore 를 얻은 뒤 lease -> 대기중인 요청이 in_flight 에 잡혀 credential 부하가 부풀지 않도록
+                # lease 중 token 재발급 (blocking POST + lock) 은 event loop 밖의 thread 에서
+                credential = await asyncio.to_thread(self.token_pool.lease)
+                # semaphore 안에서 rate limit 자리를 예약 -> 미리 예약된 요청이 concurrency 개를 넘지 않도록
+                wait_time = max(credential.blocked_until - time.time(), spotify_api.rate_limiter.acquire(credential.client_id))
+                if wait_time > 0:
+                    # 전체 credential 이 막혀있거나 rate limit -> 대기
+                    await asyncio.sleep(wait_time)
+                    spotify_api.metrics.add_wait("rate_limit", wait_time)
+
+                start = time.time()
+                try:
+                    async with self.session.get(url, headers=dict(credential.headers, **(headers or {})), params=params) as response:
+                        status = response.status
+                        text = await response.text()
+                        etag = response.headers.get('ETag')
+                        retry_after = int(response.headers.get('Retry-After', 0)) if status == 429 else 0
+                except Exception:
+                    self.token_pool.release(credential, None)
+                    spotify_api.metrics.observe_request(url, "error", time.time() - start)
+                    raise
+                spotify_api.metrics.observe_request(url, status, time.time() - start, credential.client_id)
+            self.token_pool.release(credential, status, retry_after)
+            spotify_api.rate_limiter.update(credential.client_id, status, retry_after)
+
+            if status not in (401, 429) or retries >= spotify_api.MAX_RETRIES:
+                return status, text, etag
+
+            mylogger.info(f"ASYNC ISSUE {url} || {status} status_code / client_id :: {credential.client_id} Retry-After :: {retry_after}")
+            spotify_api.metrics.add_retry(url)
+            retries += 1
+
+    async def get(self, url, params=None, resource=None):
+        """
+        GET 호출 - spotify_api.spotify_get 과 동일하게 response_cache 먼저 조회 / ETag 재검증
+        - return (status_code, json 또는 error text)
+        """
+        response_cache = spotify_api.response_cache
+        if response_cache is None or not response_cache.enabled(resource):
+            status, text, etag = await self.request(url, params)
+            return status, json.loads(text) if status == 200 else text
+
+        key = make_key(url, params)
+        cached = response_cache.lookup(resource, key)
+        if cached is not None and cached[2]:
+            return 200, json.loads(cached[0])
+
+        headers = {"If-None-Match": cached[1]} if cached is not None and cached[1] else None
+        status, text, etag = await self.request(url, params, headers)
+
+        if status == 304:
+            response_cache.touch(resource, key)
+            return 200, json.loads(cached[0])
+        if status == 200:
+            response_cache.store(resource, key, text, etag)
+            return status, json.loads(text)
+        return status, text
+
+
+async def get_all_pages(client, url, params=None, resource=None, limit=spotify_api.PAGE_LIMIT):
+    """
+    spotify_api.get_all_pages 의 async 버전 - 첫 페이지의 total 로 나머지 페이지를 동시에 호출
+    - return (status_code, 전체 item list) / 실패한 페이지가 있으면 (status_code, error text)
+    """
+    params = dict(params or {}, offset=0, limit=limit)
+    status, data = await client.get(url, params=params, resource=resource)
+    if status != 200:
+        return status, data
+
+    items = list(data["items"])
+    pages = await asyncio.gather(*[client.get(url, params=dict(params, offset=offset), resource=resource)
+                                   for offset in range(limit, data["total"], limit)])
+    for page_status, page in pages:
+        if page_status != 200:
+            mylogger.info(f"PAGE ERROR {url} || status_code : {page_status} error_msg : {page}")
+            return page_status, page
+        items.extend(page["items"])
+
+    return status, items
+
+
+async def get_several_items(client, url, result_key, ids, batch_size, resource=None):
+    """
+    spotify_api.get_several_items 의 async 버전 - batch 들을 동시에 호출
+    """
+    ids = list(dict.fromkeys(ids))      # 중복 제거 (순서 유지)
+    response_cache = spotify_api.response_cache
+    use_cache = response_cache is not None and response_cache.enabled(resource)
+    item_dict = response_cache.get_items(resource, ids) if use_cache else {}
+
+    async def fetch_batch(batch):
+        status, data = await client.get(url, params={"ids": ",".join(batch)})
+        if status != 200:
+            mylogger.info(f"BATCH ERROR {result_key} || status_code : {status} error_msg : {data}")
+            return {}
+        batch_items = dict(zip(batch, data.get(result_key) or []))
+        if use_cache:
+            response_cache.put_items(resource, batch_items)
+        return batch_items
+
+    fetch_ids = [item_id for item_id in ids if item_id not in item_dict]
+    for result in await asyncio.gather(*[fetch_batch(batch) for batch in chunk_list(fetch_ids, batch_size)]):
+        item_dict.update(result)
+
+    return {item_id: item_dict.get(item_id) for item_id in ids}
+
+
+async def artist_albums_track(client, album_key):
+    """
+    ALBUM에 해당하는 track 정보 추출 (50곡 초과 album 페이지 조회)
+    - issue row 는 extract.artist_albums_track 과 같은 column (album_id, 마지막으로 받은 track 의 artist / track)
+    """
+    albums_track_list, albums_track_issue_list = [], []
+    url = f"{http_client.API_URL}/v1/albums/{album_key}/tracks"
+    artist_id = artist_name = track_id = track_name = None
+
+    offset = 0
+    limit = 50
+
+    while True:
+        status, data = await client.get(url, params={"offset": offset, "limit": limit}, resource="album_tracks")
+        if status != 200:
+            mylogger.info(f"TRACK ERROR || album_id :: {album_key} status_code : {status} error_msg : {data}")
+            albums_track_issue_list.append([album_key, artist_id, artist_name, track_id, track_name])
+            break
+
+        albums_track_list.extend(data["items"])
+        if data["items"]:
+            track = data["items"][-1]
+            artist_id, artist_name = track["artists"][0]["id"], track["artists"][0]["name"]
+            track_id, track_name = track["id"], track["name"]
+        offset += limit
+        if offset >= data["total"]:
+            mylogger.info(f"ARTIST's ALBUM TRACK SUCCESS || {album_key}에 해당하는 전체 Track 탐색이 완료되었습니다.")
+            break
+
+    return albums_track_list, albums_track_issue_list
+
+
+async def guest_credits(client, guest_albums, full_albums, dedup_index, guest_artist_keys):
+    """
+    --collab : 추출 대상이 아닌 artist 가 첫 artist 인 album (객원 참여) 의 credit (extract.guest_credits 와 동일)
+    - return (credit rows, album track issue rows)
+    """
+    credit_list, issue_list = [], []
+
+    for album in guest_albums:
+        album_id, album_name = album["id"], album["name"]
+        try:
+            full_album = full_albums.get(album_id)
+            if is_complete_tracklist(full_album):
+                albums_track_list, albums_track_issue_list = full_album["tracks"]["items"], []
+            else:
+                albums_track_list, albums_track_issue_list = await artist_albums_track(client, album_id)
+
+            if albums_track_issue_list:
+                issue_list.extend(albums_track_issue_list)
+                dedup_index.release_album(album)
+                continue
+
+            credit_list.extend(row for track in albums_track_list if is_guest_track(track, guest_artist_keys)
+                               for row in make_credit_result(track, album_id, album["release_date"]))
+            mylogger.info(f"GUEST ALBUM DONE || album_id :: {album_id} album_name :: {album_name}")
+        except Exception as e:
+            issue_list.append([album_id, e, sys.exc_info()[2].tb_lineno])
+            dedup_index.release_album(album)
+            mylogger.info(f"GUEST ALBUM ERROR || album_id :: {album_id} album_name :: {album_name}")
+
+    return credit_list, issue_list
+
+
+async def extract_artist(client, artist_key, dedup_index, snapshot=None, guest_artist_keys=None):
+    """
+    artist 1명의 album -> track -> feature 추출 (extract.run_thread 와 동일한 흐름)
+    - dedup_index 로 다른 artist 가 이미 처리한 album / track 은 제외
+    - snapshot 이 있으면 이전 결과에 있는 album 의 track row 는 재사용
+    - guest_artist_keys (--collab) 가 있으면 목록에 없는 artist 의 album 에 객원 참여한 track 의 credit 도 수집
+    - return (album rows, track rows, album track issue rows, credit rows) / album 목록 조회 실패 시 None
+    """
+    album_list, track_list, issue_list, credit_list = [], [], [], []
+
+    # ARTIST의 전체 album 목록 - include_groups 가 지정되면 해당 group 만
+    params = {"include_groups": ",".join(spotify_api.include_groups)} if spotify_api.include_groups else None
+    status, album_items = await get_all_pages(client, f"{http_client.API_URL}/v1/artists/{artist_key}/albums", params, resource="artist_albums")
+    if status != 200:
+        mylogger.info(f"ARTIST's ALBUM ERROR || artist_id :: {artist_key} status_code : {status} error_msg : {album_items}")
+        return None
+
+    total_album = len(album_items)
+    artist_track_list = []      # (album_id, track)
+    known_track_list = []       # 이전 snapshot 에서 재사용하는 track row
+
+    def is_known_album(album_id):
+        return snapshot is not None and snapshot.has_album(album_id)
+
+    # 이미 처리된 album (또는 같은 release 의 variant) 은 제외
+    claimed_album_ids = [album["id"] for album in album_items if album["artists"][0]["id"] == artist_key and dedup_index.claim_album(album)]
+
+    # --collab : 추출 대상이 아닌 artist 의 album 에 객원 참여 -> credit 만 저장
+    guest_albums = [album for album in album_items if guest_artist_keys is not None
+                    and album["artists"][0]["id"] not in guest_artist_keys and dedup_index.claim_album(album)]
+
+    # ARTIST의 앨범을 albums?ids= 로 20개씩 일괄 조회 (tracklist 포함) - 이전 snapshot 에 있는 album 은 제외
+    album_ids = [album_id for album_id in claimed_album_ids if not is_known_album(album_id)] + [album["id"] for album in guest_albums]
+    full_albums = await get_several_items(client, f"{http_client.API_URL}/v1/albums", "albums", album_ids, spotify_api.ALBUM_BATCH, resource="albums")
+
+    for idx, album in enumerate(album_items):
+        album_id, album_name = album["id"], album["name"]
+        if album["artists"][0]["id"] != artist_key:
+            continue
+
+        if album_id not in claimed_album_ids:
+            # 앞의 variant 가 tracklist 조회에 실패해서 release 되었으면 이 album 으로 다시 claim
+            if not dedup_index.claim_album(album, retry=True):
+                mylogger.info(f"ALBUM DUPLICATE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+                continue
+            claimed_album_ids.append(album_id)
+
+        if is_known_album(album_id):
+            known_track_list.extend(snapshot.album_tracks(album_id))
+            album_list.append(make_album_result(album))
+            mylogger.info(f"ALBUM REUSE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+            continue
+
+        try:
+            full_album = full_albums.get(album_id)
+            if is_complete_tracklist(full_album):
+                albums_track_list, albums_track_issue_list = full_album["tracks"]["items"], []
+            else:
+                albums_track_list, albums_track_issue_list = await artist_albums_track(client, album_id)
+
+            if albums_track_issue_list:
+                # tracklist 조회 실패 -> error csv 로 관리 + claim 해제 (album / 일부 track 은 저장하지 않음)
+                issue_list.extend(albums_track_issue_list)
+                dedup_index.release_album(album)
+                mylogger.info(f"ALBUM RELEASE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+                continue
+
+            album_result = make_album_result(album)
+            artist_track_list.extend((album_id, track) for track in albums_track_list)
+            album_list.append(album_result)
+            mylogger.info(f"ALBUM DONE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+        except Exception as e:
+            issue_list.append([album_id, e, sys.exc_info()[2].tb_lineno])
+            dedup_index.release_album(album)
+            mylogger.info(f"ALBUM ERROR [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+
+    # ARTIST 전체 앨범 TRACK의 audio feature 일괄 조회 - 이미 저장된 track 제외
+    claimed = dedup_index.claim_tracks([row[0] for row in known_track_list] + [track["id"] for _, track in artist_track_list])
+    track_list.extend(row for row, is_new in zip(known_track_list, claimed) if is_new)
+    artist_track_list = [item for item, is_new in zip(artist_track_list, claimed[len(known_track_list):]) if is_new]
+    features = await get_several_items(client, f"{http_client.API_URL}/v1/audio-features", "audio_features",
+                                       [track["id"] for _, track in artist_track_list], spotify_api.AUDIO_FEATURE_BATCH, resource="audio_features")
+    spotify_api.metrics.add_rows("feature", len(features))
+    release_dates = {album["id"]: album["release_date"] for album in album_items}
+    for album_id, track in artist_track_list:
+        track_list.append(make_track_result(track, album_id, change_feature(features[track["id"]])))
+        credit_list.extend(make_credit_result(track, album_id, release_dates[album_id]))
+
+    if guest_albums:
+        guest_credit_list, guest_issue_list = await guest_credits(client, guest_albums, full_albums, dedup_index, guest_artist_keys)
+        credit_list.extend(guest_credit_list)
+        issue_list.extend(guest_issue_list)
+
+    mylogger.info(f"ARTIST's ALBUM SUCCESS || artist_id :: {artist_key} - artist가 보유한 앨범 추출 완료")
+    return album_list, track_list, issue_list, credit_list
+
+
+async def run_async(total_artist_list, token_pool, concurrency, save_artist, dedup_index, snapshot=None, guest_artist_keys=None):
+    """
+    전체 artist 를 asyncio 로 동시에 추출
+    - 동시에 추출하는 artist 는 최대 concurrency 명 (thread engine 의 thread 수와 같은 역할)
+    - 끝난 artist 는 artist 순서대로 save_artist(artist_key, album rows, track rows, album track issue rows, credit rows) 로 저장 (extract.save_artist)
+    - save_artist 는 csv / journal 을 쓰는 동기 함수 -> event loop 밖의 thread 에서 실행
+    - return (artist error rows, 성공 artist 수)
+    """
+    error_rows = []
+    data_count = 0
+
+    async def run_artist(artist_key):
+        try:
+            return await extract_artist(client, artist_key, dedup_index, snapshot, guest_artist_keys), None
+        except Exception as e:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            err_lineno = exc_tb.tb_lineno
+            mylogger.info(f"ARTIST's ALBUM ERROR || artist_id :: {artist_key} error_msg :: {e} err_lieno :: {err_lineno} - artist가 보유한 앨범 추출 실패")
+            return None, [artist_key, e, err_lineno]
+
+    async def save_next():
+        nonlocal data_count
+        artist_key, task = pending.popleft()
+        result, error = await task
+        if error is not None:
+            error_rows.append(error)
+            return
+        data_count += 1
+        if result is None:
+            return
+        album_list, track_list, issue_list, credit_list = result
+        await asyncio.to_thread(save_artist, artist_key, album_list, track_list, issue_list, credit_list)
+
+    async with http_client.make_async_session(concurrency) as session:
+        client = AsyncSpotifyClient(session, token_pool, concurrency)
+        pending = deque()       # (artist_key, task) - 시작한 순서
+
+        # artist 순서대로 기다렸다가 저장 - 중간에 종료되어도 저장된 artist 까지는 checkpoint 에 남음
+        for artist_key in total_artist_list:
+            pending.append((artist_key, asyncio.ensure_future(run_artist(artist_key))))
+            if len(pending) >= concurrency:
+                await save_next()
+        while pending:
+            await save_next()
+
+    return error_rows, data_count
@@ -0,0 +1,199 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from mock_spotify_server import DATA_PATH, FIXTURE_YMD, SpotifyFixture, make_server
+
+mylogger = logging.getLogger(__name__)
+
+current_directory_path = os.path.dirname(os.path.realpath(__file__))
+BENCHMARK_PATH = './benchmark/'
+TOLERANCE = 0.2             # baseline 대비 wall time / peak RSS 가 20% 넘게 늘면 regression
+
+# 설정 이름 : (실행할 script, 인자)
+CONFIGS = {
+    "thread": ("extract.py", []),
+    "async": ("extract.py", ["--engine", "async"]),
+    "thread-cache": ("extract.py", ["--cache"]),
+    "popularity-bulk": ("re_extract_track_popularity.py", []),
+    "popularity-thread": ("re_extract_track_popularity.py", ["--mode", "thread"]),
+}
+# script 별 결과 row 수를 셀 파일
+OUTPUT_FILES = {
+    "extract.py": ["kpop_artist_data.csv", "kpop_artist_album_data.csv", "kpop_artist_album_track_data.csv"],
+    "re_extract_track_popularity.py": ["kpop_artist_album_track_data_v4.csv"],
+}
+
+
+def count_rows(file_path):
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'rb') as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def make_workdir(fixture_path, ymd, credentials):
+    """
+    script 를 실행할 임시 폴더
+    - secret.json (가짜 credential) + result/<fixture ymd> (--incremental / --cost-weighted 용 이전 결과)
+    - re_extract_track_popularity.py 가 읽는 result/<오늘>/kpop_artist_album_track_data_v2.csv
+    """
+    workdir = tempfile.mkdtemp(prefix='spotify_benchmark_')
+    client_info = [[f"mock-client-{idx}", "mock-secret"] for idx in range(credentials)]
+    with open(os.path.join(workdir, 'secret.json'), 'w') as jsonfile:
+        json.dump({"client_id": client_info[0][0], "client_secret": client_info[0][1], "client_info": client_info[1:]}, jsonfile)
+
+    shutil.copytree(fixture_path, os.path.join(workdir, 'result', os.path.basename(os.path.normpath(fixture_path))))
+    os.makedirs(os.path.join(workdir, 'result', ymd), exist_ok=True)
+    track_file = 'kpop_artist_album_track_data_v2.csv'
+    if not os.path.exists(os.path.join(fixture_path, track_file)):
+        track_file = 'kpop_artist_album_track_data.csv'
+    shutil.copy(os.path.join(fixture_path, track_file), os.path.join(workdir, 'result', ymd, 'kpop_artist_album_track_data_v2.csv'))
+    return workdir
+
+
+def run_once(name, server, fixture_path, credentials, extra_args, keep=False):
+    """
+    설정 1개를 별도 process 로 실행
+    - wall time, 서버가 받은 요청 수 (status code 별), process 의 peak RSS (wait4 rusage), 결과 row 수
+    """
+    script, args = CONFIGS[name]
+    ymd = datetime.datetime.now().strftime('%Y%m%d')
+    workdir = make_workdir(fixture_path, ymd, credentials)
+    server_url = f"http://127.0.0.1:{server.server_address[1]}"
+    env = dict(os.environ, SPOTIFY_API_URL=server_url, SPOTIFY_ACCOUNTS_URL=server_url)
+
+    with server.RequestHandlerClass.lock:
+        stats_before = Counter(server.RequestHandlerClass.stats)
+    start = time.perf_counter()
+    with open(os.path.join(workdir, 'output.log'), 'w') as logfile:
+        process = subprocess.Popen([sys.executable, os.path.join(current_directory_path, script), *args, *extra_args,
+                                    "--log-dir", os.path.join(workdir, 'log')],
+                                   cwd=workdir, env=env, stdout=logfile, stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall_time = time.perf_counter() - start
+    with server.RequestHandlerClass.lock:
+        stats = Counter(server.RequestHandlerClass.stats)
+    stats.subtract(stats_before)
+
+    api_requests = sum(count for key, count in stats.items() if not key.startswith('token '))
+    result = {
+        "config": name,
+        "returncode": process.returncode,
+        "wall_time": round(wall_time, 3),
+        "requests": api_requests,
+        "requests_per_sec": round(api_requests / wall_time, 2),
+        "rate_limited": sum(count for key, count in stats.items() if key.endswith(' 429')),
+        "peak_rss_mb": round(rusage.ru_maxrss / 1024, 1),        # linux ru_maxrss 는 KB
+        "cpu_time": round(rusage.ru_utime + rusage.ru_stime, 3),
+        "rows": {file_name: count_rows(os.path.join(workdir, 'result', ymd, file_name)) for file_name in OUTPUT_FILES[script]},
+        "status": {key: count for key, count in sorted(stats.items()) if count},
+    }
+    if keep:
+        result["workdir"] = workdir
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def run_benchmark(names, server, fixture_path, credentials=5, repeat=1, extra_args=()):
+    """
+    설정별 repeat 번 실행 후 wall time 중간값인 실행 결과
+    """
+    results = []
+    for name in names:
+        runs = [run_once(name, server, fixture_path, credentials, list(extra_args)) for _ in range(repeat)]
+        median = statistics.median_low([run["wall_time"] for run in runs])
+        result = next(run for run in runs if run["wall_time"] == median)
+        result["wall_times"] = [run["wall_time"] for run in runs]
+        result["peak_rss_mb"] = max(run["peak_rss_mb"] for run in runs)
+        results.append(result)
+        mylogger.info(f"BENCHMARK {name} || wall_time :: {result['wall_time']}s requests/sec :: {result['requests_per_sec']} "
+                      f"peak_rss :: {result['peak_rss_mb']}MB 429 :: {result['rate_limited']} rows :: {result['rows']} returncode :: {result['returncode']}")
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    baseline 결과와 비교 - return regression 목록
+    - 실패 (returncode != 0), 결과 row 수 변경, wall time / peak RSS 가 tolerance 넘게 증가
+    """
+    baseline = {result["config"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        name = result["config"]
+        if result["returncode"] != 0:
+            regressions.append(f"{name} returncode :: {result['returncode']}")
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result["rows"] != base["rows"]:
+            regressions.append(f"{name} rows :: {base['rows']} -> {result['rows']}")
+        for key in ["wall_time", "peak_rss_mb"]:
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name} {key} :: {base[key]} -> {result[key]} (+{result[key] / base[key] - 1:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--configs", default="thread,async,popularity-bulk",
+                        help=f"실행할 설정 (, 로 구분) :: {','.join(CONFIGS)}")
+    parser.add_argument("--ymd", default=FIXTURE_YMD, help="mock 서버 fixture 로 사용할 result/<ymd>")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency", type=float, default=0.05, help="mock 서버 응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="mock 서버 응답 지연 ± 범위(초)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="mock 서버 429 응답 비율")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 응답의 Retry-After(초)")
+    parser.add_argument("--max-rps", type=int, default=0, help="token 별 초당 최대 요청 수 (넘으면 429)")
+    parser.add_argument("--credentials", type=int, default=5, help="secret.json 에 넣을 가짜 credential 수")
+    parser.add_argument("--repeat", type=int, default=1, help="설정별 실행 횟수 (wall time 중간값 사용)")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 benchmark JSON - regression 이 있으면 exit code 1")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="허용하는 wall time / peak RSS 증가 비율")
+    parser.add_argument("--extra-args", default="", help="모든 설정에 추가할 script 인자 (예: '--log-sample 100')")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    names = args.configs.split(",")
+    unknown = [name for name in names if name not in CONFIGS]
+    if unknown:
+        parser.error(f"알 수 없는 설정 :: {unknown}")
+
+    fixture_path = os.path.join(DATA_PATH, args.ymd)
+    fixture = SpotifyFixture(fixture_path)
+    server = make_server(fixture, args.port, args.latency, args.jitter, args.rate_limit, args.retry_after, args.max_rps)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mylogger.info(f"MOCK SERVER || port :: {args.port} artist :: {len(fixture.artists)} album :: {len(fixture.albums)} track :: {len(fixture.tracks)}")
+
+    results = run_benchmark(names, server, os.path.abspath(fixture_path), args.credentials, args.repeat, args.extra_args.split())
+    server.shutdown()
+
+    # ./benchmark/<timestamp>.json - 다음 실행의 --baseline 으로 사용
+    os.makedirs(BENCHMARK_PATH, exist_ok=True)
+    output_path = BENCHMARK_PATH + datetime.datetime.now().strftime('%Y-%m-%d_%H:%M:%S') + '.json'
+    server_config = {key: getattr(args, key) for key in ["ymd", "latency", "jitter", "rate_limit", "retry_after", "max_rps", "credentials", "repeat"]}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"server": server_config, "results": results}, f, indent=2, ensure_ascii=False)
+    mylogger.info(f"BENCHMARK SAVE || {output_path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            mylogger.info(f"REGRESSION || {regression}")
+        if regressions:
+            sys.exit(1)
+        mylogger.info(f"BASELINE || {args.baseline} 대비 regression 없음")
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+
+
+class CheckpointJournal:
+    """
+    추출 결과 csv 와 함께 쓰는 append-only journal (jsonl)
+    - output_sink 가 album / track row 를 csv 에 쓰고 fsync 한 뒤, 완료된 artist / album 과 csv 크기를 journal 에 기록
+    - --resume 시 journal 에 기록된 크기로 csv 를 잘라서 (중간에 죽은 artist 의 row 제거) 이어서 추출
+    - 추출이 끝나면 finish 기록 -> find_unfinished 에서 제외
+    """
+
+    def __init__(self, path, output_paths):
+        self.path = path
+        self.output_paths = output_paths        # {"album" : csv 경로, "track" : csv 경로}
+        self.done_artists = set()
+        self.done_albums = set()
+        self.offsets = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        새로 추출 시작 - 헤더만 있는 csv 크기를 기록하고 journal 초기화
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.offsets = self.current_offsets()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            self.write_entry(f, {"type": "start", "outputs": sorted(self.output_paths), "offsets": self.offsets})
+
+    def resume(self):
+        """
+        journal 을 읽어서 완료된 artist 목록 복원 후 csv 를 마지막 완료 시점 크기로 자름
+        - return 이어서 실행했는지 - journal 이 비어있거나 start 기록이 없으면 False (새로 추출)
+        - journal 의 output 과 지금 output 이 다르면 (--collab / --incremental 변경) 자를 위치를 알 수 없으므로 ValueError
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break               # 마지막 줄이 쓰다가 끊긴 경우
+                if entry["type"] == "start":
+                    self.check_outputs(entry.get("outputs", sorted(entry["offsets"])))
+                elif self.offsets is None:
+                    break               # start 기록 없이 시작된 journal
+                if entry["type"] == "finish":
+                    continue
+                self.offsets = entry["offsets"]
+                if entry["type"] == "artist":
+                    self.done_artists.add(entry["artist_id"])
+                    self.done_albums.update(entry["albums"])
+
+        if self.offsets is None:
+            return False
+
+        for name, file_path in self.output_paths.items():
+            with open(file_path, 'a', encoding='utf-8') as f:
+                f.truncate(self.offsets[name])
+        return True
+
+    def check_outputs(self, outputs):
+        if outputs != sorted(self.output_paths):
+            raise ValueError(f"checkpoint journal 의 output {outputs} 과 지금 output {sorted(self.output_paths)} 이 다릅니다 "
+                             f"- 처음과 같은 옵션으로 --resume 하거나 --resume 없이 새로 추출 ({self.path})")
+
+    def is_done(self, artist_id):
+        return artist_id in self.done_artists
+
+    def commit_artists(self, entries):
+        """
+        output_sink 가 csv 를 fsync 한 뒤 호출 - 완료된 artist 들과 그 artist 까지 쓴 csv 위치를 journal 에 기록
+        - entries : [(artist_id, album_ids, offsets), ...]
+        """
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for artist_id, albums, offsets in entries:
+                    f.write(json.dumps({"type": "artist", "artist_id": artist_id, "albums": albums, "offsets": offsets}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            for artist_id, albums, offsets in entries:
+                self.done_artists.add(artist_id)
+                self.done_albums.update(albums)
+                self.offsets = offsets
+
+    def finish(self):
+        """
+        추출 완료 기록 - 다음 --resume 에서 날짜를 찾을 때 제외
+        """
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                self.write_entry(f, {"type": "finish"})
+
+    def current_offsets(self):
+        return {name: os.path.getsize(file_path) for name, file_path in self.output_paths.items()}
+
+    @staticmethod
+    def write_entry(f, entry):
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def is_unfinished(path):
+    """
+    start 기록으로 시작했고 마지막 기록이 finish 가 아닌 journal 인지
+    """
+    with open(path, 'rb') as f:
+        lines = f.read().splitlines()
+    try:
+        return json.loads(lines[0])["type"] == "start" and json.loads(lines[-1])["type"] != "finish"
+    except (IndexError, ValueError):
+        return len(lines) > 1           # 마지막 줄이 쓰다가 끊긴 경우 (첫 줄이 끊겼다면 1줄)
+
+
+def find_unfinished(checkpoint_dir):
+    """
+    checkpoint_dir/<ymd>.jsonl 중 이어서 실행할 수 있는 가장 최근 ymd - 없으면 None
+    - 자정을 넘겨서 --resume 해도 어제 시작한 추출을 이어서 실행하기 위함
+    """
+    if not os.path.isdir(checkpoint_dir):
+        return None
+    for file_name in sorted(os.listdir(checkpoint_dir), reverse=True):
+        ymd, extension = os.path.splitext(file_name)
+        if extension == '.jsonl' and ymd.isdigit() and is_unfinished(os.path.join(checkpoint_dir, file_name)):
+            return ymd
+    return None
@@ -0,0 +1,292 @@
+import argparse
+import datetime
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+mylogger = logging.getLogger(__name__)
+
+RESULT_PATH = './result/'
+GRAPH_PATH = './graph/'
+STATE_FILE = 'collab_graph.npz'
+CREDIT_FILE = 'kpop_artist_album_track_credit_data.csv'
+ALBUM_FILE = 'kpop_artist_album_data.csv'
+CREDIT_HEADER = ['track_id', 'album_id', 'artist_id', 'artist_name', 'artist_order', 'release_date']
+
+DAMPING = 0.85              # pagerank damping factor
+MAX_ITER = 100
+TOLERANCE = 1e-10
+
+
+def to_ymd_int(dates):
+    """
+    release_date ('2020' / '2020-05' / '2020-05-28') Series -> yyyymmdd 정수 배열 (알 수 없으면 0)
+    """
+    parsed = pd.to_datetime(dates, format='ISO8601', errors='coerce')
+    return (parsed.dt.year * 10000 + parsed.dt.month * 100 + parsed.dt.day).fillna(0).to_numpy(np.int32)
+
+
+def ymd_text(values):
+    """
+    yyyymmdd 정수 배열 -> 'yyyy-mm-dd' (0 은 빈 값)
+    """
+    text = pd.Series(values.astype(str))
+    return text.str[:4].str.cat([text.str[4:6], text.str[6:]], sep='-').where(values != 0, '')
+
+
+def pair_key(source, target):
+    """
+    (작은 번호, 큰 번호) artist 쌍 -> 정렬 가능한 int64 key
+    """
+    return (source.astype(np.int64) << 32) | target.astype(np.int64)
+
+
+class CollabGraph:
+    """
+    artist 간 콜라보 그래프 (같은 track 에 함께 credit 된 artist 쌍)
+    - artist id 는 정수 번호로 encoding (artist_ids[번호], 처음 보는 artist 는 뒤에 추가)
+    - edge 는 (작은 번호, 큰 번호) 쌍의 key 순으로 정렬된 COO 배열 : 함께한 track 수, 처음 / 마지막 콜라보 일자 (yyyymmdd)
+    - 이미 반영한 track id 는 다시 세지 않음 - 매일 실행해도 새 track 의 credit 만 기존 edge 에 더함
+    - 상태는 npz 1개로 저장 (raw csv 를 다시 읽지 않고 이어서 갱신)
+    """
+
+    def __init__(self):
+        self.artist_ids = np.array([], dtype='S22')
+        self.names = np.array([], dtype=str)
+        self.keys = np.array([], dtype=np.int64)
+        self.counts = np.array([], dtype=np.int32)
+        self.first_dates = np.array([], dtype=np.int32)
+        self.last_dates = np.array([], dtype=np.int32)
+        self.tracks = np.array([], dtype='S22')
+
+    @classmethod
+    def load(cls, state_path):
+        graph = cls()
+        if os.path.exists(state_path):
+            with np.load(state_path, allow_pickle=False) as state:
+                for name in ['artist_ids', 'names', 'keys', 'counts', 'first_dates', 'last_dates', 'tracks']:
+                    setattr(graph, name, state[name])
+        return graph
+
+    def save(self, state_path):
+        """
+        임시 파일에 저장 후 rename (중간에 종료되어도 이전 상태 유지)
+        """
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with open(state_path + '.tmp', 'wb') as f:
+            np.savez_compressed(f, artist_ids=self.artist_ids, names=self.names, keys=self.keys, counts=self.counts,
+                                first_dates=self.first_dates, last_dates=self.last_dates, tracks=self.tracks)
+        os.replace(state_path + '.tmp', state_path)
+
+    @property
+    def artist_count(self):
+        return len(self.artist_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.keys)
+
+    def encode(self, artist_ids, names):
+        """
+        artist id 배열 -> 정수 번호 배열 (처음 보는 artist 는 뒤에 추가)
+        """
+        index = pd.Index(self.artist_ids)
+        codes = index.get_indexer(artist_ids)
+        new = codes == -1
+        if new.any():
+            new_ids, first = np.unique(artist_ids[new], return_index=True)
+            self.artist_ids = np.concatenate([self.artist_ids, new_ids])
+            self.names = np.concatenate([self.names.astype(str), names[new][first].astype(str)])
+            codes = pd.Index(self.artist_ids).get_indexer(artist_ids)
+        return codes
+
+    def add_credits(self, credits):
+        """
+        credit DataFrame (track_id, artist_id, artist_name, date) 중 처음 보는 track 만 edge 에 반영
+        - track 별 artist 쌍은 track_id 로 self join 해서 한번에 생성
+        - 기존 edge 와 합쳐서 key 별 track 수 합계 / 일자 min / max 를 np.unique + bincount 로 계산
+        - return (반영한 track 수, 새로 생긴 edge 수)
+        """
+        track_ids = credits['track_id'].to_numpy('S22')
+        credits = credits[~np.isin(track_ids, self.tracks)]
+        if len(credits) == 0:
+            return 0, 0
+
+        codes = self.encode(credits['artist_id'].to_numpy('S22'), credits['artist_name'].fillna('').to_numpy(str))
+        df = pd.DataFrame({'track_id': credits['track_id'].to_numpy(), 'code': codes, 'date': credits['date'].to_numpy()})
+        df = df.drop_duplicates(['track_id', 'code'])
+        pairs = df.merge(df[['track_id', 'code']], on='track_id', suffixes=('', '_other'))
+        pairs = pairs[pairs['code'] < pairs['code_other']]
+
+        new_tracks = np.unique(df['track_id'].to_numpy('S22'))
+        self.tracks = np.concatenate([self.tracks, new_tracks])
+
+        edge_count = self.edge_count
+        keys = np.concatenate([self.keys, pair_key(pairs['code'].to_numpy(), pairs['code_other'].to_numpy())])
+        counts = np.concatenate([self.counts, np.ones(len(pairs), dtype=np.int32)])
+        dates = pairs['date'].to_numpy(np.int32)
+        first_dates = np.concatenate([self.first_dates, dates])
+        first_dates[first_dates == 0] = np.iinfo(np.int32).max         # 알 수 없는 일자 (0) 는 min 에서 제외
+        last_dates = np.concatenate([self.last_dates, dates])
+
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.keys)).astype(np.int32)
+        self.first_dates = np.full(len(self.keys), np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(self.first_dates, inverse, first_dates)
+        self.first_dates[self.first_dates == np.iinfo(np.int32).max] = 0
+        self.last_dates = np.zeros(len(self.keys), dtype=np.int32)
+        np.maximum.at(self.last_dates, inverse, last_dates)
+        return len(new_tracks), self.edge_count - edge_count
+
+    def edges(self):
+        """
+        return (source 번호, target 번호) - source < target
+        """
+        return (self.keys >> 32).astype(np.int32), (self.keys & 0xFFFFFFFF).astype(np.int32)
+
+    def adjacency(self):
+        """
+        대칭 sparse 인접 행렬 (CSR, 값 : 함께한 track 수)
+        """
+        source, target = self.edges()
+        shape = (self.artist_count, self.artist_count)
+        upper = sparse.coo_matrix((self.counts.astype(np.float64), (source, target)), shape=shape)
+        return (upper + upper.T).tocsr()
+
+
+def pagerank(adjacency, damping=DAMPING, max_iter=MAX_ITER, tol=TOLERANCE):
+    """
+    가중치 (함께한 track 수) pagerank - sparse 행렬 곱 반복, 연결이 없는 artist 의 값은 전체에 균등 분배
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    inverse = np.divide(1.0, strength, out=np.zeros(n), where=strength != 0)
+    transition = (sparse.diags(inverse) @ adjacency).T.tocsr()
+    dangling = strength == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = damping * (transition @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(updated - rank).sum() < tol:
+            return updated
+        rank = updated
+    return rank
+
+
+def eigenvector_centrality(adjacency, max_iter=MAX_ITER, tol=TOLERANCE):
+    """
+    eigenvector centrality - (A + I) x 반복 (A 만 쓰면 이분 그래프에서 진동), 최대값 1 로 정규화
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    shifted = adjacency + sparse.identity(n, format='csr')
+    vector = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = shifted @ vector
+        updated /= np.linalg.norm(updated)
+        if np.abs(updated - vector).sum() < n * tol:
+            break
+        vector = updated
+    return updated / updated.max()
+
+
+def centrality_table(graph):
+    """
+    artist 별 degree (콜라보 artist 수) / weighted degree (콜라보 track 수) / pagerank / eigenvector centrality / 연결 요소
+    """
+    adjacency = graph.adjacency()
+    component_count, components = csgraph.connected_components(adjacency, directed=False)
+    df = pd.DataFrame({
+        'artist_id': graph.artist_ids.astype(str),
+        'artist_name': graph.names.astype(str),
+        'degree': np.diff(adjacency.indptr).astype(np.int32),
+        'weighted_degree': np.asarray(adjacency.sum(axis=1)).ravel().astype(np.int32),
+        'pagerank': pagerank(adjacency).astype(np.float32),
+        'eigenvector': eigenvector_centrality(adjacency).astype(np.float32),
+        'component': components.astype(np.int32),
+        'component_size': np.bincount(components, minlength=component_count)[components].astype(np.int32),
+    })
+    return df.sort_values(['pagerank', 'degree'], ascending=False, ignore_index=True)
+
+
+def edge_table(graph, min_count=1):
+    """
+    dashboard 네트워크 chart 용 edge 목록 (함께한 track 수 min_count 이상)
+    """
+    source, target = graph.edges()
+    keep = graph.counts >= min_count
+    artist_ids, names = graph.artist_ids.astype(str), graph.names.astype(str)
+    df = pd.DataFrame({
+        'source_id': artist_ids[source[keep]], 'source_name': names[source[keep]],
+        'target_id': artist_ids[target[keep]], 'target_name': names[target[keep]],
+        'track_count': graph.counts[keep],
+        'first_date': ymd_text(graph.first_dates[keep]).to_numpy(), 'last_date': ymd_text(graph.last_dates[keep]).to_numpy(),
+    })
+    return df.sort_values('track_count', ascending=False, ignore_index=True)
+
+
+def read_credits(data_path, ymd):
+    """
+    result/<ymd> 의 credit csv + album 발매일 (album 발매일이 없으면 추출 일자)
+    - 발매일은 credit 의 release_date (release_date 컬럼이 없는 이전 credit csv 는 album csv 에서)
+    """
+    credits = pd.read_csv(os.path.join(data_path, CREDIT_FILE), dtype={'track_id': 'string', 'album_id': 'string',
+                                                                       'artist_id': 'string', 'artist_name': 'string',
+                                                                       'release_date': 'string'})
+    album_path = os.path.join(data_path, ALBUM_FILE)
+    if 'release_date' in credits:
+        credits['date'] = to_ymd_int(credits['release_date'])
+    elif os.path.exists(album_path):
+        albums = pd.read_csv(album_path, usecols=['id', 'release_date'], dtype='string').drop_duplicates('id').set_index('id')
+        credits['date'] = to_ymd_int(credits['album_id'].map(albums['release_date']))
+    else:
+        credits['date'] = 0
+    credits.loc[credits['date'] == 0, 'date'] = int(ymd)
+    return credits
+
+
+def update_graph(ymd, result_path=RESULT_PATH, graph_path=GRAPH_PATH, min_count=1):
+    """
+    result/<ymd> 의 credit 을 그래프 상태에 반영하고 degree / centrality / edge 목록 저장 (./graph/<ymd>/)
+    - return 저장한 파일 경로 list
+    """
+    start = time.time()
+    state_path = os.path.join(graph_path, STATE_FILE)
+    graph = CollabGraph.load(state_path)
+
+    data_path = os.path.join(result_path, ymd)
+    if os.path.exists(os.path.join(data_path, CREDIT_FILE)):
+        track_count, new_edge_count = graph.add_credits(read_credits(data_path, ymd))
+        graph.save(state_path)
+        mylogger.info(f"COLLAB GRAPH UPDATE || new track :: {track_count} new edge :: {new_edge_count} "
+                      f"artist :: {graph.artist_count} edge :: {graph.edge_count}")
+    else:
+        mylogger.info(f"COLLAB GRAPH || {os.path.join(data_path, CREDIT_FILE)} 없음 - 기존 그래프로 저장")
+
+    output_path = os.path.join(graph_path, ymd)
+    os.makedirs(output_path, exist_ok=True)
+    file_paths = [os.path.join(output_path, 'artist_centrality.csv'), os.path.join(output_path, 'collab_edges.csv')]
+    centrality_table(graph).to_csv(file_paths[0], index=False, float_format='%.6g')
+    edge_table(graph, min_count).to_csv(file_paths[1], index=False)
+    mylogger.info(f"COLLAB GRAPH SAVE || {output_path} time :: {time.time() - start:.2f}s")
+    return file_paths
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ymd", default=datetime.datetime.now().strftime('%Y%m%d'),
+                        help=f"반영할 result/<ymd>/{CREDIT_FILE} (extract.py --collab 결과)")
+    parser.add_argument("--min-count", type=int, default=1, help="edge 목록에 저장할 최소 콜라보 track 수")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    update_graph(args.ymd, min_count=args.min_count)
@@ -0,0 +1,118 @@
+import ast
+import csv
+
+ROW_GROUP_SIZE = 50000      # parquet row group 당 row 수 (csv 를 이 단위로 읽어서 변환)
+COMPRESSION = "zstd"
+
+# csv 컬럼 순서 그대로의 고정 schema - (컬럼명, 타입)
+TRACK_COLUMNS = [
+    ("id", "string"), ("name", "string"), ("track_href", "string"), ("external_url", "string"),
+    ("artist_id", "string"), ("artist_name", "string"), ("album_id", "string"), ("track_number", "int32"),
+    ("acousticness", "float64"), ("analysis_url", "string"), ("danceability", "float64"), ("duration_ms", "int64"),
+    ("energy", "float64"), ("instrumentalness", "float64"), ("liveness", "float64"), ("loudness", "float64"),
+    ("mode", "int8"), ("speechiness", "float64"), ("tempo", "float64"), ("time_signature", "int8"), ("valence", "float64"),
+]
+
+SCHEMAS = {
+    "artist": [
+        ("id", "string"), ("name", "string"), ("genre", "list<string>"), ("external_url", "string"),
+        ("image_url", "string"), ("polularity", "int32"), ("followers", "int64"),
+    ],
+    "album": [
+        ("id", "string"), ("name", "string"), ("external_url", "string"), ("artist_id", "string"),
+        ("artist_name", "string"), ("image_url", "string"), ("release_date", "string"), ("total_tracks", "int32"),
+    ],
+    "track": TRACK_COLUMNS,
+    "track_popularity": TRACK_COLUMNS + [("popularity", "int32")],
+}
+
+# --parquet-dictionary 일 때 dictionary encoding 하는 컬럼 (반복이 많은 artist id / name)
+DICTIONARY_COLUMNS = {
+    "artist": ["id", "name"],
+    "album": ["artist_id", "artist_name"],
+    "track": ["artist_id", "artist_name"],
+    "track_popularity": ["artist_id", "artist_name"],
+}
+
+
+def arrow_type(pa, type_name):
+    if type_name == "list<string>":
+        return pa.list_(pa.string())
+    return getattr(pa, type_name)()
+
+
+def make_schema(table, dictionary=False):
+    """
+    table 이름에 해당하는 pyarrow schema
+    - dictionary 이면 artist id / name 컬럼은 dictionary<int32, string>
+    """
+    import pyarrow as pa
+
+    dictionary_columns = DICTIONARY_COLUMNS[table] if dictionary else []
+    return pa.schema([
+        (name, pa.dictionary(pa.int32(), pa.string()) if name in dictionary_columns else arrow_type(pa, type_name))
+        for name, type_name in SCHEMAS[table]
+    ])
+
+
+def convert_value(value, type_name):
+    """
+    csv 문자열 (또는 API 값) -> schema 타입 값 / 빈 값은 None
+    """
+    if value is None or value == "":
+        return None
+    if type_name == "list<string>":
+        return ast.literal_eval(value) if isinstance(value, str) else list(value)      # "['k-pop', 'pop']" -> list
+    if type_name.startswith("int"):
+        return int(float(value))
+    if type_name == "float64":
+        return float(value)
+    return str(value)
+
+
+def make_table(rows, table, schema):
+    import pyarrow as pa
+
+    columns = SCHEMAS[table]
+    data = {name: [convert_value(row[idx] if idx < len(row) else None, type_name) for row in rows]
+            for idx, (name, type_name) in enumerate(columns)}
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def csv_to_parquet(csv_path, parquet_path, table, dictionary=False, select=None):
+    """
+    결과 csv 를 typed parquet 으로 변환 (ROW_GROUP_SIZE 단위로 읽어서 저장 - 메모리 일정)
+    - table : SCHEMAS 의 key
+    - select : csv row -> schema 순서 row 변환 함수 (없으면 csv 컬럼 순서 그대로)
+    - return 저장한 row 수
+    """
+    import pyarrow.parquet as pq
+
+    schema = make_schema(table, dictionary)
+    use_dictionary = DICTIONARY_COLUMNS[table] if dictionary else False
+    row_count = 0
+
+    with open(csv_path, 'r', encoding='utf-8') as csvfile, \
+            pq.ParquetWriter(parquet_path, schema, compression=COMPRESSION, use_dictionary=use_dictionary) as writer:
+        csvreader = csv.reader(csvfile)
+        next(csvreader)         # header
+        rows = []
+        for row in csvreader:
+            rows.append(select(row) if select else row)
+            if len(rows) == ROW_GROUP_SIZE:
+                writer.write_table(make_table(rows, table, schema))
+                row_count += len(rows)
+                rows = []
+
+        if len(rows) != 0 or row_count == 0:
+            writer.write_table(make_table(rows, table, schema))
+            row_count += len(rows)
+
+    return row_count
+
+
+def parquet_path(csv_path):
+    """
+    xxx.csv -> xxx.parquet
+    """
+    return csv_path[:-len('.csv')] + '.parquet'
@@ -0,0 +1,105 @@
+import re
+import threading
+from collections import Counter
+
+
+def variant_key(name, release_date, total_tracks, artist_id):
+    """
+    같은 release 의 variant (clean / explicit, 띄어쓰기만 다른 이름 등) 판별 key
+    - (공백 / 특수문자를 제거한 소문자 이름, 발매일, track 수, album 의 첫 artist id)
+    - artist id 가 없으면 다른 artist 의 동명 album (예: 같은 날 나온 'Falling Blossoms') 이 variant 로 묶임
+    """
+    return (re.sub(r'\W+', '', name.lower()), release_date, int(total_tracks), artist_id)
+
+
+class DedupIndex:
+    """
+    thread / coroutine 이 공유하는 album / track id index
+    - 먼저 claim 한 worker 만 tracklist / audio feature 를 요청하고 row 저장
+    - group_variants 이면 이름 / 발매일 / track 수가 같은 album variant 는 처음 것만 추출
+    """
+
+    def __init__(self, group_variants=False):
+        self.group_variants = group_variants
+        self.albums = set()
+        self.tracks = set()
+        self.variants = {}          # variant_key : 대표 album_id
+        self.counter = Counter()
+        self.lock = threading.Lock()
+
+    def add_albums(self, album_ids):
+        """
+        이미 저장된 album 등록 (--resume 시 checkpoint journal 의 album)
+        """
+        with self.lock:
+            self.albums.update(album_ids)
+
+    def restore(self, album_rows, track_ids):
+        """
+        --resume 시 잘라낸 csv 에 남은 row 로 index 복원
+        - album_rows : album csv row (make_album_result 형식) -> album id + variant key
+        - track_ids : track csv 의 id -> 이미 저장된 track 을 다시 claim 하지 않도록
+        """
+        with self.lock:
+            for row in album_rows:
+                self.albums.add(row[0])
+                if self.group_variants:
+                    self.variants.setdefault(variant_key(row[1], row[6], row[7], row[3]), row[0])
+            self.tracks.update(track_ids)
+
+    def claim_album(self, album, retry=False):
+        """
+        처음 보는 album 이면 등록 후 True / 이미 처리된 album 이나 variant 면 False
+        - retry : release 된 album 을 다시 claim 하는 시도 -> 중복이어도 counter 에 다시 세지 않음
+        """
+        with self.lock:
+            if album["id"] in self.albums:
+                if not retry:
+                    self.counter["album_duplicate"] += 1
+                return False
+
+            if self.group_variants:
+                key = variant_key(album["name"], album["release_date"], album["total_tracks"], album["artists"][0]["id"])
+                if key in self.variants:
+                    if not retry:
+                        self.counter["album_variant"] += 1
+                    return False
+                self.variants[key] = album["id"]
+
+            self.albums.add(album["id"])
+            return True
+
+    def release_album(self, album):
+        """
+        tracklist 조회에 실패한 album 의 claim 해제
+        - 같은 release 의 다른 variant 나 다음 실행에서 다시 claim 가능
+        """
+        with self.lock:
+            self.albums.discard(album["id"])
+            if self.group_variants:
+                key = variant_key(album["name"], album["release_date"], album["total_tracks"], album["artists"][0]["id"])
+                if self.variants.get(key) == album["id"]:
+                    del self.variants[key]
+            self.counter["album_released"] += 1
+
+    def claim_tracks(self, track_ids):
+        """
+        track id 별로 처음 보는 id 면 등록 후 True / 이미 처리된 id 면 False (입력 순서대로 list)
+        """
+        with self.lock:
+            claimed = []
+            for track_id in track_ids:
+                if track_id in self.tracks:
+                    self.counter["track_duplicate"] += 1
+                    claimed.append(False)
+                    continue
+                self.tracks.add(track_id)
+                claimed.append(True)
+            return claimed
+
+    def stats(self):
+        """
+        등록된 album / track 수와 건너뛴 중복 수
+        """
+        with self.lock:
+            return dict(album=len(self.albums), track=len(self.tracks), **self.counter)
@@ -1,8 +1,6 @@
-import base64
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 import pprint
-import requests
 import json, csv
 import datetime, time
 import logging
@@ -10,68 +8,50 @@ import os, sys
 import errno
 import queue
 import threading
+import argparse
+
+import http_client
+import spotify_api
+from spotify_api import spotify_get, get_artist_albums, get_audio_features, get_several_albums, get_several_tracks, is_complete_tracklist, is_guest_track, make_album_result, make_credit_result, make_track_result
+from response_cache import ResponseCache
+from token_pool import TokenPool
+from checkpoint import CheckpointJournal, find_unfinished
+import collab_graph
+from columnar import csv_to_parquet, parquet_path
+from dedup_index import DedupIndex
+from log_config import make_log
+from output_sink import OutputSink
+from s3_uploader import S3Uploader
+from snapshot import delta_path, load_previous_snapshot, read_csv_rows
+from work_queue import find_previous_result, get_work, load_artist_cost, make_work_queue, order_by_cost, run_workers
 
 # 기본적인 정보값 설정
-current_directory_path = '/' + '/'.join(os.path.realpath(__file__).split('/')[:-1])
 now = datetime.datetime.now()
 ymd = str(now.year)+str(now.month).zfill(2)+str(now.day).zfill(2)
 timestamp = now.strftime('%Y-%m-%d_%H:%M:%S')
 
-def get_access_token(client_id, client_secret) :
+def save_artist(artist_key, album_list, track_list, issue_list = (), credit_list = ()) :
     """
-    Spotify API를 사용할 때 필요한 Token 인증 방식
-    - 1시간동안 유효한 토큰 발급
+    artist 1명의 album / track / album track error 결과를 output_sink 로 넘김
+    - sink 가 csv 를 fsync 한 뒤 checkpoint journal 에 완료 기록 (--resume 으로 다시 실행하면 건너뜀)
+    - --collab 이면 새로 조회한 track 의 전체 credit artist 도 저장
     """
-    auth_header = base64.b64encode("{}:{}".format(client_id, client_secret).encode('utf-8')).decode('ascii')    # Base64로 인코딩된 인증 헤더 생성
-    token_url = "https://accounts.spotify.com/api/token"
-    headers = {
-        "Authorization" : f'Basic {auth_header}'
-    }
-    payload = {
-        "grant_type" : "client_credentials"
-    }
-
-    response = requests.post(token_url, data = payload, headers= headers)
-    access_token = json.loads(response.text)["access_token"]
-    
-    return {"Authorization" : f"Bearer {access_token}"}
-
-def make_log(ymd):
+    rows = {"album" : album_list, "track" : track_list, "album_track_error" : list(issue_list)}
+    if "credit" in output_paths :
+        rows["credit"] = list(credit_list)
+    if snapshot is not None :
+        # 이전 snapshot 에 없던 album 과 그 track 은 delta 파일에도 저장
+        rows["album_delta"] = [row for row in album_list if not snapshot.has_album(row[0])]
+        rows["track_delta"] = [row for row in track_list if not snapshot.has_album(row[6])]
+    output_sink.write(rows, commit = (artist_key, [row[0] for row in album_list]))
+    spotify_api.metrics.add_rows("album", len(album_list))
+    spotify_api.metrics.add_rows("track", len(track_list))
+
+def is_known_album(album_id) :
     """
-    Logging 라이브러리를 사용하여, 로그를 통해 complete OR error 모니터링
+    --incremental 일 때 이전 snapshot 에 이미 있는 album 인지 확인
     """
-    mylogger = logging.getLogger(ymd)
-    mylogger.setLevel(logging.INFO)
-
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-
-    stream_hander = logging.StreamHandler()
-    stream_hander.setFormatter(formatter)
-    mylogger.addHandler(stream_hander)
-
-    try:
-        if not(os.path.isdir(current_directory_path + "/log/")):
-            os.makedirs(os.path.join(current_directory_path + "/log/"))
-    except OSError as e:
-        if e.errno != errno.EEXIST:
-            print("Failed to create directory!!!!!")
-            raise
-
-
-
-    file_handler = logging.FileHandler(current_directory_path + "/log/"+ymd+".log")
-    mylogger.addHandler(file_handler)
-
-    return mylogger
-
-def add_lists_to_csv(file_path, lists) :
-    """
-    만들어둔 csv 파일에 list 추가
-    """
-    with open(file_path, 'a', encoding = 'utf-8') as csvfile :
-        csvwriter = csv.writer(csvfile)
-        for list in lists:
-            csvwriter.writerow(list)
+    return snapshot is not None and snapshot.has_album(album_id)
 
 def scraping_kpop_artist() : 
     """
@@ -80,7 +60,7 @@ def scraping_kpop_artist() :
     """
     total_artist_list = []
     
-    url = "https://api.spotify.com/v1/search"
+    url = f"{http_client.API_URL}/v1/search"
 
     # 생성할 csv 파일
     f= open(DATA_PATH + '/kpop_artist_data.csv', 'w')
@@ -92,6 +72,7 @@ def scraping_kpop_artist() :
     limit = 50
     cnt = 0
     
+    spotify_api.metrics.start_stage("artist")
     k_genre = ["k-pop", "k-pop girl group", "k-pop boy group", "k-rap", "korean r&b", "korean pop", "korean ost", "k-rap", "korean city pop","classic k-pop", "korean singer-songwriter"]
 
     while True: 
@@ -103,7 +84,7 @@ def scraping_kpop_artist() :
             "limit": limit          # 페이지 당 아티스트 수 
         }
         
-        response = requests.get(url, headers = access_token, params = params)
+        response = spotify_get(url, params = params, resource = "search")
         data = response.json()
 
         if response.status_code == 200 :
@@ -131,6 +112,7 @@ def scraping_kpop_artist() :
                 
                 wr.writerow(result_artist)
                 total_artist_list.append(artist["id"]) # 다음 함수에서 이어 사용하기 위해
+                spotify_api.metrics.add_rows("artist", 1)
                 mylogger.info(f"ARTIST FUCN [{offset + (idx+1)}/{total_artist}] || artist_id :: {artist_id} artist_name :: {artist_name}")
                 cnt += 1
                     
@@ -151,23 +133,21 @@ def scraping_kpop_artist() :
 
 
 
-def artist_albums_track(access_token, album_key) :
+def artist_albums_track(album_key) :
     """
     ALBUM에 해당하는 track 정보 추출
+    - audio feature는 제외한 track 원본 반환 (spotify_api.get_audio_features 로 일괄 조회)
     """
     albums_track_list, albums_track_issue_list = [], []
-    url = f"https://api.spotify.com/v1/albums/{album_key}/tracks"
+    url = f"{http_client.API_URL}/v1/albums/{album_key}/tracks"
+    artist_id = artist_name = track_id = track_name = None      # 첫 페이지부터 실패하면 error row 의 track 정보는 비어있음
     
     # 초기화
-    retries = 0
-    max_retries = 5
-    wait_time = 0
-    
     offset = 0
     limit = 50
     
     try :
-        while retries < max_retries :
+        while True :
             
             params = {
                 "offset" : offset,
@@ -175,71 +155,20 @@ def artist_albums_track(access_token, album_key) :
             }
             
             # album에 해당하는 track 호출
-            response = requests.get(url, headers = access_token, params = params)
+            response = spotify_get(url, params = params, resource = "album_tracks")     # 429 는 spotify_get 에서 다른 credential 로 재시도
             data = response.json()
             
             if response.status_code == 200 :
                 
                 total_track = data["total"]
                 
-                # album 내에 존재하는 전체 트랙 순회
+                # album 내에 존재하는 전체 트랙 순회 - audio feature는 run_thread에서 album을 모아서 일괄 조회
                 for idx, track in enumerate(data["items"]):
                     
                     track_id, track_name = track["id"], track["name"]
                     artist_id, artist_name = track["artists"][0]["id"], track["artists"][0]["name"]
                     
-                    # AUDIO_FEATURE 호출 - Track : feature
-                    audio_url = f'https://api.spotify.com/v1/audio-features/{track_id}'
-                    r = requests.get(audio_url, headers=access_token)
-                    feature = r.json()
-                    # change_feature : NULL 값이 많이 존재 : 없을 시 None 대체
-                    def change_feature(feature):
-                        # 노가다 숨기기
-                        feature["acousticness"] = feature.get("acousticness", None)
-                        feature["analysis_url"] = feature.get("analysis_url", None)
-                        feature["danceability"] = feature.get("danceability", None)
-                        feature["duration_ms"] = feature.get("duration_ms", None)
-                        feature["energy"] = feature.get("energy", None)
-                        feature["feature_id"] = feature.get("id", None)
-                        feature["instrumentalness"] = feature.get("instrumentalness", None)
-                        feature["liveness"] = feature.get("liveness", None)
-                        feature["loudness"] = feature.get("loudness", None)
-                        feature["mode"] = feature.get("mode", None)
-                        feature["speechiness"] = feature.get("speechiness", None)
-                        feature["tempo"] = feature.get("tempo", None)
-                        feature["time_signature"] = feature.get("time_signature", None)
-                        feature["valence"] = feature.get("valence", None)
-                        feature["track_href"] = feature.get("track_href", None)
-                        return feature
-                    feature = change_feature(feature)
-                    # track 추출 대상
-                    track_result = [
-                                track["id"]
-                                ,track["name"]
-                                ,feature["track_href"]
-                                ,track["external_urls"]["spotify"]
-                                ,artist_id
-                                ,artist_name
-                                ,album_key
-                                ,track["track_number"]
-                                
-                                # feature
-                                ,feature["acousticness"]
-                                ,feature["analysis_url"]
-                                ,feature["danceability"]
-                                ,feature["duration_ms"]
-                                ,feature["energy"]
-                                ,feature["instrumentalness"]
-                                ,feature["liveness"]
-                                ,feature["loudness"]
-                                ,feature["mode"]
-                                ,feature["speechiness"]
-                                ,feature["tempo"]
-                                ,feature["time_signature"]
-                                ,feature["valence"]
-                    ]
-                    
-                    albums_track_list.append(track_result) # thread 함수에서 csv에 저장할 list 만들기
+                    albums_track_list.append(track) # thread 함수에서 feature 붙여서 csv에 저장할 list 만들기
                     mylogger.info(f"TRACK DONE [{idx+1}/{total_track}] || artist_id :: {artist_id} artist_name :: {artist_name} track_id :: {track_id} track_name :: {track_name} album_id :: {album_key} ")
                     
                 offset += limit
@@ -247,15 +176,6 @@ def artist_albums_track(access_token, album_key) :
                     mylogger.info(f"ARTIST's ALBUM TRACK SUCCESS || {album_key}에 해당하는 전체 Track 탐색이 완료되었습니다.")
                     break
                 
-            elif response.status_code == 429 :
-                # API 제한이 발생
-                # exceed API 이슈 존재하여, retires와 header에 있는 wait 정보값을 이용하여 해결
-                wait_time = int(response.headers.get('Retry-After', 0))
-                mylogger.info(f"TRACK ISSUE {album_key} || 429 status_code / API exceed issue")
-                mylogger.info(f"Rate limited. Waiting for {wait_time} seconds...")
-                time.sleep(wait_time)
-                retries += 1
-                
             else:
                 # 그래도 다른 이슈가 존재한다면, log에서 check
                 mylogger.info(f"TRACK ERROR || artist_id :: {artist_id} artist_name :: {artist_name} track_id :: {track_id} track_name :: {track_name} album_id :: {album_key}")
@@ -275,36 +195,73 @@ def artist_albums_track(access_token, album_key) :
 
 
 
-def run_thread(start, end, data_q, error_q, token_queue) : 
-    cnt = 0
+def guest_credits(guest_albums, full_albums) :
+    """
+    --collab : 추출 대상이 아닌 artist 가 첫 artist 인 album (객원 참여) 의 credit
+    - album / track row 는 저장하지 않고, 추출 대상 artist 가 credit 된 track 의 credit row 만 반환
+    - tracklist 조회에 실패한 album 은 claim 해제 후 error row
+    """
+    credit_list, issue_list = [], []
     
-    offset = 0
-    limit = 50
+    for album in guest_albums :
+        album_id, album_name = album["id"], album["name"]
+        try :
+            full_album = full_albums.get(album_id)
+            if is_complete_tracklist(full_album) :
+                albums_track_list, albums_track_issue_list = full_album["tracks"]["items"], []
+            else :
+                albums_track_list, albums_track_issue_list = artist_albums_track(album_id)
+            
+            if len(albums_track_issue_list) != 0 :
+                issue_list.extend(albums_track_issue_list)
+                dedup_index.release_album(album)
+                continue
+            
+            credit_list.extend(row for track in albums_track_list if is_guest_track(track, guest_artist_keys) for row in make_credit_result(track, album_id, album["release_date"]))
+            mylogger.info(f"GUEST ALBUM DONE || album_id :: {album_id} album_name :: {album_name}")
+        except Exception as e :
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            issue_list.append([album_id, e, exc_tb.tb_lineno])
+            dedup_index.release_album(album)
+            mylogger.info(f"GUEST ALBUM ERROR || album_id :: {album_id} album_name :: {album_name}")
     
-    thread_album_list = []
+    return credit_list, issue_list
+
+
+
+def run_thread(work_q, data_q, error_q) : 
+    cnt = 0
     
-    # ARTIST LIST를 기준으로 SLICING
-    for idx, line in enumerate(total_artist_list[start:end]) :
-        artist_key = line                  # artist_id
-        access_token = token_queue.get()   # token 가져오기
+    # 공유 작업 queue 에서 ARTIST를 하나씩 꺼내서 처리 (queue가 빌 때까지)
+    while True :
+        artist_key = get_work(work_q)      # artist_id
+        if artist_key is None :
+            break
         
         try :
-            album_url = f"https://api.spotify.com/v1/artists/{artist_key}/albums"
-            
-            params = {
-                "offset" : offset,
-                "limit" : limit
-            }
-            
-            response = requests.get(album_url, headers = access_token, params = params)
-            data = response.json()
+            # ARTIST의 전체 album 목록 - 첫 페이지의 total 로 나머지 페이지 동시 조회
+            response, album_items = get_artist_albums(artist_key)
         
             if response.status_code == 200 :
                 
-                total_album = data["total"]
+                total_album = len(album_items)
+                artist_album_list = []
+                artist_issue_list = []      # album track 조회 error - artist 단위로 저장
+                artist_track_list = []      # (album_id, track) - feature는 artist 단위로 모아서 일괄 조회
+                known_track_list = []       # 이전 snapshot 에서 재사용하는 track row
+                
+                # 다른 thread 가 이미 처리한 album (또는 같은 release 의 variant) 은 제외
+                claimed_album_ids = [album["id"] for album in album_items if album["artists"][0]["id"] == artist_key and dedup_index.claim_album(album)]
+                
+                # --collab : 추출 대상이 아닌 artist 의 album 에 객원 참여 -> credit 만 저장 (추출 대상 artist 의 album 은 그 artist 가 처리)
+                guest_albums = [album for album in album_items if guest_artist_keys is not None and album["artists"][0]["id"] not in guest_artist_keys and dedup_index.claim_album(album)]
+                
+                # ARTIST의 앨범을 albums?ids= 로 20개씩 일괄 조회 (tracklist 포함) - 이전 snapshot 에 있는 album 은 제외
+                album_ids = [album_id for album_id in claimed_album_ids if not is_known_album(album_id)]
+                full_albums = get_several_albums(album_ids + [album["id"] for album in guest_albums])
                 
                 # ARTIST의 앨범 순회
-                for idx, album in enumerate(data["items"]):
+                for idx, album in enumerate(album_items):
                     
                     try : 
                         album_artist_id = album["artists"][0]["id"]
@@ -314,45 +271,74 @@ def run_thread(start, end, data_q, error_q, token_queue) :
                         if album_artist_id != artist_key :
                             continue
                         
+                        if album_id not in claimed_album_ids :
+                            # 앞의 variant 가 tracklist 조회에 실패해서 release 되었으면 이 album 으로 다시 claim
+                            if not dedup_index.claim_album(album, retry = True) :
+                                mylogger.info(f"ALBUM DUPLICATE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+                                continue
+                            claimed_album_ids.append(album_id)
+                        
+                        # 이전 snapshot 에 있는 album - tracklist / audio feature 는 바뀌지 않으므로 이전 결과 재사용
+                        if is_known_album(album_id) :
+                            known_track_list.extend(snapshot.album_tracks(album_id))
+                            artist_album_list.append(make_album_result(album))
+                            mylogger.info(f"ALBUM REUSE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+                            continue
+                        
                         ###################################################
                         #        해당하는 앨범에 속해있는 TRACK 가져오기
                         ###################################################
-                        albums_track_list, albums_track_issue_list = artist_albums_track(access_token, album_id)        # album에 있는 track 스크래핑
-                        add_lists_to_csv(artist_album_track_path, albums_track_list)                                    # album에 해당하는 track csv에 추가하기
+                        full_album = full_albums.get(album_id)
+                        if is_complete_tracklist(full_album) :
+                            albums_track_list, albums_track_issue_list = full_album["tracks"]["items"], []              # albums?ids= 응답에 전체 track 포함
+                        else :
+                            albums_track_list, albums_track_issue_list = artist_albums_track(album_id)    # 50곡 초과 album은 페이지 단위 스크래핑
+                        
+                        if len(albums_track_issue_list) != 0 :
+                            # tracklist 조회 실패 -> error csv 로 관리 + claim 해제 (album / 일부 track 은 저장하지 않음)
+                            artist_issue_list.extend(albums_track_issue_list)
+                            dedup_index.release_album(album)
+                            mylogger.info(f"ALBUM RELEASE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
+                            continue
                         
-                        if len(albums_track_issue_list) != 0:
-                            # 만약 return 받은 album_track_issue_list가 존재한다면, error csv 로 관리
-                            os.makedirs(ERROR_PATH , exist_ok=True)                                                     # ERROR 있으면 생성
-                            option = 'a' if os.path.exists(ERROR_PATH + f'/error_album_track_{timestamp}.csv') else 'w' # 최초 생성이면 write / 최초 생성이 아니면 add
-                            f = open(ERROR_PATH + f'/error_album_track_{timestamp}.csv', option, encoding = 'utf-8')
-                            wr = csv.writer(f)
-                            for error_line in albums_track_issue_list : 
-                                wr.writerow(error_line)
-                            f.close()
-                            
-                        mylogger.info(f"ALBUM'S TRACK SAVE || artist_id :: {artist_key} album_id :: {album_id}")
+                        mylogger.info(f"ALBUM'S TRACK SCAN || artist_id :: {artist_key} album_id :: {album_id}")
                         ###################################################
                         
                         # API에서 추출할 Album 값
-                        album_result = [ 
-                            album["id"]
-                            , album["name"]
-                            , album["external_urls"]["spotify"] 
-                            , album["artists"][0]["id"]
-                            , album["artists"][0]["name"]               # artist가 한명은 아닌 것 같지만..! -> csv 명세에 맞춰 1명으로 고정
-                            , album["images"][0]["url"]
-                            , album["release_date"]
-                            , album["total_tracks"]
-                        ]
+                        album_result = make_album_result(album)
                         
-                        thread_album_list.append(album_result)                  # artist_album을 한 스레드 단위로 추가
+                        artist_track_list.extend((album_id, track) for track in albums_track_list)                      # feature 조회 대상에 추가
+                        artist_album_list.append(album_result)                  # artist 단위로 track 과 함께 저장
                         mylogger.info(f"ALBUM DONE [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
-                    except :
+                    except Exception as e :
+                        # claim 한 album 이면 error csv 에 남기고 claim 해제
+                        if album.get("id") in claimed_album_ids :
+                            exc_type, exc_obj, exc_tb = sys.exc_info()
+                            artist_issue_list.append([album["id"], e, exc_tb.tb_lineno])
+                            dedup_index.release_album(album)
                         mylogger.info(f"ALBUM ERROR [{idx+1}/{total_album}] || artist_id :: {artist_key} album_id :: {album_id} album_name :: {album_name}")
                         
+                ###################################################
+                #   ARTIST 전체 앨범 TRACK의 audio feature 일괄 조회
+                ###################################################
+                claimed = dedup_index.claim_tracks([row[0] for row in known_track_list] + [track["id"] for _, track in artist_track_list])     # 이미 저장된 track 제외
+                artist_track_list = [item for item, is_new in zip(artist_track_list, claimed[len(known_track_list):]) if is_new]
+                known_track_list = [row for row, is_new in zip(known_track_list, claimed) if is_new]
+                features = get_audio_features([track["id"] for _, track in artist_track_list])
+                release_dates = {album["id"] : album["release_date"] for album in album_items}
+                credit_list = [row for album_id, track in artist_track_list for row in make_credit_result(track, album_id, release_dates[album_id])]
+                if len(guest_albums) != 0 :
+                    guest_credit_list, guest_issue_list = guest_credits(guest_albums, full_albums)
+                    credit_list += guest_credit_list
+                    artist_issue_list += guest_issue_list
+                save_artist(artist_key, artist_album_list, known_track_list + [make_track_result(track, album_id, features[track["id"]]) for album_id, track in artist_track_list], artist_issue_list, credit_list)
+                mylogger.info(f"ARTIST's ALBUM / TRACK SAVE || artist_id :: {artist_key} album count :: {len(artist_album_list)} track count :: {len(known_track_list) + len(artist_track_list)} new track count :: {len(artist_track_list)}")
+            
+            else :
+                mylogger.info(f"ARTIST's ALBUM ERROR || artist_id :: {artist_key} status_code : {response.status_code} error_msg : {response.text}")
                         
             # 추출한 특정 artist key에 해당하는 artist의 1개의 앨범 완료
-            mylogger.info(f"ARTIST's ALBUM SUCCESS [{cnt+1}/{len(total_artist_list[start:end])}] || artist_id :: {artist_key} - artist가 보유한 앨범 추출 완료")
+            mylogger.info(f"ARTIST's ALBUM SUCCESS [{len(total_artist_list) - work_q.qsize()}/{len(total_artist_list)}] || artist_id :: {artist_key} - artist가 보유한 앨범 추출 완료")
             data_q.put(1)
             cnt += 1
             
@@ -360,19 +346,13 @@ def run_thread(start, end, data_q, error_q, token_queue) :
             exc_type, exc_obj, exc_tb = sys.exc_info()
             err_lineno = exc_tb.tb_lineno
             
-            mylogger.info(f"ARTIST's ALBUM ERROR [{cnt+1}/{len(total_artist_list[start:end])}] || artist_id :: {artist_key} error_msg :: {e} err_lieno :: {err_lineno} - artist가 보유한 앨범 추출 실패")
+            mylogger.info(f"ARTIST's ALBUM ERROR [{len(total_artist_list) - work_q.qsize()}/{len(total_artist_list)}] || artist_id :: {artist_key} error_msg :: {e} err_lieno :: {err_lineno} - artist가 보유한 앨범 추출 실패")
             error_q.put([artist_key, e, err_lineno])
             cnt += 1
-        
-        # token 반환
-        token_queue.put(access_token)
-        
-    # Thread를 기준으로 artist가 가지고 있는 앨범 저장
-    add_lists_to_csv(artist_album_path, thread_album_list)
-    mylogger.info(f"THRED WRITE {artist_key} ALBUM on kpop_artist_album_data.csv")
-    mylogger.info(f"THREAD DONE || 완료된 artist_key : {artist_key} 완료된 aritst count :: {cnt}")
 
-def extract_track(token_queue) :
+    mylogger.info(f"THREAD DONE || 완료된 aritst count :: {cnt}")
+
+def extract_track() :
     total_track_list = []
     # csv load
     # with open('./load/global_popular_track_id_list.csv', 'r') as csvfile:
@@ -384,14 +364,15 @@ def extract_track(token_queue) :
     f= open(DATA_PATH + '/global_popular_track.csv', 'w')
     wr = csv.writer(f)
     wr.writerow(['id' , 'name', 'track_href','external_url' , 'artist_id', 'artist_name', 'album_id', 'track_number', 'acousticness', 'analysis_url', 'danceability', 'duration_ms', 'energy',  'instrumentalness', 'liveness', 'loudness', 'mode', 'speechiness', 'tempo', 'time_signature', 'valence'])
-    access_token = token_queue.get()
     track_json = dict()
+    
+    # TRACK 일괄 호출 (50개 단위)
+    tracks = get_several_tracks(total_track_list)
     for idx, track_key in enumerate(total_track_list) :
-            
-        # TRACK 호출
-        track_url = f"https://api.spotify.com/v1/tracks/{track_key}"
-        r = requests.get(track_url, headers=access_token)
-        track = r.json()
+        track = tracks[track_key]
+        if track is None :
+            mylogger.info(f"TRACK ERROR [{idx+1}/{len(total_track_list)}] || track_id :: {track_key} - track 정보 없음")
+            continue
         
         track_json[track_key] = {
             "track_id" : track_key,
@@ -406,39 +387,13 @@ def extract_track(token_queue) :
     mylogger.info(f"TRACK INFO 스캔 완료")
     
 
-    token_queue = queue.Queue()
-    for client_id, client_secret in client_info :
-        token_queue.put(get_access_token(client_id, client_secret))
+    # AUDIO_FEATURE 일괄 호출 - Track : feature (100개 단위)
+    features = get_audio_features(total_track_list)
     
     for idx, track_key in enumerate(total_track_list) :
-        access_token = token_queue.get()
-        # AUDIO_FEATURE 호출 - Track : feature
-        audio_url = f'https://api.spotify.com/v1/audio-features/{track_key}'
-        res = requests.get(audio_url, headers=access_token)
-        feature = res.json()
-        if res.status_code != 200 :
-            print(res.text)
-            time.sleep(5)
-        # change_feature : NULL 값이 많이 존재 : 없을 시 None 대체
-        def change_feature(feature):
-            # 노가다 숨기기
-            feature["acousticness"] = feature.get("acousticness", None)
-            feature["analysis_url"] = feature.get("analysis_url", None)
-            feature["danceability"] = feature.get("danceability", None)
-            feature["duration_ms"] = feature.get("duration_ms", None)
-            feature["energy"] = feature.get("energy", None)
-            feature["feature_id"] = feature.get("id", None)
-            feature["instrumentalness"] = feature.get("instrumentalness", None)
-            feature["liveness"] = feature.get("liveness", None)
-            feature["loudness"] = feature.get("loudness", None)
-            feature["mode"] = feature.get("mode", None)
-            feature["speechiness"] = feature.get("speechiness", None)
-            feature["tempo"] = feature.get("tempo", None)
-            feature["time_signature"] = feature.get("time_signature", None)
-            feature["valence"] = feature.get("valence", None)
-            feature["track_href"] = feature.get("track_href", None)
-            return feature
-        feature = change_feature(feature)
+        if track_key not in track_json :
+            continue
+        feature = features[track_key]
 
         track_result = [
                     track_key
@@ -467,7 +422,6 @@ def extract_track(token_queue) :
         ]
         
         wr.writerow(track_result)
-        token_queue.put(access_token)
         mylogger.info(f"TRACK DONE [{idx+1}/{len(total_track_list)}] || track_id :: {track_key}")
     f.close()
 
@@ -475,6 +429,56 @@ def extract_track(token_queue) :
 
 if __name__ == "__main__" :
     
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread",
+                        help="thread : 20 thread 로 artist 분할 추출 / async : asyncio 동시 요청 추출")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="async engine 의 최대 동시 요청 수 (동시에 추출하는 artist 수)")
+    parser.add_argument("--cost-weighted", action="store_true",
+                        help="이전 실행의 artist 별 album 수가 많은 순서로 처리")
+    parser.add_argument("--pool-size", type=int, default=http_client.POOL_SIZE,
+                        help="host 별 keep-alive connection 수")
+    parser.add_argument("--timeout", type=float, default=http_client.TIMEOUT[1],
+                        help="HTTP 응답 대기 시간(초)")
+    parser.add_argument("--cache", action="store_true",
+                        help="album / tracklist / audio feature 응답을 로컬 cache 에 저장하고 재사용")
+    parser.add_argument("--resume", action="store_true",
+                        help="중간에 종료된 추출을 checkpoint journal 기준으로 이어서 실행 (--ymd 가 없으면 끝나지 않은 가장 최근 journal)")
+    parser.add_argument("--ymd", default=None,
+                        help="추출 결과를 저장할 result/<ymd> (기본 오늘)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="이전 result/<ymd> 결과에 있는 album 은 재사용하고 새 album 만 추출 + 변경분(_delta.csv) 저장")
+    parser.add_argument("--include-groups", type=lambda value: value.split(","), default=None,
+                        help="조회할 album group (album,single,compilation,appears_on 중 , 로 구분) - 기본은 전체")
+    parser.add_argument("--parquet", action="store_true",
+                        help="csv 와 함께 컬럼 타입이 고정된 parquet (zstd) 저장")
+    parser.add_argument("--parquet-dictionary", action="store_true",
+                        help="parquet 저장 시 artist id / name 컬럼 dictionary encoding")
+    parser.add_argument("--upload", action="store_true",
+                        help="추출하는 동안 결과 파일을 S3 에 multipart streaming upload")
+    parser.add_argument("--s3-bucket", default="spotify-kpop-analysis")
+    parser.add_argument("--s3-prefix", default="result_data/")
+    parser.add_argument("--s3-endpoint", default=None,
+                        help="S3 호환 서버 주소 (local test 용, 예: http://127.0.0.1:5000)")
+    parser.add_argument("--gzip", action="store_true",
+                        help="upload 할 때 gzip 압축 (.gz)")
+    parser.add_argument("--dedup-variants", action="store_true",
+                        help="이름 / 발매일 / track 수가 같은 album variant 는 하나만 추출")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="metrics JSON 과 함께 log 폴더에 Prometheus text 파일 (.prom) 저장")
+    parser.add_argument("--collab", action="store_true",
+                        help="track 의 전체 credit artist 저장 + 콜라보 그래프 갱신 (./graph/) - 추출하는 album 은 그대로, 다른 artist 의 album 에 객원 참여한 track 은 credit 만 저장")
+    parser.add_argument("--log-mode", choices=["queue", "sync"], default="queue",
+                        help="queue : listener thread 1개가 log 기록 (worker 는 queue 에 넣기만) / sync : 기존 방식")
+    parser.add_argument("--log-sample", type=int, default=1,
+                        help="album / track 단위 log 를 N 개마다 1개만 기록 (종료 시 종류별 전체 수 기록)")
+    parser.add_argument("--log-json", action="store_true",
+                        help="log 를 JSON 1줄 단위로 기록")
+    parser.add_argument("--log-dir", default="./log/",
+                        help="log / metrics 파일을 저장할 폴더 (기본 실행 위치의 ./log/)")
+    args = parser.parse_args()
+    http_client.configure(pool_size=args.pool_size, timeout=(http_client.TIMEOUT[0], args.timeout))
+    
     # secret json 가져오기 - extract와 동일한 경로에 secret 업로드
     with open('./secret.json', 'r') as jsonfile :
         client_info = json.load(jsonfile)
@@ -483,14 +487,13 @@ if __name__ == "__main__" :
     CLIENT_ID = client_info["client_id"]
     CLIENT_SECRET = client_info["client_secret"]
     
-    # 대표 TOKEN
-    access_token = get_access_token(CLIENT_ID, CLIENT_SECRET) # Artist 추출할 때 처음 지정할 token 생성
+    # TOKEN pool 만들기 - 대표 TOKEN + client_info, 요청마다 가장 여유있는 token 사용 / 만료 전 재발급
+    token_pool = TokenPool([[CLIENT_ID, CLIENT_SECRET]] + client_info["client_info"])
 
-    # TOKEN queue 만들기
-    token_queue = queue.Queue()
-    for client_id, client_secret in client_info["client_info"] :
-        token_queue.put(get_access_token(client_id, client_secret))
 
+    # 추출 날짜 - --resume 은 자정을 넘겨도 끝나지 않은 journal 의 날짜로 이어서 실행
+    resume_ymd = find_unfinished('./checkpoint/') if args.resume and args.ymd is None else None
+    ymd = args.ymd or resume_ymd or ymd
 
     # FILE LOCATION 고정 변수
     DATA_PATH = './result/' + ymd + '/'
@@ -498,20 +501,30 @@ if __name__ == "__main__" :
     artist_path = DATA_PATH + 'kpop_artist_data_1000.csv'                            # artist csv 저장 경로
     artist_album_path = DATA_PATH + 'kpop_artist_album_data.csv'                # artist의 album csv 저장 경로
     artist_album_track_path = DATA_PATH + 'kpop_artist_album_track_data.csv'    # track csv 저장 경로
+    CACHE_PATH = './cache/spotify_response.sqlite'                                 # 응답 cache 저장 경로
+    CHECKPOINT_PATH = './checkpoint/' + ymd + '.jsonl'                             # 완료된 artist journal 경로
     os.makedirs(DATA_PATH, exist_ok = True) 
 
     # Logger
-    mylogger = make_log(timestamp)
+    mylogger = make_log(timestamp, args.log_dir, args.log_mode, args.log_sample, args.log_json)
+    spotify_api.mylogger = mylogger     # batch 조회 함수도 같은 logger 사용
+    collab_graph.mylogger = mylogger
+    spotify_api.token_pool = token_pool
+    spotify_api.include_groups = args.include_groups
+    if args.cache :
+        spotify_api.response_cache = ResponseCache(CACHE_PATH)
     
-    # extract_track(token_queue)
+    # extract_track()
 
     
     #####################################################
     #               ARTIST 추출  
     #####################################################   
+    metrics = spotify_api.metrics
     if not os.path.exists(DATA_PATH + 'kpop_artist_data.csv'):
         # artist 스크래핑 해오기
-        total_artist_list = scraping_kpop_artist()
+        with metrics.phase("artist") :
+            total_artist_list = scraping_kpop_artist()
     else :
         # 만약 스크래핑을 이미 해왔다면, csv를 기준으로 항목 가져오기
         total_artist_list = []
@@ -525,39 +538,127 @@ if __name__ == "__main__" :
     # TEST (artist 10명에 대한 album & track 만 가져오기)
     # total_artist_list = total_artist_list[:10]
     
-    # KPOP ARTIST ALBUM 정보 - csv 파일 우선 생성
-    with open(artist_album_path, 'w', encoding = 'utf-8') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['id','name', 'external_url', 'artist_id', 'artist_name', 'image_url', 'release_date', 'total_tracks'])
+    # 이전 실행의 album 수 기준으로 오래 걸리는 artist 먼저 처리
+    if args.cost_weighted :
+        previous_album_path = find_previous_result('./result/', 'kpop_artist_album_data.csv', ymd)
+        total_artist_list = order_by_cost(total_artist_list, load_artist_cost(previous_album_path))
+        mylogger.info(f"COST WEIGHTED || 이전 결과 :: {previous_album_path}")
+    
+    # --collab : 객원 참여 album 에서 credit 을 저장할 추출 대상 artist (--resume 으로 건너뛰는 artist 포함)
+    guest_artist_keys = set(total_artist_list) if args.collab else None
+    
+    # 이전 snapshot - 없으면 전체 추출
+    snapshot = load_previous_snapshot('./result/', ymd) if args.incremental else None
+    output_paths = {"album" : artist_album_path, "track" : artist_album_track_path}
+    if args.collab :
+        output_paths["credit"] = DATA_PATH + collab_graph.CREDIT_FILE        # track 별 전체 credit artist
+    if snapshot is not None :
+        mylogger.info(f"INCREMENTAL || 이전 결과 :: {snapshot.path} album :: {len(snapshot.albums)} track :: {snapshot.track_count}")
+        output_paths.update(album_delta = delta_path(artist_album_path), track_delta = delta_path(artist_album_track_path))
+        
+        # 새로 추가되었거나 followers / polularity 가 바뀐 artist
+        artist_header, artist_rows = read_csv_rows(DATA_PATH + 'kpop_artist_data.csv')
+        with open(delta_path(DATA_PATH + 'kpop_artist_data.csv'), 'w', encoding = 'utf-8') as csvfile:
+            csvwriter = csv.writer(csvfile)
+            csvwriter.writerow(artist_header)
+            csvwriter.writerows(snapshot.changed_artists(artist_rows, artist_header))
     
-    # KPOP ARTIST ALBUM의 TRACK 정보 - csv 파일 우선 생성
-    with open(artist_album_track_path, 'w', encoding = 'utf-8') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['id' , 'name', 'track_href','external_url' , 'artist_id', 'artist_name', 'album_id', 'track_number', 'acousticness', 'analysis_url', 'danceability', 'duration_ms', 'energy',  'instrumentalness', 'liveness', 'loudness', 'mode', 'speechiness', 'tempo', 'time_signature', 'valence'])
+    journal = CheckpointJournal(CHECKPOINT_PATH, output_paths)
+    dedup_index = DedupIndex(group_variants = args.dedup_variants)     # thread 들이 공유하는 album / track id index
+    
+    if args.resume and os.path.exists(CHECKPOINT_PATH) and journal.resume() :
+        # 마지막으로 완료된 artist 이후에 쓰인 row 는 잘라내고, 완료된 artist 는 건너뜀
+        dedup_index.add_albums(journal.done_albums)
+        dedup_index.restore(read_csv_rows(artist_album_path)[1], [row[0] for row in read_csv_rows(artist_album_track_path)[1]])
+        if "credit" in output_paths :
+            dedup_index.add_albums({row[1] for row in read_csv_rows(output_paths["credit"])[1]})      # 객원 참여 album
+        total_artist_list = [artist_key for artist_key in total_artist_list if not journal.is_done(artist_key)]
+        mylogger.info(f"RESUME || {CHECKPOINT_PATH} 완료된 artist :: {len(journal.done_artists)} 남은 artist :: {len(total_artist_list)}")
+    else :
+        if args.resume :
+            mylogger.info(f"RESUME || 이어서 실행할 journal 없음 ({CHECKPOINT_PATH}) - 새로 추출")
+        # KPOP ARTIST ALBUM 정보 - csv 파일 우선 생성
+        for file_path in [output_paths[name] for name in output_paths if name.startswith("album")] :
+            with open(file_path, 'w', encoding = 'utf-8') as csvfile:
+                csvwriter = csv.writer(csvfile)
+                csvwriter.writerow(['id','name', 'external_url', 'artist_id', 'artist_name', 'image_url', 'release_date', 'total_tracks'])
+        
+        # KPOP ARTIST ALBUM의 TRACK 정보 - csv 파일 우선 생성
+        for file_path in [output_paths[name] for name in output_paths if name.startswith("track")] :
+            with open(file_path, 'w', encoding = 'utf-8') as csvfile:
+                csvwriter = csv.writer(csvfile)
+                csvwriter.writerow(['id' , 'name', 'track_href','external_url' , 'artist_id', 'artist_name', 'album_id', 'track_number', 'acousticness', 'analysis_url', 'danceability', 'duration_ms', 'energy',  'instrumentalness', 'liveness', 'loudness', 'mode', 'speechiness', 'tempo', 'time_signature', 'valence'])
+        
+        # TRACK 별 CREDIT ARTIST 정보 (--collab)
+        if "credit" in output_paths :
+            with open(output_paths["credit"], 'w', encoding = 'utf-8') as csvfile:
+                csv.writer(csvfile).writerow(collab_graph.CREDIT_HEADER)
+        
+        journal.start()
+    
+    # S3 upload - 완성된 artist csv 는 바로, album / track csv 는 추출하는 동안 쌓인 만큼 part 단위로 upload
+    uploader = None
+    if args.upload :
+        uploader = S3Uploader(args.s3_bucket, args.s3_prefix, endpoint_url = args.s3_endpoint, gzip = args.gzip)
+        uploader.upload(DATA_PATH + 'kpop_artist_data.csv')
+        if snapshot is not None :
+            uploader.upload(delta_path(DATA_PATH + 'kpop_artist_data.csv'))
+        for file_path in output_paths.values() :
+            uploader.stream(file_path)
+    
+    # album / track / error csv 는 writer thread 1개가 모아서 저장 (fsync 후 S3 upload 이어서 진행)
+    output_sink = OutputSink(dict(output_paths, album_track_error = ERROR_PATH + f'error_album_track_{timestamp}.csv'), journal,
+                             on_flush = uploader.feed if uploader is not None else None).start()
 
     
-    #################################################
-    #                   Thread
-    #################################################
     data_q = queue.Queue()
     error_q = queue.Queue()
     
-    thread_count = 20
-    thread_list = []
-    
-    work = len(total_artist_list) // thread_count  
+    extract_start = time.time()
+    metrics.start_stage("album", "track", "feature")
+    if args.engine == "async" :
+        #################################################
+        #                   Asyncio
+        #################################################
+        import asyncio
+        import async_extract
+        async_extract.mylogger = mylogger
+        
+        error_rows, data_count = asyncio.run(
+            async_extract.run_async(total_artist_list, token_pool, args.concurrency, save_artist, dedup_index, snapshot, guest_artist_keys))
+        
+        [data_q.put(1) for _ in range(data_count)]
+        [error_q.put(error_row) for error_row in error_rows]
     
-    for i in range(thread_count) : 
-        start =  i * work
+    else :
+        #################################################
+        #                   Thread
+        #################################################
+        thread_count = 20
         
-        if i == thread_count - 1 :
-            end = len(total_artist_list)
-        else:
-            end = (i+1) * work
-        thread_list.append(threading.Thread(target=run_thread, args = (start, end, data_q, error_q, token_queue))) 
+        # 고정 slicing 대신 공유 작업 queue - 먼저 끝난 thread가 다음 artist를 가져감
+        work_q = make_work_queue(total_artist_list)
+        run_workers(run_thread, thread_count, (work_q, data_q, error_q))
+    
+    # 남은 row 저장 후 writer thread 종료
+    output_sink.close()
+    journal.finish()
+    metrics.add_phase("extract", time.time() - extract_start)
+    
+    # 오늘 새로 조회한 track 의 credit 을 콜라보 그래프에 반영 - 그래프 상태 (./graph/collab_graph.npz) 에 이어서 갱신
+    if args.collab :
+        with metrics.phase("graph") :
+            collab_graph.update_graph(ymd)
     
-    [thread.start() for thread in thread_list]
-    [thread.join() for thread in thread_list]        
+    # csv 와 함께 typed parquet 저장 - genre 는 list, audio feature 는 float 컬럼
+    if args.parquet :
+        parquet_outputs = [(DATA_PATH + 'kpop_artist_data.csv', "artist"), (artist_album_path, "album"), (artist_album_track_path, "track")]
+        if snapshot is not None :
+            parquet_outputs += [(delta_path(file_path), table) for file_path, table in parquet_outputs]
+        with metrics.phase("parquet") :
+            for file_path, table in parquet_outputs :
+                row_count = csv_to_parquet(file_path, parquet_path(file_path), table, dictionary = args.parquet_dictionary)
+                mylogger.info(f"PARQUET SAVE || {parquet_path(file_path)} row count :: {row_count}")
 
     # ERROR 확인
     data_count = data_q.qsize()
@@ -579,16 +680,36 @@ if __name__ == "__main__" :
     print('=====================================')
     mylogger.info(f"data_count :: {data_count}")
     mylogger.info(f"error_count :: {error_count}")
-    sys.exit(0)
+    mylogger.info(f"token_pool :: {token_pool.stats()}")
+    mylogger.info(f"rate_limiter :: {spotify_api.rate_limiter.rates()}")
+    mylogger.info(f"dedup_index :: {dedup_index.stats()}")
+    mylogger.info(f"output_sink :: {output_sink.stats()}")
+    if spotify_api.response_cache is not None :
+        mylogger.info(f"response_cache :: {spotify_api.response_cache.stats()}")
+    
     #########################################################
     # S3에 업로드 
-    # - 다음 명령어는 s3 cli 설치해서 aws configure을 등록해주어야 함
-    # - 작성자는 access key 만듬
+    # - boto3 multipart upload (aws configure 또는 AWS_* 환경변수의 access key 사용)
+    # - album / track csv 는 추출하는 동안 이미 upload 되고 남은 부분만 upload
     ##########################################################
-    os.system(f'aws s3 cp {artist_path} s3://spotify-kpop-analysis/result_data/')
-    mylogger.info(f"upload S3 bucket {artist_path} to s3://spotify-kpop-analysis/result_data/")
-    os.system(f'aws s3 cp {artist_album_path} s3://spotify-kpop-analysis/result_data/')
-    mylogger.info(f"upload S3 bucket {artist_album_path} to s3 s3://spotify-kpop-analysis/result_data/")
-    os.system(f'aws s3 cp {artist_album_track_path} s3://spotify-kpop-analysis/result_data/')
-    mylogger.info(f"upload S3 bucket {artist_album_track_path} s3://spotify-kpop-analysis/result_data/")
-    mylogger.info(f"DONE")
\ No newline at end of file
+    if uploader is not None :
+        with metrics.phase("upload") :
+            if args.parquet :
+                for file_path, table in parquet_outputs :
+                    uploader.upload(parquet_path(file_path), gzip = False)     # parquet 은 이미 zstd 압축
+            for s3_url, size in uploader.wait() :
+                mylogger.info(f"upload S3 bucket {s3_url} size :: {size}")
+            uploader.close()
+    
+    # metrics - log 와 같은 폴더에 <timestamp>.metrics.json (+ --prometheus 면 <timestamp>.prom)
+    metrics_extra = {"data_count" : data_count, "error_count" : error_count, "token_pool" : token_pool.stats(),
+                     "rate_limiter" : spotify_api.rate_limiter.rates(), "dedup_index" : dedup_index.stats(), "output_sink" : output_sink.stats()}
+    if spotify_api.response_cache is not None :
+        metrics_extra["response_cache"] = spotify_api.response_cache.stats()
+    metrics_path = os.path.join(args.log_dir, timestamp)
+    summary = metrics.write_json(metrics_path + ".metrics.json", metrics_extra)
+    if args.prometheus :
+        metrics.write_prometheus(metrics_path + ".prom", metrics_extra)
+    mylogger.info(f"METRICS || {metrics_path}.metrics.json wall_time :: {summary['wall_time']} phases :: {summary['phases']} waits :: {summary['waits']}")
+    mylogger.info(f"DONE")
+    sys.exit(0)
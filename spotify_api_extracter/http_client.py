@@ -0,0 +1,81 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = 20                  # host 별 keep-alive connection 수
+TIMEOUT = (5, 30)               # (connect, read) 초
+HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# Spotify API / 인증 서버 주소 - local mock 서버 (mock_spotify_server.py) 로 test 할 때 환경 변수로 변경
+API_URL = os.environ.get("SPOTIFY_API_URL", "https://api.spotify.com")
+ACCOUNTS_URL = os.environ.get("SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com")
+
+_local = threading.local()
+
+
+def configure(pool_size=None, timeout=None):
+    """
+    connection pool 크기 / timeout 변경 - 새로 만드는 session 부터 적용
+    """
+    global POOL_SIZE, TIMEOUT
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if timeout is not None:
+        TIMEOUT = timeout
+
+
+def make_session(pool_size=None):
+    """
+    keep-alive connection 을 재사용하는 requests session 생성
+    - 매 요청마다 TCP + TLS handshake 하지 않도록
+    """
+    pool_size = pool_size or POOL_SIZE
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def get_session():
+    """
+    thread 별 session 반환 (thread 마다 1개 생성 후 재사용)
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = make_session()
+    return session
+
+
+def get(url, **kwargs):
+    """
+    requests.get 대신 사용 - thread 별 keep-alive session + 기본 timeout
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """
+    requests.post 대신 사용 - thread 별 keep-alive session + 기본 timeout
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    return get_session().post(url, **kwargs)
+
+
+def make_async_session(pool_size=None):
+    """
+    asyncio 용 keep-alive session (aiohttp) 생성
+    - connection 수는 pool_size 로 제한, gzip 응답 자동 해제
+    """
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=pool_size or POOL_SIZE, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(sock_connect=TIMEOUT[0], sock_read=TIMEOUT[1])
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"Accept-Encoding": HEADERS["Accept-Encoding"]})
@@ -1,15 +1,262 @@
-import requests
-from PIL import Image
+import argparse
+import csv
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
 
-s3_url = "s3://spotify-kpop-analysis/image/"
+import http_client
 
-url = "https://i.scdn.co/image/ab67616d0000b2731ea977fb83d93e179882f643"
+mylogger = logging.getLogger(__name__)
 
-res = requests.get(url)
-print(res.status_code)
+S3_BUCKET = "spotify-kpop-analysis"
+S3_PREFIX = "image/"
+BUCKET_URL = f"https://{S3_BUCKET}.s3.us-west-2.amazonaws.com/{S3_PREFIX}"
 
-img = Image.open(BytesIO(res.content))
-img = img.resize((128,128))
-img.show()
-img.save('./test.jpg', 'JPEG', qualty = 85) # 압축
\ No newline at end of file
+THUMBNAIL_SIZE = (128, 128)
+QUALITY = 85
+DOWNLOAD_WORKERS = 32           # 동시에 다운로드하는 이미지 수 (I/O)
+RESIZE_WORKERS = os.cpu_count() or 1        # decode / resize process 수 (CPU)
+MAX_PENDING = 256               # 다운로드 후 resize 를 기다리는 이미지 수 - 메모리에 올라가는 원본 수 제한
+
+THUMBNAIL_PATH = './thumbnail/'
+IMAGE_PATH = THUMBNAIL_PATH + 'image/'
+MAP_PATH = THUMBNAIL_PATH + 'thumbnail_map.csv'
+UPLOADED_PATH = THUMBNAIL_PATH + 'uploaded.txt'        # S3 에 upload 완료한 content_hash (1줄에 1개)
+MAP_HEADER = ['image_url', 'content_hash', 'bucket_url']
+
+# image_url 을 읽을 결과 csv - (파일명, image_url 컬럼 위치)
+IMAGE_SOURCES = [
+    ('kpop_artist_data.csv', 4),
+    ('kpop_artist_album_data.csv', 5),
+]
+
+
+def make_thumbnail(content, thumbnail_path):
+    """
+    원본 이미지 -> THUMBNAIL_SIZE JPEG 저장 (process pool 에서 실행)
+    - JPEG 은 draft 로 decode 할 때부터 축소해서 읽음 (640x640 원본을 전부 decode 하지 않음)
+    """
+    from PIL import Image
+
+    img = Image.open(BytesIO(content))
+    img.draft('RGB', THUMBNAIL_SIZE)
+    img = img.convert('RGB').resize(THUMBNAIL_SIZE)
+
+    # 다른 process 가 읽다가 깨진 파일을 보지 않도록 임시 파일에 저장 후 rename
+    tmp_path = thumbnail_path + f'.{os.getpid()}.tmp'
+    img.save(tmp_path, 'JPEG', quality=QUALITY)
+    os.replace(tmp_path, thumbnail_path)
+    return thumbnail_path
+
+
+def read_image_urls(data_path):
+    """
+    결과 csv 의 image_url 목록 (중복 / 빈 값 제외, 처음 나온 순서)
+    """
+    urls = {}
+    for file_name, column in IMAGE_SOURCES:
+        file_path = os.path.join(data_path, file_name)
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as csvfile:
+            csvreader = csv.reader(csvfile)
+            next(csvreader)
+            for row in csvreader:
+                if len(row) > column and row[column] != "":
+                    urls[row[column]] = True
+    return list(urls)
+
+
+def load_thumbnail_map(map_path=MAP_PATH):
+    """
+    이전 실행에서 만든 image_url -> (content_hash, bucket_url) - thumbnail 파일이 남아있는 것만
+    """
+    thumbnail_map = {}
+    if not os.path.exists(map_path):
+        return thumbnail_map
+    with open(map_path, 'r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if os.path.exists(IMAGE_PATH + row['content_hash'] + '.jpg'):
+                thumbnail_map[row['image_url']] = (row['content_hash'], row['bucket_url'])
+    return thumbnail_map
+
+
+class ThumbnailPipeline:
+    """
+    image_url 목록 -> thumbnail 생성
+    - 다운로드 : DOWNLOAD_WORKERS thread (http_client keep-alive session)
+    - decode / resize : RESIZE_WORKERS process (GIL 없이 모든 core 사용)
+    - 이미 map 에 있는 url 은 건너뛰고, 다른 url 이라도 내용 (sha1) 이 같으면 thumbnail 1개만 생성
+    - 다운로드 한 원본은 MAX_PENDING 개까지만 메모리에 보관 (resize 가 밀리면 다운로드 대기)
+    """
+
+    def __init__(self, thumbnail_map, download_workers=DOWNLOAD_WORKERS, resize_workers=RESIZE_WORKERS, max_pending=MAX_PENDING):
+        self.thumbnail_map = thumbnail_map
+        self.download_workers = download_workers
+        self.resize_workers = resize_workers
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.hashes = {content_hash: None for content_hash, _ in thumbnail_map.values()}     # content_hash : resize future
+        self.lock = threading.Lock()
+        self.new_rows = []
+        self.errors = []
+        self.counter = {"download": 0, "resize": 0, "hash_duplicate": 0, "skip": 0, "error": 0}
+
+    def process(self, url, resize_executor):
+        try:
+            res = http_client.get(url)
+            if res.status_code != 200:
+                raise ValueError(f"status code {res.status_code}")
+            content = res.content
+        except Exception as e:
+            self.pending.release()
+            with self.lock:
+                self.counter["error"] += 1
+                self.errors.append([url, str(e)])
+            mylogger.info(f"IMAGE ERROR || {url} {e}")
+            return
+
+        content_hash = hashlib.sha1(content).hexdigest()
+        with self.lock:
+            self.counter["download"] += 1
+            self.new_rows.append([url, content_hash, BUCKET_URL + content_hash + '.jpg'])
+            if content_hash in self.hashes:
+                # 같은 이미지가 다른 url 로 이미 처리됨
+                self.counter["hash_duplicate"] += 1
+                self.pending.release()
+                return
+            future = self.hashes[content_hash] = resize_executor.submit(make_thumbnail, content, IMAGE_PATH + content_hash + '.jpg')
+
+        future.add_done_callback(lambda _: self.pending.release())
+
+    def run(self, urls):
+        """
+        return 새로 만든 map row [[image_url, content_hash, bucket_url], ...]
+        """
+        os.makedirs(IMAGE_PATH, exist_ok=True)
+        todo = [url for url in urls if url not in self.thumbnail_map]
+        self.counter["skip"] = len(urls) - len(todo)
+
+        with ProcessPoolExecutor(max_workers=self.resize_workers) as resize_executor, \
+                ThreadPoolExecutor(max_workers=self.download_workers) as download_executor:
+            futures = []
+            for url in todo:
+                self.pending.acquire()
+                futures.append(download_executor.submit(self.process, url, resize_executor))
+            for future in futures:
+                future.result()
+
+            for content_hash, future in list(self.hashes.items()):
+                if future is None:
+                    continue
+                try:
+                    future.result()
+                    self.counter["resize"] += 1
+                except Exception as e:
+                    # decode 실패한 이미지는 map 에서 제외
+                    self.counter["error"] += 1
+                    self.errors += [[row[0], str(e)] for row in self.new_rows if row[1] == content_hash]
+                    self.new_rows = [row for row in self.new_rows if row[1] != content_hash]
+                    mylogger.info(f"IMAGE ERROR || {content_hash} {e}")
+
+        return self.new_rows
+
+
+def save_thumbnail_map(rows, map_path=MAP_PATH):
+    """
+    새로 만든 map row 를 map csv 에 추가 (다음 실행에서 건너뜀)
+    """
+    is_new = not os.path.exists(map_path)
+    with open(map_path, 'a', encoding='utf-8', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        if is_new:
+            csvwriter.writerow(MAP_HEADER)
+        csvwriter.writerows(rows)
+
+
+def upload_thumbnails(uploader, thumbnail_map, uploaded_path=UPLOADED_PATH):
+    """
+    map 의 thumbnail 중 아직 upload 하지 않은 것만 S3 에 upload 후 uploaded_path 에 기록
+    - key 가 content_hash 라서 한번 올린 thumbnail 은 바뀌지 않음 -> 다른 url 의 같은 이미지나 다음 실행에서 다시 올리지 않음
+    - 이전 실행에서 --upload 없이 만들었거나 upload 가 실패한 thumbnail 은 이번에 upload
+    - return upload 한 thumbnail 수
+    """
+    uploaded = set()
+    if os.path.exists(uploaded_path):
+        with open(uploaded_path, 'r', encoding='utf-8') as f:
+            uploaded = {line.strip() for line in f if line.strip()}
+
+    content_hashes = sorted({content_hash for content_hash, _ in thumbnail_map.values()} - uploaded)
+    for content_hash in content_hashes:
+        uploader.upload(IMAGE_PATH + content_hash + '.jpg', gzip=False)
+    uploader.wait()
+
+    with open(uploaded_path, 'a', encoding='utf-8') as f:
+        f.writelines(content_hash + '\n' for content_hash in content_hashes)
+    return len(content_hashes)
+
+
+def fill_bucket_url(data_path, thumbnail_map):
+    """
+    결과 csv 에 bucket_url 컬럼을 붙여서 xxx_image.csv 로 저장 (thumbnail 이 없으면 빈 값)
+    """
+    for file_name, column in IMAGE_SOURCES:
+        file_path = os.path.join(data_path, file_name)
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as csvfile, \
+                open(file_path[:-len('.csv')] + '_image.csv', 'w', encoding='utf-8', newline='') as outfile:
+            csvreader = csv.reader(csvfile)
+            csvwriter = csv.writer(outfile)
+            csvwriter.writerow(next(csvreader) + ['bucket_url'])
+            for row in csvreader:
+                url = row[column] if len(row) > column else ""
+                csvwriter.writerow(row + [thumbnail_map[url][1] if url in thumbnail_map else ""])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ymd", default=datetime.datetime.now().strftime('%Y%m%d'),
+                        help="image_url 을 읽을 result/<ymd> (기본 : 오늘)")
+    parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS,
+                        help="동시에 다운로드하는 이미지 수")
+    parser.add_argument("--resize-workers", type=int, default=RESIZE_WORKERS,
+                        help="resize process 수 (기본 : cpu 수)")
+    parser.add_argument("--upload", action="store_true",
+                        help="새로 만든 thumbnail 을 S3 (spotify-kpop-analysis/image/) 에 upload")
+    parser.add_argument("--s3-endpoint", default=None,
+                        help="S3 호환 서버 주소 (local test 용)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    data_path = './result/' + args.ymd + '/'
+    start = time.time()
+    urls = read_image_urls(data_path)
+    thumbnail_map = load_thumbnail_map()
+
+    pipeline = ThumbnailPipeline(thumbnail_map, args.download_workers, args.resize_workers)
+    new_rows = pipeline.run(urls)
+    save_thumbnail_map(new_rows)
+    thumbnail_map.update({url: (content_hash, bucket_url) for url, content_hash, bucket_url in new_rows})
+    fill_bucket_url(data_path, thumbnail_map)
+
+    if len(pipeline.errors) != 0:
+        with open(data_path + 'image_error.csv', 'w', encoding='utf-8', newline='') as csvfile:
+            csvwriter = csv.writer(csvfile)
+            csvwriter.writerow(['image_url', 'error'])
+            csvwriter.writerows(pipeline.errors)
+
+    if args.upload:
+        from s3_uploader import S3Uploader
+
+        uploader = S3Uploader(S3_BUCKET, prefix=S3_PREFIX, endpoint_url=args.s3_endpoint)
+        mylogger.info(f"upload S3 bucket image count :: {upload_thumbnails(uploader, thumbnail_map)}")
+        uploader.close()
+
+    mylogger.info(f"THUMBNAIL || url count :: {len(urls)} {pipeline.counter} time :: {time.time() - start:.1f}s")
@@ -0,0 +1,151 @@
+import atexit
+import errno
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+from collections import Counter
+
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# album / track 마다 찍히는 log - sampling 대상 (prefix 가 종류)
+ITEM_PATTERN = re.compile(r"^(TRACK DONE|ALBUM DONE|ALBUM'S TRACK SCAN|ALBUM DUPLICATE|ALBUM REUSE|BATCH DONE|ARTIST FUCN(?= \[\d))")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    log 1줄 = JSON 1개 (time / level / logger / thread / message, sampling 정보)
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "kind", None) is not None:
+            entry.update(kind=record.kind, seen=record.seen)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    album / track 단위 log 는 종류별로 처음 1개 + every 개마다 1개만 남김
+    - 남기는 log 에는 지금까지 본 수를 붙임 (진행 상황은 그대로 확인 가능)
+    - 종료 시 summary() 로 종류별 전체 수 기록
+    """
+
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = every
+        self.counter = Counter()
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        match = ITEM_PATTERN.match(str(record.msg))
+        if match is None:
+            return True
+
+        kind = match.group(1)
+        with self.lock:
+            self.counter[kind] += 1
+            seen = self.counter[kind]
+        if self.every > 1 and seen % self.every != 1:
+            return False
+
+        record.kind, record.seen = kind, seen
+        if self.every > 1:
+            record.msg = f"{record.msg} (sampled {seen})"
+        return True
+
+    def summary(self):
+        """
+        종류별 지금까지 본 log 수
+        """
+        with self.lock:
+            return dict(self.counter)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    worker thread 는 record 를 queue 에 넣기만 함 - 포맷 / 파일 쓰기는 listener thread 에서
+    """
+
+    def prepare(self, record):
+        # 같은 process 안의 queue 라서 pickle 준비 없이 message 만 확정
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def make_handlers(log_path, json_format=False):
+    formatter = JsonFormatter() if json_format else logging.Formatter(FORMAT)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    file_handler = logging.FileHandler(log_path)
+    if json_format:
+        file_handler.setFormatter(formatter)
+    return [stream_handler, file_handler]
+
+
+def make_log(ymd, log_dir, mode="queue", sample=1, json_format=False):
+    """
+    Logging 라이브러리를 사용하여, 로그를 통해 complete OR error 모니터링
+    - mode sync : handler 에서 바로 stream / 파일에 기록 (기존 방식)
+    - mode queue : QueueHandler 로 queue 에만 넣고 listener thread 1개가 stream / 파일에 기록 (worker 는 I/O 대기 없음)
+    - sample : album / track 단위 log 를 N 개마다 1개만 기록
+    - json_format : log 1줄을 JSON 으로 기록
+    """
+    mylogger = logging.getLogger(ymd)
+    mylogger.setLevel(logging.INFO)
+
+    try:
+        if not (os.path.isdir(log_dir)):
+            os.makedirs(os.path.join(log_dir))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            print("Failed to create directory!!!!!")
+            raise
+
+    handlers = make_handlers(os.path.join(log_dir, ymd + ".log"), json_format)
+    sampling_filter = SamplingFilter(sample)
+    mylogger.addFilter(sampling_filter)         # 버릴 log 는 queue 에 넣기 전에 worker thread 에서 제외
+
+    if mode == "queue":
+        log_queue = queue.SimpleQueue()         # 크기 제한 없음 - put 이 block 되지 않음
+        mylogger.addHandler(LogQueueHandler(log_queue))
+
+        listener = logging.handlers.QueueListener(log_queue, *handlers)
+        listener.start()
+        mylogger.log_listener = listener
+    else:
+        for handler in handlers:
+            mylogger.addHandler(handler)
+
+    mylogger.sampling_filter = sampling_filter
+    atexit.register(stop_log, mylogger)
+    return mylogger
+
+
+def stop_log(mylogger):
+    """
+    종류별 log 수 기록 후 queue 에 남은 log 를 모두 쓰고 listener 종료
+    """
+    sampling_filter = getattr(mylogger, "sampling_filter", None)
+    if sampling_filter is not None and sampling_filter.every > 1:
+        mylogger.info(f"LOG SUMMARY || {sampling_filter.summary()}")
+        mylogger.sampling_filter = None
+
+    listener = getattr(mylogger, "log_listener", None)
+    if listener is not None:
+        listener.stop()
+        mylogger.log_listener = None
@@ -0,0 +1,220 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)     # 응답 시간 histogram 구간 (초)
+ID_PATTERN = re.compile(r'/[A-Za-z0-9]{22}(?=/|$)')             # url 의 Spotify id -> {id}
+
+
+def endpoint_name(url):
+    """
+    https://api.spotify.com/v1/artists/<id>/albums -> /v1/artists/{id}/albums
+    """
+    return ID_PATTERN.sub('/{id}', urlparse(url).path)
+
+
+def escape_label(value):
+    """
+    Prometheus label 값 escape (url / client id 에 \\, ", 줄바꿈이 있으면 text format 이 깨짐)
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # 마지막은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            idx = len(self.buckets)
+        self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        histogram 구간으로 추정한 분위수 (구간 상한값)
+        """
+        target = q * self.count
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            cumulative += count
+            if count != 0 and cumulative >= target:
+                return self.buckets[idx] if idx < len(self.buckets) else float("inf")
+        return 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+class Metrics:
+    """
+    추출 실행 전체의 요청 / 대기 / 처리량 집계 (thread / coroutine 공유)
+    - endpoint 별 응답 시간 histogram, status code 별 요청 수, 재시도 수
+    - credential 별 429 수
+    - stage (artist / album / track / feature / popularity) 별 row 수와 초당 row 수
+    - 대기 시간 (rate limit / credential 차단 / HTTP) 합계, 단계별 wall clock
+    - 느린 실행이 network / rate limit / 저장 중 어디서 막히는지 확인용
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latency = {}                   # endpoint : Histogram
+        self.requests = Counter()           # (endpoint, status) : 요청 수
+        self.retries = Counter()            # endpoint : 재시도 수
+        self.rate_limited = Counter()       # client_id : 429 수
+        self.rows = Counter()               # stage : row 수
+        self.stage_times = {}               # stage : [시작, 마지막 row 시각]
+        self.waits = Counter()              # 이름 : 대기 시간 합계(초, thread 합산)
+        self.phases = {}                    # 단계 : wall clock(초)
+
+    def observe_request(self, url, status, seconds, client_id=None):
+        endpoint = endpoint_name(url)
+        with self.lock:
+            self.latency.setdefault(endpoint, Histogram()).observe(seconds)
+            self.requests[(endpoint, str(status))] += 1
+            self.waits["http"] += seconds
+            if status == 429 and client_id is not None:
+                self.rate_limited[client_id] += 1
+
+    def add_retry(self, url):
+        with self.lock:
+            self.retries[endpoint_name(url)] += 1
+
+    def add_wait(self, name, seconds):
+        if seconds > 0:
+            with self.lock:
+                self.waits[name] += seconds
+
+    def start_stage(self, *stages):
+        """
+        stage 시작 시각 기록 (초당 row 수 계산 기준)
+        """
+        now = time.time()
+        with self.lock:
+            for stage in stages:
+                self.stage_times.setdefault(stage, [now, now])
+
+    def add_rows(self, stage, count):
+        now = time.time()
+        with self.lock:
+            self.rows[stage] += count
+            self.stage_times.setdefault(stage, [now, now])[1] = now
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """
+        with metrics.phase("parquet"): ... - 단계별 wall clock
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.time() - start)
+
+    def summary(self, extra=None):
+        """
+        JSON 으로 저장할 집계 결과 - extra : 다른 모듈의 stats (response_cache / output_sink 등)
+        """
+        with self.lock:
+            stages = {}
+            for stage, count in self.rows.items():
+                start, end = self.stage_times[stage]
+                stages[stage] = {"rows": count, "rows_per_sec": round(count / (end - start), 2) if end > start else None}
+
+            status_counts = {}
+            for (endpoint, status), count in sorted(self.requests.items()):
+                status_counts.setdefault(endpoint, {})[status] = count
+
+            result = {
+                "wall_time": round(time.time() - self.started, 3),
+                "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "waits": {name: round(seconds, 3) for name, seconds in sorted(self.waits.items())},
+                "requests": {
+                    endpoint: dict(latency=histogram.summary(), status=status_counts.get(endpoint, {}), retries=self.retries[endpoint])
+                    for endpoint, histogram in sorted(self.latency.items())
+                },
+                "request_count": sum(self.requests.values()),
+                "retry_count": sum(self.retries.values()),
+                "rate_limited": dict(self.rate_limited),
+                "stages": stages,
+            }
+        result.update(extra or {})
+        return result
+
+    def write_json(self, path, extra=None):
+        summary = self.summary(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        return summary
+
+    def write_prometheus(self, path, extra=None):
+        """
+        Prometheus text format (node_exporter textfile collector 로 수집)
+        """
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP spotify_{name} {help_text}")
+            lines.append(f"# TYPE spotify_{name} {metric_type}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{escape_label(label_value)}"' for key, label_value in labels.items())
+                lines.append(f"spotify_{name}{{{label_text}}} {value}" if label_text else f"spotify_{name} {value}")
+
+        with self.lock:
+            lines.append("# HELP spotify_request_duration_seconds Spotify API 응답 시간")
+            lines.append("# TYPE spotify_request_duration_seconds histogram")
+            for endpoint, histogram in sorted(self.latency.items()):
+                endpoint = escape_label(endpoint)
+                cumulative = 0      # bucket 은 누적 값
+                for bound, count in zip([str(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'spotify_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'spotify_request_duration_seconds_sum{{endpoint="{endpoint}"}} {histogram.sum:.6f}')
+                lines.append(f'spotify_request_duration_seconds_count{{endpoint="{endpoint}"}} {histogram.count}')
+
+            metric("requests_total", "counter", "status code 별 요청 수",
+                   [({"endpoint": endpoint, "status": status}, count) for (endpoint, status), count in sorted(self.requests.items())])
+            metric("retries_total", "counter", "401 / 429 재시도 수",
+                   [({"endpoint": endpoint}, count) for endpoint, count in sorted(self.retries.items())])
+            metric("rate_limited_total", "counter", "credential 별 429 수",
+                   [({"client_id": client_id}, count) for client_id, count in sorted(self.rate_limited.items())])
+            metric("rows_total", "counter", "stage 별 row 수",
+                   [({"stage": stage}, count) for stage, count in sorted(self.rows.items())])
+            metric("wait_seconds_total", "counter", "대기 시간 합계 (thread 합산)",
+                   [({"name": name}, f"{seconds:.3f}") for name, seconds in sorted(self.waits.items())])
+            metric("phase_seconds", "gauge", "단계별 wall clock",
+                   [({"phase": name}, f"{seconds:.3f}") for name, seconds in self.phases.items()])
+
+        # 다른 모듈 stats 중 숫자 값만 gauge 로
+        for section, values in (extra or {}).items():
+            if isinstance(values, dict):
+                samples = [({"key": key}, value) for key, value in sorted(values.items()) if isinstance(value, (int, float))]
+                if samples:
+                    metric(section, "gauge", f"{section} stats", samples)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
@@ -0,0 +1,278 @@
+import argparse
+import ast
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DATA_PATH = './result/'
+FIXTURE_YMD = '20230601'
+# popularity 가 있는 v2 우선
+TRACK_FILES = ['kpop_artist_album_track_data_v2.csv', 'kpop_artist_album_track_data.csv']
+FEATURE_KEYS = ['acousticness', 'danceability', 'duration_ms', 'energy', 'instrumentalness', 'liveness',
+                'loudness', 'mode', 'speechiness', 'tempo', 'time_signature', 'valence']
+
+ROUTES = [
+    (re.compile(r'^/v1/search$'), 'search'),
+    (re.compile(r'^/v1/artists/([^/]+)/albums$'), 'artist_albums'),
+    (re.compile(r'^/v1/albums/([^/]+)/tracks$'), 'album_tracks'),
+    (re.compile(r'^/v1/albums$'), 'albums'),
+    (re.compile(r'^/v1/tracks/([^/]+)$'), 'track'),
+    (re.compile(r'^/v1/tracks$'), 'tracks'),
+    (re.compile(r'^/v1/audio-features/([^/]+)$'), 'audio_feature'),
+    (re.compile(r'^/v1/audio-features$'), 'audio_features'),
+]
+
+
+def to_number(value):
+    if value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def read_rows(file_path):
+    with open(file_path, 'r', encoding='utf-8') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+class SpotifyFixture:
+    """
+    result/<ymd> 의 csv 로 만든 Spotify API 응답 데이터
+    - artist : kpop_artist_data.csv / album : kpop_artist_album_data.csv / track + audio feature : track csv
+    - 응답 JSON 은 extract.py / re_extract_track_popularity.py 가 읽는 필드만 포함
+    """
+
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self.artists = [self.make_artist(row) for row in read_rows(os.path.join(data_path, 'kpop_artist_data.csv'))]
+
+        self.albums = {}
+        self.artist_albums = defaultdict(list)
+        for row in read_rows(os.path.join(data_path, 'kpop_artist_album_data.csv')):
+            # 여러 artist 로 저장된 album 은 처음 artist 를 album artist 로
+            self.albums.setdefault(row['id'], self.make_album(row))
+            self.artist_albums[row['artist_id']].append(row['id'])
+
+        track_file = next(name for name in TRACK_FILES if os.path.exists(os.path.join(data_path, name)))
+        self.tracks, self.features = {}, {}
+        self.album_tracks = defaultdict(list)
+        for row in read_rows(os.path.join(data_path, track_file)):
+            track = self.make_track(row)
+            self.tracks.setdefault(row['id'], track)
+            self.features.setdefault(row['id'], self.make_feature(row))
+            self.album_tracks[row['album_id']].append(track)
+
+    @staticmethod
+    def make_artist(row):
+        return {
+            "id": row['id'], "name": row['name'], "genres": ast.literal_eval(row['genre']),
+            "external_urls": {"spotify": row['external_url']},
+            "images": [{"url": row['image_url']}] if row['image_url'] else [],
+            "popularity": int(row['polularity']), "followers": {"total": int(row['followers'])},
+        }
+
+    @staticmethod
+    def make_album(row):
+        return {
+            "id": row['id'], "name": row['name'], "external_urls": {"spotify": row['external_url']},
+            "artists": [{"id": row['artist_id'], "name": row['artist_name']}],
+            "images": [{"url": row['image_url']}], "release_date": row['release_date'],
+            "total_tracks": int(row['total_tracks']), "album_group": "album", "album_type": "album",
+        }
+
+    @staticmethod
+    def make_track(row):
+        return {
+            "id": row['id'], "name": row['name'], "external_urls": {"spotify": row['external_url']},
+            "artists": [{"id": row['artist_id'], "name": row['artist_name']}],
+            "track_number": int(row['track_number']), "popularity": to_number(row.get('popularity', '')) or 0,
+            "album": {"id": row['album_id']},
+        }
+
+    @staticmethod
+    def make_feature(row):
+        if row['acousticness'] == '':
+            return None
+        feature = {key: to_number(row[key]) for key in FEATURE_KEYS}
+        feature.update(id=row['id'], track_href=row['track_href'], analysis_url=row['analysis_url'])
+        return feature
+
+    @staticmethod
+    def page(items, query, path):
+        offset, limit = int(query.get('offset', 0)), int(query.get('limit', 20))
+        return {
+            "items": items[offset:offset + limit], "total": len(items), "offset": offset, "limit": limit,
+            "next": None if offset + limit >= len(items) else f"{path}?offset={offset + limit}&limit={limit}",
+        }
+
+    def response(self, route, path_id, query, path):
+        """
+        return (status code, 응답 JSON)
+        """
+        ids = query['ids'].split(',') if 'ids' in query else []
+        if route == 'search':
+            return 200, {"artists": self.page(self.artists, query, path)}
+        if route == 'artist_albums':
+            groups = query['include_groups'].split(',') if 'include_groups' in query else None
+            albums = [self.albums[album_id] for album_id in self.artist_albums.get(path_id, [])
+                      if groups is None or self.albums[album_id]["album_group"] in groups]
+            return 200, self.page(albums, query, path)
+        if route == 'album_tracks':
+            if path_id not in self.albums:
+                return 404, {"error": {"status": 404, "message": "Non existing id"}}
+            return 200, self.page(self.album_tracks[path_id], query, path)
+        if route == 'albums':
+            albums = []
+            for album_id in ids:
+                album = self.albums.get(album_id)
+                if album is not None:
+                    # albums?ids= 응답은 tracklist 첫 페이지(50곡) 포함
+                    album = dict(album, tracks=self.page(self.album_tracks[album_id], {'limit': 50}, f"/v1/albums/{album_id}/tracks"))
+                albums.append(album)
+            return 200, {"albums": albums}
+        if route == 'tracks':
+            return 200, {"tracks": [self.tracks.get(track_id) for track_id in ids]}
+        if route == 'audio_features':
+            return 200, {"audio_features": [self.features.get(track_id) for track_id in ids]}
+
+        # track / audio_feature 1개 조회
+        item = (self.tracks if route == 'track' else self.features).get(path_id)
+        if item is None:
+            return 404, {"error": {"status": 404, "message": "Non existing id"}}
+        return 200, item
+
+
+class SpotifyHandler(BaseHTTPRequestHandler):
+    """
+    extract.py / re_extract_track_popularity.py 를 credential 없이 실행하기 위한 local Spotify API 서버
+    - POST /api/token : 가짜 access token 발급
+    - GET /v1/... : fixture 응답 (ETag / If-None-Match 304 지원)
+    - latency ± jitter 초 대기 후 응답
+    - rate_limit 확률로 429 + Retry-After, max_rps 가 있으면 token 별 초당 요청 수를 넘는 요청도 429
+    - GET /stats : endpoint / status code 별 요청 수
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True      # keep-alive 에서 header / body 를 따로 write -> Nagle + delayed ACK 로 요청마다 40ms 대기
+    fixture = None
+    latency = 0.0
+    jitter = 0.0
+    rate_limit = 0.0
+    retry_after = 1
+    max_rps = 0
+    stats = Counter()
+    windows = {}                # token : [초, 요청 수]
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body, headers=None):
+        content = json.dumps(body).encode('utf-8')
+        headers = dict(headers or {})
+        if status == 200:
+            etag = '"%s"' % hashlib.md5(content).hexdigest()
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                status, content = 304, b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+        return status
+
+    def count(self, name, status):
+        with self.lock:
+            self.stats[f"{name} {status}"] += 1
+
+    def is_limited(self):
+        """
+        rate_limit 확률 또는 token 별 초당 max_rps 초과
+        """
+        if self.rate_limit and random.random() < self.rate_limit:
+            return True
+        if not self.max_rps:
+            return False
+        token, second = self.headers.get('Authorization', ''), int(time.time())
+        with self.lock:
+            window = self.windows.setdefault(token, [second, 0])
+            if window[0] != second:
+                window[:] = [second, 0]
+            window[1] += 1
+            return window[1] > self.max_rps
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path != '/api/token':
+            return self.count('unknown', self.send(404, {"error": "not found"}))
+        with self.lock:
+            token_count = self.stats['token 200'] + 1
+        self.count('token', self.send(200, {"access_token": f"mock-token-{token_count}", "token_type": "Bearer", "expires_in": 3600}))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            with self.lock:
+                stats = dict(self.stats)
+            return self.send(200, stats)
+
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        for pattern, route in ROUTES:
+            match = pattern.match(url.path)
+            if match is not None:
+                break
+        else:
+            return self.count('unknown', self.send(404, {"error": "not found"}))
+
+        if self.is_limited():
+            status = self.send(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                               {'Retry-After': str(self.retry_after)})
+            return self.count(route, status)
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, body = self.fixture.response(route, match.group(1) if match.groups() else None, query, url.path)
+        self.count(route, self.send(status, body))
+
+
+def make_server(fixture, port, latency=0.0, jitter=0.0, rate_limit=0.0, retry_after=1, max_rps=0):
+    """
+    설정을 넣은 handler 로 서버 생성 (serve_forever 는 호출하는 쪽에서)
+    """
+    handler = type('Handler', (SpotifyHandler,), dict(
+        fixture=fixture, latency=latency, jitter=jitter, rate_limit=rate_limit, retry_after=retry_after,
+        max_rps=max_rps, stats=Counter(), windows={}, lock=threading.Lock()))
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--ymd", default=FIXTURE_YMD, help="fixture 로 사용할 result/<ymd>")
+    parser.add_argument("--latency", type=float, default=0.05, help="응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="응답 지연 ± 범위(초)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 응답 비율")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 응답의 Retry-After(초)")
+    parser.add_argument("--max-rps", type=int, default=0, help="token 별 초당 최대 요청 수 (넘으면 429, 0 이면 제한 없음)")
+    args = parser.parse_args()
+
+    fixture = SpotifyFixture(os.path.join(DATA_PATH, args.ymd))
+    server = make_server(fixture, args.port, args.latency, args.jitter, args.rate_limit, args.retry_after, args.max_rps)
+    print(f"SPOTIFY_API_URL=http://127.0.0.1:{args.port} SPOTIFY_ACCOUNTS_URL=http://127.0.0.1:{args.port} "
+          f"artist :: {len(fixture.artists)} album :: {len(fixture.albums)} track :: {len(fixture.tracks)}")
+    server.serve_forever()
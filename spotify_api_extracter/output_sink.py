@@ -0,0 +1,168 @@
+import csv
+import io
+import os
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 200            # queue 에 쌓아둘 수 있는 최대 묶음 수 - 가득 차면 worker 가 대기 (back-pressure)
+FLUSH_ROWS = 5000           # 이만큼 row 가 쌓이면 flush + fsync
+FLUSH_INTERVAL = 5          # row 가 적어도 이 시간(초)마다 flush + fsync
+BUFFER_SIZE = 1024 * 1024   # 파일 별 write buffer
+
+
+class OutputSink:
+    """
+    결과 csv 를 쓰는 전용 writer thread
+    - worker 들은 write({name : rows}) 로 bounded queue 에 넣기만 하고, 파일은 writer thread 1개만 open / write
+    - 한 묶음의 row 는 다른 worker 의 row 와 섞이지 않고 연속으로 기록
+    - FLUSH_ROWS 개 또는 FLUSH_INTERVAL 초마다 한번에 flush + fsync
+    - commit 이 있는 묶음은 fsync 된 뒤 checkpoint journal 에 한번에 기록 (group commit)
+    - on_flush : fsync 후 호출할 함수 (S3 streaming upload 등)
+    """
+
+    def __init__(self, output_paths, journal=None, queue_size=QUEUE_SIZE, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL, on_flush=None):
+        self.output_paths = output_paths        # {name : csv 경로} - 처음 쓸 때 append 로 open
+        self.journal = journal
+        self.on_flush = on_flush
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.files = {}
+        self.offsets = {}                       # {name : 지금까지 쓴 byte 위치}
+        self.pending_rows = 0
+        self.pending_commits = []
+        self.row_count = 0
+        self.flush_count = 0
+        self.put_wait = 0.0                     # queue 가 가득 차서 worker 가 기다린 시간 합계 (저장이 느린지 확인)
+        self.flush_time = 0.0                   # flush + fsync + journal 기록 시간 합계
+        self.error = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def put(self, item):
+        """
+        queue 에 추가 - 가득 차 있으면 writer 가 비울 때까지 대기
+        """
+        if self.error is not None:
+            raise self.error
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+
+        start = time.time()
+        try:
+            while True:
+                if self.error is not None:
+                    raise self.error
+                try:
+                    self.queue.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            with self.lock:
+                self.put_wait += time.time() - start
+
+    def write(self, rows, commit=None):
+        """
+        {name : rows} 를 각 csv 에 추가
+        - commit : (artist_id, album_ids) - fsync 후 journal 에 완료 기록
+        """
+        self.put((rows, commit))
+
+    def close(self):
+        """
+        남은 row 를 모두 쓰고 writer thread 종료
+        """
+        self.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def get_file(self, name):
+        if name not in self.files:
+            file_path = self.output_paths[name]
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            self.files[name] = open(file_path, 'ab', buffering=BUFFER_SIZE)
+            self.offsets[name] = os.path.getsize(file_path)
+        return self.files[name]
+
+    def offset(self, name):
+        return self.offsets[name] if name in self.offsets else os.path.getsize(self.output_paths[name])
+
+    def write_rows(self, name, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        data = buffer.getvalue().encode('utf-8')
+        self.get_file(name).write(data)
+        self.offsets[name] += len(data)
+        self.pending_rows += len(rows)
+        self.row_count += len(rows)
+
+    def flush(self):
+        """
+        열려있는 파일 flush + fsync 후 대기중인 artist 완료 기록
+        """
+        start = time.time()
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+
+        if self.journal is not None and len(self.pending_commits) != 0:
+            self.journal.commit_artists(self.pending_commits)
+
+        self.pending_rows = 0
+        self.pending_commits = []
+        self.flush_count += 1
+        self.flush_time += time.time() - start
+
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def run(self):
+        last_flush = time.time()
+        try:
+            while True:
+                try:
+                    item = self.queue.get(timeout=max(0, last_flush + self.flush_interval - time.time()))
+                except queue.Empty:
+                    item = ({}, None)
+
+                if item is None:
+                    break
+
+                rows, commit = item
+                for name, name_rows in rows.items():
+                    if len(name_rows) != 0:
+                        self.write_rows(name, name_rows)
+
+                if commit is not None and self.journal is not None:
+                    # 이 묶음까지 쓴 위치 - resume 시 여기까지 잘라서 사용
+                    artist_id, album_ids = commit
+                    self.pending_commits.append((artist_id, album_ids, {name: self.offset(name) for name in self.journal.output_paths}))
+
+                if self.pending_rows >= self.flush_rows or time.time() - last_flush >= self.flush_interval:
+                    if self.pending_rows != 0 or len(self.pending_commits) != 0:
+                        self.flush()
+                    last_flush = time.time()
+
+            self.flush()
+        except Exception as e:
+            self.error = e
+        finally:
+            for f in self.files.values():
+                f.close()
+
+    def stats(self):
+        """
+        저장한 row 수 / flush 횟수 / queue 대기 시간 / flush 시간
+        """
+        return {"row_count": self.row_count, "flush_count": self.flush_count,
+                "put_wait": round(self.put_wait, 3), "flush_time": round(self.flush_time, 3)}
@@ -0,0 +1,91 @@
+import threading
+import time
+
+INITIAL_RATE = 10.0             # credential 당 초기 초당 요청 수
+MIN_RATE = 1.0
+MAX_RATE = 50.0
+ADDITIVE_INCREASE = 1.0         # 정상 응답이 이어지면 1초마다 초당 요청 수 +1
+MULTIPLICATIVE_DECREASE = 0.5   # 429 를 받으면 초당 요청 수 절반으로
+
+
+class TokenBucket:
+    """
+    credential 1개의 초당 요청 수 제한
+    - 1초 분량(rate)까지 burst 허용
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """
+        요청 1개 자리를 예약하고, 보내기 전까지 기다려야 하는 시간(초) 반환
+        """
+        self.tokens = min(self.rate, self.tokens + max(0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    전체 worker(thread / coroutine)가 공유하는 rate limiter
+    - credential 별 token bucket 을 통과해야 요청 가능
+    - 429 를 받으면 Retry-After 동안 전체 요청을 멈추고 해당 credential 속도를 절반으로 (multiplicative decrease)
+    - 정상 응답이 이어지면 속도를 조금씩 올려서 (additive increase) 429 없이 버틸 수 있는 속도를 찾음
+    """
+
+    def __init__(self, initial_rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 increase=ADDITIVE_INCREASE, decrease=MULTIPLICATIVE_DECREASE):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.buckets = {}
+        self.paused_until = 0       # Retry-After 로 전체가 멈춰있는 시각 (monotonic)
+        self.lock = threading.Lock()
+
+    def acquire(self, key):
+        """
+        key(client_id) 로 요청 1개를 보내기 전에 기다려야 하는 시간(초) 반환
+        - thread 는 time.sleep, coroutine 은 asyncio.sleep 으로 대기
+        """
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.buckets.setdefault(key, TokenBucket(self.initial_rate))
+            pause = max(0, self.paused_until - now)
+            return max(pause, bucket.reserve(now + pause))
+
+    def wait(self, key):
+        """
+        acquire 후 필요한 만큼 대기 (thread 용) - return 대기한 시간(초)
+        """
+        wait_time = self.acquire(key)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def update(self, key, status_code, retry_after=0):
+        """
+        응답 결과로 속도 조절
+        """
+        with self.lock:
+            bucket = self.buckets.setdefault(key, TokenBucket(self.initial_rate))
+
+            if status_code == 429:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.tokens = min(bucket.tokens, 0)
+            else:
+                # 요청 1개마다 increase / rate 만큼 -> 1초 동안 increase 만큼 증가
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase / bucket.rate)
+
+    def rates(self):
+        """
+        credential 별 현재 초당 요청 수
+        """
+        with self.lock:
+            return {key: round(bucket.rate, 2) for key, bucket in self.buckets.items()}
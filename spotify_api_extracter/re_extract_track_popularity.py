@@ -1,8 +1,6 @@
-import base64
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 import pprint
-import requests
 import json
 import csv
 import datetime
@@ -13,65 +11,22 @@ import sys
 import errno
 import queue
 import threading
+import argparse
+
+import http_client
+import spotify_api
+from columnar import csv_to_parquet, parquet_path
+from log_config import make_log
+from spotify_api import chunk_list, get_several_tracks, spotify_get
+from token_pool import TokenPool
+from work_queue import get_work, make_work_queue, run_workers
 
 # 기본적인 정보값 설정
-current_directory_path = '/' + \
-    '/'.join(os.path.realpath(__file__).split('/')[:-1])
 now = datetime.datetime.now()
 ymd = str(now.year)+str(now.month).zfill(2)+str(now.day).zfill(2)
 timestamp = now.strftime('%Y-%m-%d_%H:%M:%S')
 
 
-def get_access_token(client_id, client_secret):
-    """
-    Spotify API를 사용할 때 필요한 Token 인증 방식
-    - 1시간동안 유효한 토큰 발급
-    """
-    auth_header = base64.b64encode("{}:{}".format(client_id, client_secret).encode(
-        'utf-8')).decode('ascii')    # Base64로 인코딩된 인증 헤더 생성
-    token_url = "https://accounts.spotify.com/api/token"
-    headers = {
-        "Authorization": f'Basic {auth_header}'
-    }
-    payload = {
-        "grant_type": "client_credentials"
-    }
-
-    response = requests.post(token_url, data=payload, headers=headers)
-    access_token = json.loads(response.text)["access_token"]
-
-    return {"Authorization": f"Bearer {access_token}"}
-
-
-def make_log(ymd):
-    """
-    Logging 라이브러리를 사용하여, 로그를 통해 complete OR error 모니터링
-    """
-    mylogger = logging.getLogger(ymd)
-    mylogger.setLevel(logging.INFO)
-
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-
-    stream_hander = logging.StreamHandler()
-    stream_hander.setFormatter(formatter)
-    mylogger.addHandler(stream_hander)
-
-    try:
-        if not (os.path.isdir(current_directory_path + "/log/")):
-            os.makedirs(os.path.join(current_directory_path + "/log/"))
-    except OSError as e:
-        if e.errno != errno.EEXIST:
-            print("Failed to create directory!!!!!")
-            raise
-
-    file_handler = logging.FileHandler(
-        current_directory_path + "/log/"+ymd+".log")
-    mylogger.addHandler(file_handler)
-
-    return mylogger
-
-
 def add_lists_to_csv(file_path, lists):
     """
     만들어둔 csv 파일에 list 추가
@@ -82,51 +37,38 @@ def add_lists_to_csv(file_path, lists):
             csvwriter.writerow(list)
 
 
-def run_thread(start, end, data_q, error_q, token_queue):
+def run_thread(work_q, data_q, error_q):
     cnt = 0
-    access_token = token_queue.get()
 
     thread_track_list = []
-    for idx, line in enumerate(total_track_list[start:end]):
-        track_key = line[0]                 # artist_id
-
-        retries = 0
-        max_retries = 5
-        wait_time = 0
-
-        while retries < max_retries:
-            # TRACK 호출
-            track_url = f"https://api.spotify.com/v1/tracks/{track_key}"
-            r = requests.get(track_url, headers=access_token)
-
-            if r.status_code == 200:
-
-                track = r.json()
-                track_popularity = track["popularity"]
-                if track_popularity is None:
-                    print(track_key)
-                    time.sleep(5)
-                track_result = line + [track.get("popularity", None)]
-                thread_track_list.append(track_result)
-                mylogger.info(
-                    f"TRACK DONE [{idx+1}/{len(total_track_list[start:end])}] || track_id :: {track_key} track_popularity :: {track_popularity}")
-                break
-
-            elif r.status_code == 429:
-                # API 제한이 발생
-                # exceed API 이슈 존재하여, retires와 header에 있는 wait 정보값을 이용하여 해결
-                wait_time = int(r.headers.get('Retry-After', 0))
-                mylogger.info(
-                    f"TRACK ISSUE {track_key} || 429 status_code / API exceed issue")
-                mylogger.info(
-                    f"Rate limited. Waiting for {wait_time} seconds...")
-                time.sleep(wait_time)
-                retries += 1
-
-            else:
-                mylogger.info(f"TRACK ERROR || artist_id :: {track_key} ")
-                mylogger.info(
-                    f"TRACK ERROR || album_id :: {track_key} Artist: status_code : {r.status_code} error_msg : {r.text}")
+    # 공유 작업 queue 에서 track을 하나씩 꺼내서 처리 (queue가 빌 때까지)
+    while True:
+        line = get_work(work_q)
+        if line is None:
+            break
+        track_key = line[0]                 # track_id
+
+        # TRACK 호출 - 429 / 401 은 spotify_get 에서 rate_limiter 대기 후 다른 credential 로 재시도
+        track_url = f"{http_client.API_URL}/v1/tracks/{track_key}"
+        r = spotify_get(track_url)
+
+        if r.status_code == 200:
+
+            track = r.json()
+            track_popularity = track.get("popularity", None)
+            if track_popularity is None:
+                mylogger.info(f"TRACK POPULARITY NONE || track_id :: {track_key} - popularity 없이 저장")
+            track_result = line + [track_popularity]
+            thread_track_list.append(track_result)
+            spotify_api.metrics.add_rows("popularity", 1)
+            mylogger.info(
+                f"TRACK DONE [{len(total_track_list) - work_q.qsize()}/{len(total_track_list)}] || track_id :: {track_key} track_popularity :: {track_popularity}")
+
+        else:
+            mylogger.info(f"TRACK ERROR || artist_id :: {track_key} ")
+            mylogger.info(
+                f"TRACK ERROR || album_id :: {track_key} Artist: status_code : {r.status_code} error_msg : {r.text}")
+            error_q.put([track_key, r.text, r.status_code])
 
         data_q.put(1)
     cnt+1
@@ -134,11 +76,72 @@ def run_thread(start, end, data_q, error_q, token_queue):
     # Thread를 기준으로 artist가 가지고 있는 앨범 저장
     mylogger.info(
         f"THRED WRITE [{cnt+1}] ALBUM on kpop_artist_album_data.csv")
-    token_queue.put(access_token)
+
+
+def run_bulk(data_q, error_q):
+    """
+    tracks?ids= 로 50개 단위 일괄 조회하여 popularity 갱신
+    - 입력 csv 순서 그대로 popularity 를 붙여서 저장
+    - batch 요청이 실패한 track 은 run_thread 와 같이 (track_id, error text, status code) 로 error 기록
+    """
+    thread_track_list = []
+    batches = chunk_list(total_track_list, spotify_api.TRACK_BATCH)
+
+    for batch_idx, batch in enumerate(batches):
+        batch_errors = {}
+        tracks = get_several_tracks([line[0] for line in batch], batch_errors)
+
+        for line in batch:
+            track_key = line[0]
+            track = tracks.get(track_key)
+
+            if track_key in batch_errors:
+                status_code, error_text = batch_errors[track_key]
+                mylogger.info(f"TRACK ERROR || track_id :: {track_key} status_code : {status_code} error_msg : {error_text}")
+                error_q.put([track_key, error_text, status_code])
+                thread_track_list.append(line + [None])
+                continue
+
+            if track is None:
+                mylogger.info(f"TRACK ERROR || track_id :: {track_key} - track 정보 없음")
+                error_q.put([track_key, "track not found", None])
+                thread_track_list.append(line + [None])
+                continue
+
+            thread_track_list.append(line + [track.get("popularity", None)])
+            data_q.put(1)
+
+        spotify_api.metrics.add_rows("popularity", len(batch))
+
+        mylogger.info(
+            f"BATCH DONE [{batch_idx+1}/{len(batches)}] || track count :: {len(batch)}")
+
+    add_lists_to_csv(new_artist_album_track_path, thread_track_list)
+    mylogger.info(
+        f"BULK WRITE [{len(thread_track_list)}] TRACK on {new_artist_album_track_path}")
 
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["bulk", "thread"], default="bulk",
+                        help="bulk : tracks?ids= 50개 단위 조회 / thread : track 1개씩 20 thread 조회")
+    parser.add_argument("--parquet", action="store_true",
+                        help="csv 와 함께 컬럼 타입이 고정된 parquet (zstd) 저장")
+    parser.add_argument("--parquet-dictionary", action="store_true",
+                        help="parquet 저장 시 artist id / name 컬럼 dictionary encoding")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="metrics JSON 과 함께 log 폴더에 Prometheus text 파일 (.prom) 저장")
+    parser.add_argument("--log-mode", choices=["queue", "sync"], default="queue",
+                        help="queue : listener thread 1개가 log 기록 (worker 는 queue 에 넣기만) / sync : 기존 방식")
+    parser.add_argument("--log-sample", type=int, default=1,
+                        help="track 단위 log 를 N 개마다 1개만 기록 (종료 시 종류별 전체 수 기록)")
+    parser.add_argument("--log-json", action="store_true",
+                        help="log 를 JSON 1줄 단위로 기록")
+    parser.add_argument("--log-dir", default="./log/",
+                        help="log / metrics 파일을 저장할 폴더 (기본 실행 위치의 ./log/)")
+    args = parser.parse_args()
+
     # secret json 가져오기 - extract와 동일한 경로에 secret 업로드
     with open('./secret.json', 'r') as jsonfile:
         client_info = json.load(jsonfile)
@@ -147,16 +150,9 @@ if __name__ == "__main__":
     CLIENT_ID = client_info["client_id"]
     CLIENT_SECRET = client_info["client_secret"]
 
-    # 대표 TOKEN
-    # Artist 추출할 때 처음 지정할 token 생성
-    access_token = get_access_token(CLIENT_ID, CLIENT_SECRET)
-    print(access_token)
-    sys.exit()
-
-    # TOKEN queue 만들기
-    token_queue = queue.Queue()
-    for client_id, client_secret in client_info["client_info"]:
-        token_queue.put(get_access_token(client_id, client_secret))
+    # TOKEN pool 만들기 - 대표 TOKEN + client_info, 요청마다 가장 여유있는 token 사용 / 만료 전 재발급
+    token_pool = TokenPool(
+        [[CLIENT_ID, CLIENT_SECRET]] + client_info["client_info"])
 
     # FILE LOCATION 고정 변수
     DATA_PATH = './result/' + ymd + '/'
@@ -168,7 +164,9 @@ if __name__ == "__main__":
     os.makedirs(DATA_PATH, exist_ok=True)
 
     # Logger
-    mylogger = make_log(timestamp)
+    mylogger = make_log(timestamp, args.log_dir, args.log_mode, args.log_sample, args.log_json)
+    spotify_api.mylogger = mylogger     # batch 조회 함수도 같은 logger 사용
+    spotify_api.token_pool = token_pool
 
     #####################################################
     #               ARTIST 추출
@@ -193,29 +191,37 @@ if __name__ == "__main__":
         csvwriter.writerow(['id', 'name', 'track_href', 'external_url', 'artist_id', 'artist_name', 'album_id', 'track_number', 'acousticness', 'analysis_url', 'danceability',
                            'duration_ms', 'energy',  'instrumentalness', 'liveness', 'loudness', 'mode', 'speechiness', 'tempo', 'time_signature', 'valence', 'popularity'])
 
-    #################################################
-    #                   Thread
-    #################################################
     data_q = queue.Queue()
     error_q = queue.Queue()
 
-    thread_count = 20
-    thread_list = []
-
-    work = len(total_track_list) // thread_count
-
-    for i in range(thread_count):
-        start = i * work
-
-        if i == thread_count - 1:
-            end = len(total_track_list)
-        else:
-            end = (i+1) * work
-        thread_list.append(threading.Thread(target=run_thread, args=(
-            start, end, data_q, error_q, token_queue)))
-
-    [thread.start() for thread in thread_list]
-    [thread.join() for thread in thread_list]
+    metrics = spotify_api.metrics
+    extract_start = time.time()
+    metrics.start_stage("popularity")
+    if args.mode == "bulk":
+        #################################################
+        #                   Bulk
+        #################################################
+        run_bulk(data_q, error_q)
+
+    else:
+        #################################################
+        #                   Thread
+        #################################################
+        thread_count = 20
+
+        # 고정 slicing 대신 공유 작업 queue - 먼저 끝난 thread가 다음 track을 가져감
+        work_q = make_work_queue(total_track_list)
+        run_workers(run_thread, thread_count,
+                    (work_q, data_q, error_q))
+
+    metrics.add_phase("extract", time.time() - extract_start)
+
+    # csv 와 함께 typed parquet 저장 - 입력 row 의 track 컬럼(21개) + 새로 조회한 popularity
+    if args.parquet:
+        with metrics.phase("parquet"):
+            row_count = csv_to_parquet(new_artist_album_track_path, parquet_path(new_artist_album_track_path), "track_popularity",
+                                       dictionary=args.parquet_dictionary, select=lambda row: row[:21] + row[-1:])
+        mylogger.info(f"PARQUET SAVE || {parquet_path(new_artist_album_track_path)} row count :: {row_count}")
 
     # ERROR 확인
     data_count = data_q.qsize()
@@ -237,6 +243,17 @@ if __name__ == "__main__":
     print('=====================================')
     mylogger.info(f"data_count :: {data_count}")
     mylogger.info(f"error_count :: {error_count}")
+    mylogger.info(f"token_pool :: {token_pool.stats()}")
+    mylogger.info(f"rate_limiter :: {spotify_api.rate_limiter.rates()}")
+
+    # metrics - log 와 같은 폴더에 <timestamp>.metrics.json (+ --prometheus 면 <timestamp>.prom)
+    metrics_extra = {"data_count": data_count, "error_count": error_count, "token_pool": token_pool.stats(),
+                     "rate_limiter": spotify_api.rate_limiter.rates()}
+    metrics_path = os.path.join(args.log_dir, timestamp)
+    summary = metrics.write_json(metrics_path + ".metrics.json", metrics_extra)
+    if args.prometheus:
+        metrics.write_prometheus(metrics_path + ".prom", metrics_extra)
+    mylogger.info(f"METRICS || {metrics_path}.metrics.json wall_time :: {summary['wall_time']} phases :: {summary['phases']} waits :: {summary['waits']}")
     sys.exit(0)
     #########################################################
     # S3에 업로드
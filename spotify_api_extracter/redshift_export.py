@@ -0,0 +1,261 @@
+import argparse
+import contextlib
+import csv
+import datetime
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import tempfile
+
+from columnar import ROW_GROUP_SIZE, SCHEMAS, make_schema, make_table
+
+mylogger = logging.getLogger(__name__)
+
+SLICES = 8                          # Redshift slice 수 - part 수를 이 배수로 맞춰서 모든 slice 가 동시에 load
+TARGET_SIZE = 64 * 1024 * 1024      # part 1개의 목표 크기 (압축 전 byte)
+SORT_RUN_ROWS = 200000              # 정렬할 때 한번에 메모리에 올리는 row 수 - 넘으면 임시 파일 (run) 로 나눠서 merge
+EXPORT_PATH = './export/'
+
+# Redshift table 별 원본 csv / schema / dist key / sort key
+# - artist 는 작아서 모든 node 에 복사 (DISTSTYLE ALL)
+# - album 과 track 은 dashboard 에서 album_id 로 join -> album.id / track.album_id 로 같은 slice 에 배치
+# - sort key 는 ymd (일자별 조회) + artist_id / album_id (artist 별 집계, join)
+TABLES = {
+    "kpop_artist": {
+        "file": "kpop_artist_data.csv", "schema": "artist",
+        "dist_key": None, "sort_key": ["ymd", "id"],
+    },
+    "kpop_artist_album": {
+        "file": "kpop_artist_album_data.csv", "schema": "album",
+        "dist_key": "id", "sort_key": ["ymd", "artist_id", "id"],
+    },
+    "kpop_artist_album_track": {
+        "file": "kpop_artist_album_track_data.csv", "schema": "track",
+        "dist_key": "album_id", "sort_key": ["ymd", "artist_id", "album_id"],
+    },
+}
+
+REDSHIFT_TYPES = {
+    "string": "VARCHAR(1024)",
+    "int8": "SMALLINT",
+    "int32": "INTEGER",
+    "int64": "BIGINT",
+    "float64": "DOUBLE PRECISION",
+}
+
+
+def redshift_type(name, type_name, file_format):
+    """
+    schema 타입 -> Redshift 컬럼 타입
+    - id 컬럼은 VARCHAR(32), genre (list) 는 parquet 이면 SUPER / csv 면 문자열
+    """
+    if type_name == "list<string>":
+        return "SUPER" if file_format == "parquet" else "VARCHAR(1024)"
+    if type_name == "string" and (name == "id" or name.endswith("_id")):
+        return "VARCHAR(32)"
+    return REDSHIFT_TYPES[type_name]
+
+
+def make_ddl(table_name, file_format):
+    """
+    CREATE TABLE 문 (ymd 컬럼 + dist key / sort key)
+    """
+    spec = TABLES[table_name]
+    columns = [f"    {name} {redshift_type(name, type_name, file_format)}" for name, type_name in SCHEMAS[spec["schema"]]]
+    columns.append("    ymd CHAR(8) NOT NULL")
+    dist = f"DISTKEY({spec['dist_key']})" if spec["dist_key"] else "DISTSTYLE ALL"
+    return (f"CREATE TABLE IF NOT EXISTS {table_name} (\n" + ",\n".join(columns) + "\n)\n"
+            f"{dist}\nCOMPOUND SORTKEY({', '.join(spec['sort_key'])});")
+
+
+def make_copy(table_name, manifest_url, file_format, iam_role):
+    """
+    manifest 로 part 전체를 한번에 load 하는 COPY 문 - part 들이 slice 별로 나뉘어서 동시에 load
+    """
+    if file_format == "parquet":
+        options = "FORMAT AS PARQUET SERIALIZETOJSON"
+    else:
+        options = "FORMAT AS CSV GZIP EMPTYASNULL"
+    return f"COPY {table_name}\nFROM '{manifest_url}'\nIAM_ROLE {iam_role}\nMANIFEST\n{options};"
+
+
+def part_count(total_size, slices=SLICES, target_size=TARGET_SIZE):
+    """
+    part 수 - target_size 기준으로 나눈 뒤 slice 수의 배수로 올림 (최소 slice 수)
+    """
+    return max(1, math.ceil(total_size / target_size / slices)) * slices
+
+
+def read_runs(csv_path, sort_columns, run_path):
+    """
+    csv 를 SORT_RUN_ROWS 단위로 읽어서 sort_columns 순서로 정렬 (external sort 의 run)
+    - run 이 1개면 메모리에 그대로, 여러 개면 run_path 아래 임시 csv 로 저장
+    - return (전체 row 수, run list - row list 또는 임시 파일 경로, sort 컬럼 index)
+    """
+    with open(csv_path, 'r', encoding='utf-8') as csvfile:
+        csvreader = csv.reader(csvfile)
+        header = next(csvreader)
+        sort_idx = [header.index(column) for column in sort_columns]
+        row_count, runs = 0, []
+
+        for rows in iter(lambda: list(itertools.islice(csvreader, SORT_RUN_ROWS)), []):
+            rows.sort(key=lambda row: [row[idx] for idx in sort_idx])
+            row_count += len(rows)
+            runs.append(rows)
+            if len(runs) > 1:
+                # 2번째 run 부터는 모두 임시 파일로 - 메모리에는 정렬 중인 run 1개만
+                for idx, run in enumerate(runs):
+                    if isinstance(run, list):
+                        runs[idx] = os.path.join(run_path, f"run-{idx:05d}.csv")
+                        with open(runs[idx], 'w', encoding='utf-8', newline='') as f:
+                            csv.writer(f).writerows(run)
+
+    return row_count, runs, sort_idx
+
+
+def merge_runs(runs, sort_idx, stack):
+    """
+    정렬된 run 들을 sort key 순서로 합친 row iterator (같은 key 는 원래 csv 순서 유지)
+    """
+    if len(runs) == 1 and isinstance(runs[0], list):
+        return iter(runs[0])
+    readers = [csv.reader(stack.enter_context(open(run, 'r', encoding='utf-8', newline=''))) for run in runs]
+    return heapq.merge(*readers, key=lambda row: [row[idx] for idx in sort_idx])
+
+
+def write_part(rows, part_path, schema_name, ymd, file_format):
+    """
+    part 1개 저장 (gzip csv 는 header 없이 ymd 컬럼 추가) - return byte 수
+    - rows 는 iterator, 파일에 바로 쓰거나 (csv) ROW_GROUP_SIZE 단위로 변환 (parquet) 해서 part 전체를 메모리에 올리지 않음
+    """
+    if file_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = make_schema(schema_name)
+        with pq.ParquetWriter(part_path, schema.append(pa.field("ymd", pa.string())), compression="zstd") as writer:
+            for batch in iter(lambda: list(itertools.islice(rows, ROW_GROUP_SIZE)), []):
+                table = make_table(batch, schema_name, schema)
+                writer.write_table(table.append_column("ymd", pa.array([ymd] * len(batch), pa.string())))
+    else:
+        with gzip.open(part_path, 'wt', encoding='utf-8', newline='') as f:
+            csv.writer(f, lineterminator='\n').writerows(row + [ymd] for row in rows)
+
+    return os.path.getsize(part_path)
+
+
+def export_table(table_name, data_path, export_path, ymd, file_format, slices=SLICES, target_size=TARGET_SIZE):
+    """
+    table 1개를 sort key 순서로 정렬 후 part 로 나눠서 저장
+    - csv 전체를 메모리에 올리지 않고 run 단위 정렬 + merge 한 row 를 part 파일에 차례로 기록
+    - return [(part 경로, byte 수), ...]
+    """
+    spec = TABLES[table_name]
+    csv_path = os.path.join(data_path, spec["file"])
+    table_path = os.path.join(export_path, table_name, f"ymd={ymd}")
+    os.makedirs(table_path, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=table_path) as run_path, contextlib.ExitStack() as stack:
+        # ymd 는 모든 row 가 같으므로 나머지 sort key 로 정렬 - part 마다 sort key 구간이 겹치지 않음
+        row_count, runs, sort_idx = read_runs(csv_path, [column for column in spec["sort_key"] if column != "ymd"], run_path)
+        rows = merge_runs(runs, sort_idx, stack)
+
+        count = part_count(os.path.getsize(csv_path), slices, target_size)
+        part_size = math.ceil(row_count / count) if row_count else 0
+        extension = "parquet" if file_format == "parquet" else "csv.gz"
+
+        parts = []
+        for i in range(math.ceil(row_count / part_size) if row_count else 0):
+            part_path = os.path.join(table_path, f"part-{i:05d}.{extension}")
+            parts.append((part_path, write_part(itertools.islice(rows, part_size), part_path, spec["schema"], ymd, file_format)))
+
+    mylogger.info(f"EXPORT || {table_name} row count :: {row_count} part count :: {len(parts)}")
+    return parts
+
+
+def make_manifest(parts, s3_url, export_path):
+    """
+    COPY manifest - part 의 s3 url 과 크기 (parquet 은 content_length 필수)
+    """
+    return {
+        "entries": [
+            {"url": s3_url + os.path.relpath(part_path, export_path), "mandatory": True, "meta": {"content_length": size}}
+            for part_path, size in parts
+        ]
+    }
+
+
+def export(data_path, export_path, ymd, file_format, s3_url, iam_role, slices=SLICES, target_size=TARGET_SIZE):
+    """
+    result/<ymd>/ 의 csv 를 table 별 part + manifest + DDL / COPY sql 로 저장
+    - export/<table>/ymd=<ymd>/part-xxxxx, export/<table>/ymd=<ymd>/manifest, export/redshift_<ymd>.sql
+    - return 저장한 파일 경로 list (S3 upload 대상)
+    """
+    files = []
+    statements = []
+
+    for table_name in TABLES:
+        parts = export_table(table_name, data_path, export_path, ymd, file_format, slices, target_size)
+        manifest_path = os.path.join(export_path, table_name, f"ymd={ymd}", "manifest")
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(make_manifest(parts, s3_url, export_path), f, indent=2)
+
+        files += [part_path for part_path, _ in parts] + [manifest_path]
+        # DELETE + COPY 를 transaction 1개로 - COPY 가 실패하면 rollback 되어 그날 데이터가 지워진 채로 남지 않음
+        statements += [make_ddl(table_name, file_format),
+                       "BEGIN;\n"
+                       f"DELETE FROM {table_name} WHERE ymd = '{ymd}';\n"        # 같은 날짜 재실행 시 중복 방지
+                       + make_copy(table_name, s3_url + os.path.relpath(manifest_path, export_path), file_format, iam_role)
+                       + "\nCOMMIT;"]
+
+    sql_path = os.path.join(export_path, f"redshift_{ymd}.sql")
+    with open(sql_path, 'w', encoding='utf-8') as f:
+        f.write("\n\n".join(statements) + "\n")
+
+    return files + [sql_path]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ymd", default=datetime.datetime.now().strftime('%Y%m%d'),
+                        help="export 할 result/<ymd> (기본 : 오늘)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="part 형식 - csv : gzip csv / parquet : zstd parquet")
+    parser.add_argument("--slices", type=int, default=SLICES,
+                        help="Redshift slice 수 - part 수를 이 배수로 맞춤")
+    parser.add_argument("--target-size", type=int, default=TARGET_SIZE // 1024 // 1024,
+                        help="part 1개의 목표 크기(MB, 압축 전)")
+    parser.add_argument("--s3-bucket", default="spotify-kpop-analysis")
+    parser.add_argument("--s3-prefix", default="redshift/")
+    parser.add_argument("--s3-endpoint", default=None,
+                        help="S3 호환 서버 주소 (local test 용)")
+    parser.add_argument("--iam-role", default="default",
+                        help="COPY 에 사용할 IAM role ARN (Redshift Serverless 기본 role 이면 default)")
+    parser.add_argument("--upload", action="store_true",
+                        help="part / manifest 를 S3 에 upload")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    s3_url = f"s3://{args.s3_bucket}/{args.s3_prefix}"
+    iam_role = args.iam_role if args.iam_role == "default" else f"'{args.iam_role}'"
+    files = export('./result/' + args.ymd + '/', EXPORT_PATH, args.ymd, args.format, s3_url, iam_role,
+                   args.slices, args.target_size * 1024 * 1024)
+
+    if args.upload:
+        from s3_uploader import S3Uploader
+
+        # export/ 아래 경로 그대로 s3_prefix 아래에 upload (part 는 이미 압축되어 있음)
+        uploader = S3Uploader(args.s3_bucket, prefix=args.s3_prefix, endpoint_url=args.s3_endpoint)
+        for file_path in files:
+            uploader.upload(file_path, gzip=False, key=os.path.join(args.s3_prefix, os.path.relpath(file_path, EXPORT_PATH)))
+        for s3_file_url, size in uploader.wait():
+            mylogger.info(f"upload S3 bucket {s3_file_url} size :: {size}")
+        uploader.close()
+
+    mylogger.info(f"DONE || {os.path.join(EXPORT_PATH, f'redshift_{args.ymd}.sql')}")
@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+DAY = 24 * 60 * 60
+
+# resource 별 유효 기간(초) - 0 이면 cache 하지 않음
+TTL = {
+    "artist_albums": 1 * DAY,       # 신규 앨범 발매 가능 -> 하루
+    "albums": 30 * DAY,             # album 정보 / tracklist 는 거의 바뀌지 않음
+    "album_tracks": 30 * DAY,
+    "audio_features": 365 * DAY,    # audio feature 는 바뀌지 않음
+    "tracks": 0,                    # popularity 가 매일 바뀜
+    "search": 0,                    # followers / popularity 가 매일 바뀜
+}
+
+
+class CachedResponse:
+    """
+    cache 에서 꺼낸 응답 - requests.Response 처럼 사용 (status_code / json() / text / headers)
+    """
+
+    def __init__(self, body, etag=None):
+        self.status_code = 200
+        self.text = body
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class ResponseCache:
+    """
+    Spotify API 응답을 저장하는 SQLite cache
+    - key : endpoint + id (또는 url + params), resource 별 TTL
+    - TTL 이 지난 응답은 ETag 로 조건부 재검증 (If-None-Match -> 304 면 재사용)
+    """
+
+    def __init__(self, path, ttl=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.ttl = dict(TTL, **(ttl or {}))
+        self.counter = Counter()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, resource TEXT, etag TEXT, body TEXT, stored_at REAL)"
+        )
+        self.conn.commit()
+
+    def enabled(self, resource):
+        """
+        cache 대상 resource 인지 확인
+        """
+        return resource is not None and self.ttl.get(resource, 0) > 0
+
+    def lookup(self, resource, key):
+        """
+        cache 조회 - return (body, etag, fresh) / 없으면 None
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT body, etag, stored_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self.counter[f"{resource}_miss"] += 1
+                return None
+
+            body, etag, stored_at = row
+            fresh = time.time() - stored_at < self.ttl[resource]
+            self.counter[f"{resource}_{'hit' if fresh else 'stale'}"] += 1
+            return body, etag, fresh
+
+    def store(self, resource, key, body, etag=None):
+        """
+        응답 저장 (있으면 덮어쓰기)
+        """
+        self.store_many(resource, [(key, body, etag)])
+
+    def store_many(self, resource, entries):
+        """
+        (key, body, etag) 여러 개를 한번에 저장
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO response_cache (key, resource, etag, body, stored_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, resource, etag, body, now) for key, body, etag in entries],
+            )
+            self.conn.commit()
+
+    def touch(self, resource, key):
+        """
+        304 Not Modified - 저장 시각만 갱신해서 다시 TTL 동안 사용
+        """
+        with self.lock:
+            self.counter[f"{resource}_revalidated"] += 1
+            self.conn.execute("UPDATE response_cache SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+    def get_items(self, resource, ids):
+        """
+        id 별로 저장된 item 중 유효한 것만 반환 - {id : item}
+        """
+        items = {}
+        for item_id in ids:
+            cached = self.lookup(resource, f"{resource}:{item_id}")
+            if cached is not None and cached[2]:
+                items[item_id] = json.loads(cached[0])
+        return items
+
+    def put_items(self, resource, items):
+        """
+        {id : item} 을 id 별로 저장 - 응답이 null 인 id 도 TTL 동안 다시 조회하지 않도록 저장
+        """
+        self.store_many(resource, [(f"{resource}:{item_id}", json.dumps(item), None) for item_id, item in items.items()])
+
+    def stats(self):
+        """
+        resource 별 hit / miss / stale / revalidated 수
+        """
+        with self.lock:
+            return dict(sorted(self.counter.items()))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def make_key(url, params=None):
+    """
+    url + params 로 cache key 생성
+    """
+    return url + ("?" + urlencode(sorted(params.items())) if params else "")
@@ -0,0 +1,227 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+PART_SIZE = 8 * 1024 * 1024     # multipart part 크기 (S3 최소 5MB, 마지막 part 제외)
+UPLOAD_WORKERS = 8              # 동시에 upload 하는 part 수
+READ_SIZE = 1024 * 1024
+
+
+class S3Uploader:
+    """
+    결과 파일을 S3 에 multipart 로 upload (aws s3 cp 대신 process 안에서)
+    - part 는 thread pool 로 동시에 upload, 동시에 메모리에 올라가는 part 수는 UPLOAD_WORKERS * 2 로 제한
+    - 다 쓴 파일이 part_size 보다 작으면 (thumbnail 등) multipart 대신 put_object 1번
+    - gzip 이면 읽으면서 압축해서 upload (key 에 .gz)
+    - part 마다 Content-MD5 로 S3 에서 검증, 완료 후 ETag 를 로컬에서 계산한 값과 비교
+    - endpoint_url 로 local S3 호환 서버 (moto / minio 등) 에 test 가능
+    """
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, gzip=False, part_size=PART_SIZE, workers=UPLOAD_WORKERS):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.gzip = gzip
+        self.part_size = part_size
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.part_slots = threading.BoundedSemaphore(workers * 2)
+        self.uploads = []
+
+    def stream(self, file_path, gzip=None, key=None):
+        """
+        아직 쓰는 중인 파일의 streaming upload 시작 - feed() 로 새로 쓴 부분 upload, finish() 로 완료
+        - gzip : None 이면 uploader 설정 사용 (이미 압축된 parquet 은 False)
+        - key : None 이면 prefix + 파일 이름 (+ .gz)
+        """
+        gzip = self.gzip if gzip is None else gzip
+        upload = StreamingUpload(self, file_path, key or self.make_key(file_path, gzip), gzip)
+        self.uploads.append(upload)
+        return upload
+
+    def upload(self, file_path, gzip=None, key=None):
+        """
+        다 쓴 파일 upload - 끝날 때까지 기다리지 않고 thread pool 에 넘김 (wait() 에서 완료)
+        - part_size 보다 작은 파일은 put_object 1번 (multipart 는 create / upload_part / complete 3번 요청)
+        """
+        gzip = self.gzip if gzip is None else gzip
+        if os.path.getsize(file_path) < self.part_size:
+            upload = SingleUpload(self, file_path, key or self.make_key(file_path, gzip), gzip)
+            self.uploads.append(upload)
+            return upload
+
+        upload = self.stream(file_path, gzip, key)
+        upload.feed()
+        return upload
+
+    def make_key(self, file_path, gzip):
+        return self.prefix + os.path.basename(file_path) + (".gz" if gzip else "")
+
+    def feed(self):
+        """
+        streaming 중인 모든 파일의 새로 쓴 부분 upload (output_sink 가 fsync 한 뒤 호출)
+        """
+        for upload in self.uploads:
+            if upload.finished is None:
+                upload.feed()
+
+    def submit_part(self, upload_id, key, part_number, data):
+        self.part_slots.acquire()           # 메모리에 올라간 part 수 제한 (back-pressure)
+        return self.executor.submit(self.put_part, upload_id, key, part_number, data)
+
+    def put_part(self, upload_id, key, part_number, data):
+        try:
+            digest = hashlib.md5(data).digest()
+            response = self.client.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data,
+                ContentMD5=base64.b64encode(digest).decode("ascii"),
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}, digest
+        finally:
+            self.part_slots.release()
+
+    def put_file(self, key, data):
+        try:
+            digest = hashlib.md5(data).digest()
+            response = self.client.put_object(
+                Bucket=self.bucket, Key=key, Body=data, ContentType=content_type(key),
+                ContentMD5=base64.b64encode(digest).decode("ascii"),
+            )
+            if response["ETag"] != f'"{digest.hex()}"':
+                raise ValueError(f"S3 upload checksum 불일치 :: {key} {response['ETag']} != \"{digest.hex()}\"")
+        finally:
+            self.part_slots.release()
+
+    def wait(self):
+        """
+        모든 upload 완료 - return [(s3 url, byte 수), ...]
+        - 실패해도 upload 목록은 비움 (같은 uploader 로 다시 upload 가능)
+        """
+        try:
+            return [upload.finish() for upload in self.uploads]
+        finally:
+            self.uploads = []
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def content_type(key):
+    """
+    key 확장자로 Content-Type - .gz 는 application/gzip, 모르는 확장자 (parquet 등) 는 S3 기본값
+    """
+    if key.endswith(".gz"):
+        return "application/gzip"
+    return mimetypes.guess_type(key)[0] or "binary/octet-stream"
+
+
+class SingleUpload:
+    """
+    part_size 보다 작은 다 쓴 파일 1개의 upload - Content-Type / Content-MD5 를 넣은 put_object 1번
+    """
+
+    def __init__(self, uploader, file_path, key, gzip=False):
+        self.uploader = uploader
+        self.key = key
+        self.finished = None
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if gzip:
+            compressor = zlib.compressobj(wbits=31)
+            data = compressor.compress(data) + compressor.flush()
+        self.size = len(data)
+        uploader.part_slots.acquire()
+        self.future = uploader.executor.submit(uploader.put_file, key, data)
+
+    def feed(self):
+        pass                            # 이미 다 쓴 파일 - 처음에 전부 upload
+
+    def finish(self):
+        """
+        return (s3 url, upload 한 byte 수)
+        """
+        if self.finished is None:
+            self.future.result()
+            self.finished = (f"s3://{self.uploader.bucket}/{self.key}", self.size)
+        return self.finished
+
+
+class StreamingUpload:
+    """
+    파일 1개의 multipart upload - 파일이 커지는 동안 part_size 만큼 쌓일 때마다 part upload
+    """
+
+    def __init__(self, uploader, file_path, key, gzip=False):
+        self.uploader = uploader
+        self.file_path = file_path
+        self.key = key
+        self.position = 0               # 지금까지 읽은 원본 byte 위치
+        self.buffer = bytearray()       # 아직 upload 하지 않은 (압축된) byte
+        self.size = 0                   # upload 한 byte 수
+        self.parts = []                 # part future
+        self.finished = None
+        self.lock = threading.Lock()
+        self.compressor = zlib.compressobj(wbits=31) if gzip else None     # wbits=31 : gzip header
+        self.upload_id = uploader.client.create_multipart_upload(Bucket=uploader.bucket, Key=key, ContentType=content_type(key))["UploadId"]
+
+    def feed(self):
+        """
+        마지막으로 읽은 위치 이후 새로 쓴 부분을 읽어서 part_size 단위로 upload
+        """
+        with self.lock:
+            with open(self.file_path, 'rb') as f:
+                f.seek(self.position)
+                while True:
+                    data = f.read(READ_SIZE)
+                    if not data:
+                        break
+                    self.position += len(data)
+                    self.buffer += self.compressor.compress(data) if self.compressor else data
+                    while len(self.buffer) >= self.uploader.part_size:
+                        self.submit(bytes(self.buffer[:self.uploader.part_size]))
+                        del self.buffer[:self.uploader.part_size]
+
+    def submit(self, data):
+        self.size += len(data)
+        self.parts.append(self.uploader.submit_part(self.upload_id, self.key, len(self.parts) + 1, data))
+
+    def finish(self):
+        """
+        남은 부분을 마지막 part 로 upload 후 multipart 완료 + ETag 검증
+        - return (s3 url, upload 한 byte 수)
+        """
+        with self.lock:
+            if self.finished is not None:
+                return self.finished
+
+        self.feed()
+        with self.lock:
+            if self.compressor:
+                self.buffer += self.compressor.flush()
+            if len(self.buffer) != 0 or len(self.parts) == 0:
+                self.submit(bytes(self.buffer))
+                self.buffer = bytearray()
+
+            try:
+                results = [part.result() for part in self.parts]
+            except Exception:
+                self.uploader.client.abort_multipart_upload(Bucket=self.uploader.bucket, Key=self.key, UploadId=self.upload_id)
+                raise
+
+            response = self.uploader.client.complete_multipart_upload(
+                Bucket=self.uploader.bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={"Parts": [part for part, _ in results]},
+            )
+
+            # multipart ETag = md5(각 part md5 를 이어붙인 값)-part 수
+            expected_etag = f'"{hashlib.md5(b"".join(digest for _, digest in results)).hexdigest()}-{len(results)}"'
+            if response["ETag"] != expected_etag:
+                raise ValueError(f"S3 upload checksum 불일치 :: {self.key} {response['ETag']} != {expected_etag}")
+
+            self.finished = (f"s3://{self.uploader.bucket}/{self.key}", self.size)
+            return self.finished
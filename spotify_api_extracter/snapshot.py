@@ -0,0 +1,86 @@
+import csv
+import os
+from collections import defaultdict
+
+from work_queue import find_previous_result
+
+ARTIST_FILE = 'kpop_artist_data.csv'
+ALBUM_FILE = 'kpop_artist_album_data.csv'
+TRACK_FILE = 'kpop_artist_album_track_data.csv'
+
+ARTIST_VOLATILE = ['polularity', 'followers']       # 매일 바뀌는 artist 컬럼
+
+
+def delta_path(file_path):
+    """
+    전체 결과 파일 경로 -> 변경분(delta) 파일 경로 (xxx.csv -> xxx_delta.csv)
+    """
+    return file_path[:-len('.csv')] + '_delta.csv'
+
+
+def read_csv_rows(file_path):
+    """
+    csv 를 (header, rows) 로 읽기 - 파일이 없으면 ([], [])
+    """
+    if not os.path.exists(file_path):
+        return [], []
+
+    with open(file_path, 'r', encoding='utf-8') as csvfile:
+        csvreader = csv.reader(csvfile)
+        header = next(csvreader, [])
+        return header, list(csvreader)
+
+
+class Snapshot:
+    """
+    이전 실행의 result/<ymd>/ 결과를 id 기준으로 index
+    - albums : {album_id : album row} / tracks_of : {album_id : [track row, ...]}
+    - artists : {artist_id : artist row}
+    """
+
+    def __init__(self, snapshot_path):
+        self.path = snapshot_path
+        self.artist_header, artist_rows = read_csv_rows(os.path.join(snapshot_path, ARTIST_FILE))
+        self.artists = {row[0]: row for row in artist_rows}
+
+        album_header, album_rows = read_csv_rows(os.path.join(snapshot_path, ALBUM_FILE))
+        self.albums = {row[0]: row for row in album_rows}
+
+        track_header, track_rows = read_csv_rows(os.path.join(snapshot_path, TRACK_FILE))
+        album_idx = track_header.index('album_id') if track_header else 6
+        self.tracks_of = defaultdict(list)
+        for row in track_rows:
+            self.tracks_of[row[album_idx]].append(row)
+        self.track_count = len(track_rows)
+
+    def has_album(self, album_id):
+        return album_id in self.albums
+
+    def album_tracks(self, album_id):
+        """
+        이전 결과의 album track row (audio feature 포함) - 그대로 재사용
+        """
+        return self.tracks_of.get(album_id, [])
+
+    def changed_artists(self, artist_rows, header):
+        """
+        새로 추가되었거나 volatile 컬럼(polularity / followers)이 바뀐 artist row
+        """
+        volatile_idx = [header.index(column) for column in ARTIST_VOLATILE]
+        changed = []
+        for row in artist_rows:
+            previous = self.artists.get(row[0])
+            if previous is None or any(previous[idx] != row[idx] for idx in volatile_idx):
+                changed.append(row)
+        return changed
+
+
+def load_previous_snapshot(result_path, ymd):
+    """
+    오늘(ymd) 이전의 가장 최근 album / track 결과가 모두 있는 snapshot 로드
+    - 없으면 None (전체 추출)
+    """
+    track_path = find_previous_result(result_path, TRACK_FILE, ymd)
+    if track_path is None or not os.path.exists(os.path.join(os.path.dirname(track_path), ALBUM_FILE)):
+        return None
+    return Snapshot(os.path.dirname(track_path))
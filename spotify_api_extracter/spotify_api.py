@@ -0,0 +1,306 @@
+import http_client
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Metrics
+from rate_limiter import RateLimiter
+from response_cache import CachedResponse, make_key
+
+# extract.py / re_extract_track_popularity.py 의 __main__ 에서 make_log 로 만든 logger 로 교체
+mylogger = logging.getLogger(__name__)
+
+# extract.py / re_extract_track_popularity.py 의 __main__ 에서 TokenPool 지정
+token_pool = None
+
+# 모든 worker 가 공유하는 rate limiter (credential 별 token bucket + Retry-After 전체 대기)
+rate_limiter = RateLimiter()
+
+# endpoint 별 응답 시간 / 재시도 / 429 / stage 별 row 수 집계 (extract.py 의 __main__ 에서 JSON / Prometheus 로 저장)
+metrics = Metrics()
+
+# extract.py 의 __main__ 에서 --cache 지정 시 ResponseCache 지정
+response_cache = None
+
+# extract.py 의 __main__ 에서 --include-groups 지정 시 조회할 album group list (None 이면 전체)
+include_groups = None
+
+AUDIO_FEATURE_BATCH = 100   # audio-features?ids= 한번에 조회 가능한 최대 track 수
+TRACK_BATCH = 50            # tracks?ids= 한번에 조회 가능한 최대 track 수
+ALBUM_BATCH = 20            # albums?ids= 한번에 조회 가능한 최대 album 수
+PAGE_LIMIT = 50             # artists/{id}/albums 페이지 당 최대 album 수
+PAGE_WORKERS = 8            # 나머지 페이지를 동시에 요청하는 thread 수
+MAX_RETRIES = 5
+
+# 나머지 페이지 동시 요청용 thread pool - 모든 worker 가 공유
+page_executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS)
+
+
+def chunk_list(items, size):
+    """
+    list를 size 단위로 잘라서 반환
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def change_feature(feature):
+    """
+    audio feature : NULL 값이 많이 존재 : 없을 시 None 대체
+    """
+    feature = dict(feature or {})
+    # 노가다 숨기기
+    feature["acousticness"] = feature.get("acousticness", None)
+    feature["analysis_url"] = feature.get("analysis_url", None)
+    feature["danceability"] = feature.get("danceability", None)
+    feature["duration_ms"] = feature.get("duration_ms", None)
+    feature["energy"] = feature.get("energy", None)
+    feature["feature_id"] = feature.get("id", None)
+    feature["instrumentalness"] = feature.get("instrumentalness", None)
+    feature["liveness"] = feature.get("liveness", None)
+    feature["loudness"] = feature.get("loudness", None)
+    feature["mode"] = feature.get("mode", None)
+    feature["speechiness"] = feature.get("speechiness", None)
+    feature["tempo"] = feature.get("tempo", None)
+    feature["time_signature"] = feature.get("time_signature", None)
+    feature["valence"] = feature.get("valence", None)
+    feature["track_href"] = feature.get("track_href", None)
+    return feature
+
+
+def request_get(url, params=None, headers=None):
+    """
+    Spotify API GET 호출 (cache 없이)
+    - 요청마다 token_pool 에서 가장 여유있는 credential 을 lease
+    - 모든 요청은 rate_limiter 를 통과, 429 는 Retry-After 동안 전체 요청 중지 후 재시도
+    """
+    retries = 0
+
+    while True:
+        credential = token_pool.lease()
+        wait_time = credential.blocked_until - time.time()
+        if wait_time > 0:
+            # 전체 credential 이 막혀있음 -> 가장 빨리 풀리는 credential 대기
+            time.sleep(wait_time)
+            metrics.add_wait("credential_blocked", wait_time)
+        metrics.add_wait("rate_limit", rate_limiter.wait(credential.client_id))
+
+        start = time.time()
+        try:
+            response = http_client.get(url, headers=dict(credential.headers, **(headers or {})), params=params)
+        except Exception:
+            token_pool.release(credential, None)
+            metrics.observe_request(url, "error", time.time() - start)
+            raise
+        metrics.observe_request(url, response.status_code, time.time() - start, credential.client_id)
+        retry_after = int(response.headers.get('Retry-After', 0)) if response.status_code == 429 else 0
+        token_pool.release(credential, response.status_code, retry_after)
+        rate_limiter.update(credential.client_id, response.status_code, retry_after)
+
+        if response.status_code not in (401, 429) or retries >= MAX_RETRIES:
+            return response
+
+        # API 제한 / token 만료 -> 다른 credential 로 재시도
+        mylogger.info(f"API ISSUE {url} || {response.status_code} status_code / client_id :: {credential.client_id} Retry-After :: {retry_after}")
+        metrics.add_retry(url)
+        retries += 1
+
+
+def spotify_get(url, params=None, resource=None):
+    """
+    Spotify API GET 공통 호출
+    - resource 가 cache 대상이면 response_cache 에서 먼저 조회
+    - TTL 이 지난 응답은 ETag 로 조건부 재검증 (304 면 cache 재사용)
+    """
+    if response_cache is None or not response_cache.enabled(resource):
+        return request_get(url, params)
+
+    key = make_key(url, params)
+    cached = response_cache.lookup(resource, key)
+    if cached is not None and cached[2]:
+        return CachedResponse(cached[0], cached[1])
+
+    headers = {"If-None-Match": cached[1]} if cached is not None and cached[1] else None
+    response = request_get(url, params, headers)
+
+    if response.status_code == 304:
+        response_cache.touch(resource, key)
+        return CachedResponse(cached[0], cached[1])
+    if response.status_code == 200:
+        response_cache.store(resource, key, response.text, response.headers.get("ETag"))
+    return response
+
+
+def get_all_pages(url, params=None, resource=None, limit=PAGE_LIMIT):
+    """
+    offset / limit 페이지 API 전체 조회
+    - 첫 페이지의 total 로 나머지 페이지 offset 을 계산해서 동시에 요청 (같은 token_pool / rate_limiter 통과)
+    - return (첫 페이지 response, 전체 item list) / 실패한 페이지가 있으면 (실패한 response, None)
+    """
+    params = dict(params or {}, offset=0, limit=limit)
+    response = spotify_get(url, params, resource)
+    if response.status_code != 200:
+        return response, None
+
+    data = response.json()
+    items = list(data["items"])
+    page_params = [dict(params, offset=offset) for offset in range(limit, data["total"], limit)]
+
+    for page_response in page_executor.map(lambda page_param: spotify_get(url, page_param, resource), page_params):
+        if page_response.status_code != 200:
+            mylogger.info(f"PAGE ERROR {url} || status_code : {page_response.status_code} error_msg : {page_response.text}")
+            return page_response, None
+        items.extend(page_response.json()["items"])
+
+    return response, items
+
+
+def get_several_items(url, result_key, ids, batch_size, resource=None, errors=None):
+    """
+    여러 id를 한번에 조회하는 Spotify API 공통 호출
+    - response_cache 에 id 별로 저장된 item 은 제외하고 나머지만 호출
+    - ids 를 batch_size 단위로 잘라서 ?ids= 로 호출
+    - 응답 list 순서대로 id에 매핑, null 이거나 실패한 id는 None
+    - errors (dict) 가 주어지면 실패한 batch 의 id 별로 (status_code, error text) 기록 -> 없는 id 와 구분
+    """
+    ids = list(dict.fromkeys(ids))      # 중복 제거 (순서 유지)
+    use_cache = response_cache is not None and response_cache.enabled(resource)
+    item_dict = response_cache.get_items(resource, ids) if use_cache else {}
+
+    for batch in chunk_list([item_id for item_id in ids if item_id not in item_dict], batch_size):
+        response = request_get(url, params={"ids": ",".join(batch)})
+
+        if response.status_code == 200:
+            # 요청한 ids 순서와 동일하게 응답 -> 비어있는 자리는 None
+            batch_items = dict(zip(batch, response.json().get(result_key) or []))
+            item_dict.update(batch_items)
+            if use_cache:
+                response_cache.put_items(resource, batch_items)
+            mylogger.info(f"BATCH DONE [{len(item_dict)}/{len(ids)}] || {result_key} batch 조회 완료")
+
+        else:
+            mylogger.info(f"BATCH ERROR {result_key} || status_code : {response.status_code} error_msg : {response.text}")
+            if errors is not None:
+                errors.update((item_id, (response.status_code, response.text)) for item_id in batch)
+
+    return {item_id: item_dict.get(item_id) for item_id in ids}
+
+
+def get_audio_features(track_ids):
+    """
+    track id 목록에 해당하는 audio feature 일괄 추출
+    - REST API : Spotify audio-features API (ids 최대 100개)
+    - 비어있는 feature는 None 값으로 채워서 반환
+    """
+    url = f"{http_client.API_URL}/v1/audio-features"
+    features = get_several_items(url, "audio_features", track_ids, AUDIO_FEATURE_BATCH, resource="audio_features")
+    metrics.add_rows("feature", len(features))
+
+    return {track_id: change_feature(feature) for track_id, feature in features.items()}
+
+
+def get_several_tracks(track_ids, errors=None):
+    """
+    track id 목록에 해당하는 track 정보 일괄 추출
+    - REST API : Spotify tracks API (ids 최대 50개)
+    - 조회되지 않은 track은 None (batch 요청이 실패한 track 은 errors 에도 기록)
+    """
+    url = f"{http_client.API_URL}/v1/tracks"
+
+    return get_several_items(url, "tracks", track_ids, TRACK_BATCH, resource="tracks", errors=errors)
+
+
+def get_artist_albums(artist_id):
+    """
+    artist 의 전체 album 목록 (50개 초과도 전부)
+    - REST API : Spotify artist albums API (페이지 당 최대 50개, 나머지 페이지는 동시에 요청)
+    - include_groups 가 지정되면 해당 group (album / single / compilation / appears_on) 만 조회
+    - return (response, album list) / 실패 시 (response, None)
+    """
+    url = f"{http_client.API_URL}/v1/artists/{artist_id}/albums"
+    params = {"include_groups": ",".join(include_groups)} if include_groups else None
+
+    return get_all_pages(url, params, resource="artist_albums")
+
+
+def get_several_albums(album_ids):
+    """
+    album id 목록에 해당하는 album 정보 일괄 추출
+    - REST API : Spotify albums API (ids 최대 20개)
+    - 응답 album 안에 tracklist 첫 페이지(최대 50곡) 포함, 조회되지 않은 album은 None
+    """
+    url = f"{http_client.API_URL}/v1/albums"
+
+    return get_several_items(url, "albums", album_ids, ALBUM_BATCH, resource="albums")
+
+
+def is_complete_tracklist(album):
+    """
+    albums?ids= 응답에 album의 전체 track이 포함되어 있는지 확인
+    - 50곡 초과 album은 False -> albums/{id}/tracks 페이지 조회 필요
+    """
+    if album is None or "tracks" not in album:
+        return False
+    tracks = album["tracks"]
+    return tracks.get("next") is None and len(tracks["items"]) >= tracks["total"]
+
+
+def make_track_result(track, album_key, feature):
+    """
+    track + audio feature 를 csv 명세(21 column)에 맞는 list로 변환
+    """
+    return [
+        track["id"]
+        , track["name"]
+        , feature["track_href"]
+        , track["external_urls"]["spotify"]
+        , track["artists"][0]["id"]
+        , track["artists"][0]["name"]
+        , album_key
+        , track["track_number"]
+
+        # feature
+        , feature["acousticness"]
+        , feature["analysis_url"]
+        , feature["danceability"]
+        , feature["duration_ms"]
+        , feature["energy"]
+        , feature["instrumentalness"]
+        , feature["liveness"]
+        , feature["loudness"]
+        , feature["mode"]
+        , feature["speechiness"]
+        , feature["tempo"]
+        , feature["time_signature"]
+        , feature["valence"]
+    ]
+
+
+def make_credit_result(track, album_key, release_date):
+    """
+    track 에 credit 된 전체 artist -> [track_id, album_id, artist_id, artist_name, artist_order, release_date] list (콜라보 그래프용)
+    - release_date : album 발매일 (객원 참여 album 은 album csv 에 없으므로 credit 에 같이 저장)
+    """
+    return [[track["id"], album_key, artist["id"], artist["name"], order, release_date] for order, artist in enumerate(track["artists"])]
+
+
+def is_guest_track(track, artist_keys):
+    """
+    추출 대상 artist (artist_keys) 가 credit 된 track 인지 - 객원 참여 album 에서 credit 을 저장할 track
+    """
+    return any(artist["id"] in artist_keys for artist in track["artists"])
+
+
+def make_album_result(album):
+    """
+    album 을 csv 명세(8 column)에 맞는 list로 변환
+    """
+    return [
+        album["id"]
+        , album["name"]
+        , album["external_urls"]["spotify"]
+        , album["artists"][0]["id"]
+        , album["artists"][0]["name"]               # artist가 한명은 아닌 것 같지만..! -> csv 명세에 맞춰 1명으로 고정
+        , album["images"][0]["url"]
+        , album["release_date"]
+        , album["total_tracks"]
+    ]
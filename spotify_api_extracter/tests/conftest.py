@@ -0,0 +1,48 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# 모듈들은 spotify_api_extracter 폴더 기준으로 import (python3 extract.py 와 동일)
+EXTRACTER_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXTRACTER_PATH)
+
+from mock_spotify_server import FIXTURE_YMD, SpotifyFixture, make_server  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def spotify_server():
+    """
+    result/20230601 로 응답하는 local mock Spotify 서버 - return 서버 (주소는 server_url 로)
+    """
+    fixture = SpotifyFixture(os.path.join(EXTRACTER_PATH, 'result', FIXTURE_YMD))
+    server = make_server(fixture, 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def server_url(spotify_server, monkeypatch):
+    """
+    http_client 의 API / 인증 서버 주소를 mock 서버로 변경
+    """
+    import http_client
+
+    url = f"http://127.0.0.1:{spotify_server.server_address[1]}"
+    monkeypatch.setattr(http_client, "API_URL", url)
+    monkeypatch.setattr(http_client, "ACCOUNTS_URL", url)
+    return url
+
+
+@pytest.fixture
+def server_stats(spotify_server):
+    """
+    mock 서버가 받은 endpoint / status code 별 요청 수를 조회하는 함수
+    """
+    def stats():
+        with spotify_server.RequestHandlerClass.lock:
+            return dict(spotify_server.RequestHandlerClass.stats)
+    return stats
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+import shutil
+import threading
+
+import pytest
+
+import async_extract
+import extract
+import http_client
+import spotify_api
+from benchmark import run_once
+from mock_spotify_server import FIXTURE_YMD
+from rate_limiter import RateLimiter
+from token_pool import TokenPool
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result', FIXTURE_YMD)
+OUTPUT_FILES = ["kpop_artist_data.csv", "kpop_artist_album_data.csv", "kpop_artist_album_track_data.csv"]
+
+
+@pytest.fixture
+def token_pool(server_url, monkeypatch):
+    token_pool = TokenPool([["client-a", "secret"]])
+    monkeypatch.setattr(spotify_api, "token_pool", token_pool)
+    monkeypatch.setattr(spotify_api, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(spotify_api, "response_cache", None)
+    return token_pool
+
+
+def result_dir(workdir):
+    """
+    실행한 날짜의 결과 폴더 (workdir/result 에는 이전 결과로 쓰는 fixture 폴더도 있음)
+    """
+    ymd = next(name for name in os.listdir(os.path.join(workdir, 'result')) if name != FIXTURE_YMD)
+    return os.path.join(workdir, 'result', ymd)
+
+
+def read_output(workdir):
+    """
+    결과 csv 별 정렬된 line list (engine 마다 artist 저장 순서가 다를 수 있음)
+    """
+    result_path = result_dir(workdir)
+    output = {}
+    for file_name in OUTPUT_FILES:
+        with open(os.path.join(result_path, file_name)) as f:
+            output[file_name] = sorted(f)
+    output["error"] = sorted(os.listdir(os.path.join(result_path, 'error'))) if os.path.exists(os.path.join(result_path, 'error')) else []
+    return output
+
+
+def test_async_matches_thread(spotify_server):
+    thread = run_once("thread", spotify_server, FIXTURE_PATH, credentials=5, extra_args=[], keep=True)
+    async_ = run_once("async", spotify_server, FIXTURE_PATH, credentials=5, extra_args=["--concurrency", "8"], keep=True)
+    try:
+        assert thread["returncode"] == async_["returncode"] == 0
+        output = read_output(thread["workdir"])
+        assert len(output["kpop_artist_album_track_data.csv"]) == thread["rows"]["kpop_artist_album_track_data.csv"] + 1 > 1
+        assert read_output(async_["workdir"]) == output
+    finally:
+        shutil.rmtree(thread["workdir"], ignore_errors=True)
+        shutil.rmtree(async_["workdir"], ignore_errors=True)
+
+
+def test_issue_row_matches_thread(token_pool, monkeypatch):
+    monkeypatch.setattr(extract, "mylogger", logging.getLogger("extract"), raising=False)     # __main__ 에서 지정하는 logger
+
+    async def async_albums_track(album_key):
+        async with http_client.make_async_session(1) as session:
+            return await async_extract.artist_albums_track(async_extract.AsyncSpotifyClient(session, token_pool, 1), album_key)
+
+    # 없는 album -> 404, 첫 페이지부터 실패하면 track 정보는 비어있음
+    thread_tracks, thread_issues = extract.artist_albums_track("unknown-album")
+    async_tracks, async_issues = asyncio.run(async_albums_track("unknown-album"))
+
+    assert thread_tracks == async_tracks == []
+    assert thread_issues == async_issues == [["unknown-album", None, None, None, None]]
+
+
+def test_run_async_bounds_artists(monkeypatch):
+    active, max_active, saved = [0], [0], []
+
+    async def fake_extract_artist(client, artist_key, dedup_index, snapshot=None, guest_artist_keys=None):
+        active[0] += 1
+        max_active[0] = max(max_active[0], active[0])
+        await asyncio.sleep(0.01 if artist_key % 3 else 0.03)
+        active[0] -= 1
+        return [[artist_key]], [], [], []
+
+    def save_artist(artist_key, album_list, track_list, issue_list, credit_list):
+        saved.append((artist_key, threading.current_thread() is threading.main_thread()))
+
+    monkeypatch.setattr(async_extract, "extract_artist", fake_extract_artist)
+    error_rows, data_count = asyncio.run(async_extract.run_async(list(range(30)), None, 4, save_artist, None))
+
+    # 동시에 추출하는 artist 는 concurrency 명까지, 저장은 artist 순서대로 event loop 밖에서
+    assert max_active[0] == 4
+    assert (error_rows, data_count) == ([], 30)
+    assert saved == [(artist_key, False) for artist_key in range(30)]
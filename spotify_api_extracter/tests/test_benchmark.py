@@ -0,0 +1,45 @@
+import math
+import os
+
+from benchmark import compare, run_once
+from mock_spotify_server import FIXTURE_YMD
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result', FIXTURE_YMD)
+ARTIST_COUNT, ALBUM_COUNT, TRACK_COUNT = 708, 1811, 8745        # result/20230601 row 수
+
+
+def api_requests(result, route):
+    # run_once 는 실행 전후 서버 요청 수의 차이 -> 다른 test 가 보낸 요청은 섞이지 않음
+    return sum(count for key, count in result["status"].items() if key.split(' ')[0] == route)
+
+
+def test_popularity_bulk_regression(spotify_server):
+    result = run_once("popularity-bulk", spotify_server, FIXTURE_PATH, credentials=5, extra_args=[])
+
+    assert result["returncode"] == 0
+    assert result["rows"] == {"kpop_artist_album_track_data_v4.csv": TRACK_COUNT}
+    # tracks?ids= 50개 단위 - track 1개씩 조회하는 요청 없음
+    assert api_requests(result, "tracks") == math.ceil(TRACK_COUNT / 50)
+    assert api_requests(result, "track") == 0
+    assert result["requests"] == math.ceil(TRACK_COUNT / 50)
+    assert result["requests_per_sec"] > 5
+
+
+def test_extract_regression(spotify_server):
+    result = run_once("thread", spotify_server, FIXTURE_PATH, credentials=5, extra_args=[])
+
+    assert result["returncode"] == 0
+    assert result["rows"] == {"kpop_artist_data.csv": ARTIST_COUNT, "kpop_artist_album_data.csv": ALBUM_COUNT,
+                              "kpop_artist_album_track_data.csv": TRACK_COUNT}
+    # audio-features?ids= 100개 / albums?ids= 20개 단위 (artist 별로 나눠서 요청하므로 artist 당 최대 1번 더)
+    assert api_requests(result, "audio_features") <= math.ceil(TRACK_COUNT / 100) + ARTIST_COUNT
+    assert api_requests(result, "albums") <= math.ceil(ALBUM_COUNT / 20) + ARTIST_COUNT
+    assert api_requests(result, "audio_feature") == 0
+    assert api_requests(result, "album_tracks") <= ALBUM_COUNT // 10      # 50곡 넘는 album 만 tracklist 페이지 조회
+    assert result["rate_limited"] == 0
+    assert result["requests_per_sec"] > 5
+
+    # 자기 자신과 비교하면 regression 없음, row 수가 바뀌면 regression
+    assert compare([result], {"results": [result]}) == []
+    changed = dict(result, rows=dict(result["rows"], **{"kpop_artist_album_track_data.csv": TRACK_COUNT - 1}))
+    assert len(compare([changed], {"results": [result]})) == 1
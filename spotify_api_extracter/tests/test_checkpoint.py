@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from checkpoint import CheckpointJournal, find_unfinished
+
+
+@pytest.fixture
+def output_paths(tmp_path):
+    paths = {"album": str(tmp_path / "album.csv"), "track": str(tmp_path / "track.csv")}
+    for file_path in paths.values():
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("id,name\n")
+    return paths
+
+
+def append(file_path, text):
+    with open(file_path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_resume_truncates_to_last_commit(tmp_path, output_paths):
+    journal_path = str(tmp_path / "checkpoint" / "20230601.jsonl")
+    journal = CheckpointJournal(journal_path, output_paths)
+    journal.start()
+
+    append(output_paths["album"], "a1,album 1\n")
+    append(output_paths["track"], "t1,track 1\n")
+    journal.commit_artists([("artist1", ["a1"], journal.current_offsets())])
+
+    # 완료 기록 전에 종료된 artist 의 row + 쓰다가 끊긴 journal 마지막 줄
+    append(output_paths["album"], "a2,album 2\n")
+    append(output_paths["track"], "t2,track 2\nt3,tr")
+    append(journal_path, '{"type": "artist", "artist_id": "art')
+
+    resumed = CheckpointJournal(journal_path, output_paths)
+    assert resumed.resume() is True
+    assert resumed.done_artists == {"artist1"}
+    assert resumed.done_albums == {"a1"}
+    assert resumed.is_done("artist1") and not resumed.is_done("artist2")
+    assert read(output_paths["album"]) == "id,name\na1,album 1\n"
+    assert read(output_paths["track"]) == "id,name\nt1,track 1\n"
+
+
+def test_resume_before_first_commit_keeps_header(tmp_path, output_paths):
+    journal_path = str(tmp_path / "20230601.jsonl")
+    CheckpointJournal(journal_path, output_paths).start()
+    append(output_paths["album"], "a1,album 1\n")
+
+    resumed = CheckpointJournal(journal_path, output_paths)
+    assert resumed.resume() is True
+    assert resumed.done_artists == set()
+    assert read(output_paths["album"]) == "id,name\n"
+
+
+@pytest.mark.parametrize("content", ["", '{"type": "sta', '{"type": "artist", "artist_id": "x", "albums": [], "offsets": {"album": 1, "track": 1}}\n'])
+def test_resume_without_start_entry_is_fresh(tmp_path, output_paths, content):
+    journal_path = tmp_path / "20230601.jsonl"
+    journal_path.write_text(content)
+
+    journal = CheckpointJournal(str(journal_path), output_paths)
+    assert journal.resume() is False
+    assert journal.done_artists == set()
+    assert read(output_paths["album"]) == "id,name\n"
+
+
+def test_resume_with_different_outputs_raises(tmp_path, output_paths):
+    journal_path = str(tmp_path / "20230601.jsonl")
+    CheckpointJournal(journal_path, output_paths).start()
+
+    credit_path = tmp_path / "credit.csv"
+    credit_path.write_text("track_id\n")
+    with pytest.raises(ValueError, match="credit"):
+        CheckpointJournal(journal_path, dict(output_paths, credit=str(credit_path))).resume()
+
+
+def test_start_records_outputs(tmp_path, output_paths):
+    journal_path = tmp_path / "20230601.jsonl"
+    CheckpointJournal(str(journal_path), output_paths).start()
+
+    entry = json.loads(journal_path.read_text().splitlines()[0])
+    assert entry == {"type": "start", "outputs": ["album", "track"], "offsets": {"album": 8, "track": 8}}
+
+
+def test_find_unfinished(tmp_path, output_paths):
+    checkpoint_dir = tmp_path / "checkpoint"
+    assert find_unfinished(str(checkpoint_dir)) is None
+
+    CheckpointJournal(str(checkpoint_dir / "20230601.jsonl"), output_paths).start()
+    finished = CheckpointJournal(str(checkpoint_dir / "20230602.jsonl"), output_paths)
+    finished.start()
+    finished.finish()
+    (checkpoint_dir / "20230603.jsonl").write_text("")        # start 기록 없음
+    (checkpoint_dir / "notes.txt").write_text("")
+
+    assert find_unfinished(str(checkpoint_dir)) == "20230601"
@@ -0,0 +1,172 @@
+import csv
+import os
+import shutil
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmark import run_once
+from collab_graph import ALBUM_FILE, CREDIT_FILE, CREDIT_HEADER, CollabGraph, centrality_table, edge_table, pagerank, read_credits
+from mock_spotify_server import FIXTURE_YMD, SpotifyFixture, make_server
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result', FIXTURE_YMD)
+
+# track_id : ([artist_id, ...], 발매일 yyyymmdd)
+TRACKS = {
+    "t1": (["a", "b"], 20200101),
+    "t2": (["a", "b", "c"], 20210601),
+    "t3": (["b", "c"], 20190301),
+    "t4": (["d"], 20220101),
+    "t5": (["a", "d"], 20230101),
+    "t6": (["c", "a"], 0),
+}
+
+
+def make_credits(track_ids):
+    rows = [(track_id, artist_id, artist_id.upper(), TRACKS[track_id][1])
+            for track_id in track_ids for artist_id in TRACKS[track_id][0]]
+    return pd.DataFrame(rows, columns=["track_id", "artist_id", "artist_name", "date"])
+
+
+def edge_dict(graph):
+    source, target = graph.edges()
+    ids = graph.artist_ids.astype(str)
+    return {tuple(sorted((ids[s], ids[t]))): (count, first, last)
+            for s, t, count, first, last in zip(source, target, graph.counts, graph.first_dates, graph.last_dates)}
+
+
+def test_add_credits():
+    graph = CollabGraph()
+    assert graph.add_credits(make_credits(["t1", "t2", "t3"])) == (3, 3)
+    assert edge_dict(graph) == {
+        ("a", "b"): (2, 20200101, 20210601),
+        ("a", "c"): (1, 20210601, 20210601),
+        ("b", "c"): (2, 20190301, 20210601),
+    }
+
+
+def test_incremental_equals_full_build():
+    full = CollabGraph()
+    full.add_credits(make_credits(list(TRACKS)))
+
+    incremental = CollabGraph()
+    incremental.add_credits(make_credits(["t1", "t2"]))
+    incremental.add_credits(make_credits(["t3", "t4"]))
+    assert incremental.add_credits(make_credits(["t2", "t5", "t6"])) == (2, 1)      # t2 는 이미 반영, a-c 는 기존 edge
+    assert edge_dict(incremental) == edge_dict(full)
+    assert incremental.edge_count == 4 and incremental.artist_count == 4
+
+
+def test_same_tracks_are_not_counted_twice():
+    graph = CollabGraph()
+    graph.add_credits(make_credits(["t1", "t2"]))
+    edges = edge_dict(graph)
+    assert graph.add_credits(make_credits(["t1", "t2"])) == (0, 0)
+    assert edge_dict(graph) == edges
+
+
+def test_unknown_date_keeps_known_range():
+    graph = CollabGraph()
+    graph.add_credits(make_credits(["t6"]))
+    assert edge_dict(graph) == {("a", "c"): (1, 0, 0)}
+    graph.add_credits(make_credits(["t2"]))
+    assert edge_dict(graph)[("a", "c")] == (2, 20210601, 20210601)
+
+
+def test_save_and_load(tmp_path):
+    graph = CollabGraph()
+    graph.add_credits(make_credits(["t1", "t2", "t3"]))
+    state_path = str(tmp_path / "graph" / "collab_graph.npz")
+    graph.save(state_path)
+
+    loaded = CollabGraph.load(state_path)
+    assert edge_dict(loaded) == edge_dict(graph)
+    assert loaded.add_credits(make_credits(["t3", "t5"])) == (1, 1)
+    assert CollabGraph.load(str(tmp_path / "missing.npz")).edge_count == 0
+
+
+def test_adjacency_and_centrality():
+    graph = CollabGraph()
+    graph.add_credits(make_credits(list(TRACKS)))
+    adjacency = graph.adjacency()
+    assert (adjacency != adjacency.T).nnz == 0
+    assert adjacency.sum() == 2 * graph.counts.sum()
+
+    scores = pagerank(adjacency)
+    assert scores.sum() == pytest.approx(1.0)
+
+    table = centrality_table(graph)
+    assert len(table) == graph.artist_count
+    edges = edge_table(graph, min_count=2)
+    assert sorted(zip(edges["source_id"], edges["target_id"])) == [("a", "b"), ("a", "c"), ("b", "c")]
+    assert set(edges["first_date"]) == {"2020-01-01", "2021-06-01", "2019-03-01"}
+
+
+def test_read_credits_release_date(tmp_path):
+    pd.DataFrame([["t1", "al1", "a", "A", 0, "2020-05"], ["t1", "al1", "b", "B", 1, "2020-05"], ["t2", "al2", "a", "A", 0, ""]],
+                 columns=CREDIT_HEADER).to_csv(tmp_path / CREDIT_FILE, index=False)
+    credits = read_credits(str(tmp_path), "20230601")
+    assert credits["date"].tolist() == [20200501, 20200501, 20230601]        # 발매일이 없으면 추출 일자
+
+
+def test_read_credits_without_release_date(tmp_path):
+    # release_date 컬럼이 없는 이전 credit csv 는 album csv 의 발매일
+    pd.DataFrame([["t1", "al1", "a", "A", 0]], columns=CREDIT_HEADER[:-1]).to_csv(tmp_path / CREDIT_FILE, index=False)
+    pd.DataFrame([["al1", "2019-03-01"]], columns=["id", "release_date"]).to_csv(tmp_path / ALBUM_FILE, index=False)
+    assert read_credits(str(tmp_path), "20230601")["date"].tolist() == [20190301]
+
+
+@pytest.fixture(scope="module")
+def guest_server():
+    """
+    fixture 의 artist 2명이 목록에 없는 artist 의 album 1개에 객원 참여한 mock 서버
+    """
+    fixture = SpotifyFixture(FIXTURE_PATH)
+    kpop = [{"id": artist["id"], "name": artist["name"]} for artist in fixture.artists[:2]]
+    foreign = {"id": "foreign-artist", "name": "Foreign Artist"}
+    fixture.albums["guest-album"] = {
+        "id": "guest-album", "name": "Guest Album", "external_urls": {"spotify": "url"}, "artists": [foreign] + kpop[:1],
+        "images": [{"url": "image"}], "release_date": "2021-03-04", "total_tracks": 2, "album_group": "appears_on", "album_type": "album",
+    }
+    fixture.album_tracks["guest-album"] = [
+        {"id": "guest-track-1", "name": "feat", "external_urls": {"spotify": "url"}, "artists": [foreign] + kpop,
+         "track_number": 1, "popularity": 0, "album": {"id": "guest-album"}},
+        {"id": "guest-track-2", "name": "solo", "external_urls": {"spotify": "url"}, "artists": [foreign],
+         "track_number": 2, "popularity": 0, "album": {"id": "guest-album"}},
+    ]
+    for artist in kpop:
+        fixture.artist_albums[artist["id"]].append("guest-album")
+
+    server = make_server(fixture, 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, kpop
+    server.shutdown()
+
+
+def read_result(workdir):
+    ymd = next(name for name in os.listdir(os.path.join(workdir, 'result')) if name != FIXTURE_YMD)
+    output = {}
+    for file_name in [CREDIT_FILE, ALBUM_FILE, "kpop_artist_album_track_data.csv"]:
+        with open(os.path.join(workdir, 'result', ymd, file_name), encoding='utf-8') as f:
+            output[file_name] = list(csv.reader(f))
+    return output
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_guest_album_credits(guest_server, engine):
+    server, kpop = guest_server
+    result = run_once(engine, server, FIXTURE_PATH, credentials=5, extra_args=["--collab"], keep=True)
+    try:
+        assert result["returncode"] == 0
+        output = read_result(result["workdir"])
+
+        # 객원 참여 album 은 credit 만 (목록 artist 가 credit 된 track 1번씩) - album / track row 는 그대로
+        guest_rows = [row for row in output[CREDIT_FILE] if row[1] == "guest-album"]
+        assert guest_rows == [["guest-track-1", "guest-album", artist["id"], artist["name"], str(order), "2021-03-04"]
+                              for order, artist in enumerate([{"id": "foreign-artist", "name": "Foreign Artist"}] + kpop)]
+        assert all(row[0] != "guest-album" for row in output[ALBUM_FILE])
+        assert len(output[ALBUM_FILE]) - 1 == result["rows"][ALBUM_FILE] == 1811
+        assert all(row[0] not in ("guest-track-1", "guest-track-2") for row in output["kpop_artist_album_track_data.csv"])
+    finally:
+        shutil.rmtree(result["workdir"], ignore_errors=True)
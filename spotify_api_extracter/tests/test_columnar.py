@@ -0,0 +1,81 @@
+import csv
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import columnar
+from benchmark import run_once
+from columnar import SCHEMAS, convert_value, csv_to_parquet, make_schema, parquet_path
+from mock_spotify_server import FIXTURE_YMD
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result', FIXTURE_YMD)
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        csv.writer(f).writerows([header] + rows)
+
+
+def test_make_schema():
+    schema = make_schema("track_popularity")
+    assert schema.names == [name for name, _ in SCHEMAS["track_popularity"]]
+    assert schema.field("track_number").type == pa.int32()
+    assert schema.field("duration_ms").type == pa.int64()
+    assert schema.field("mode").type == schema.field("time_signature").type == pa.int8()
+    assert schema.field("tempo").type == pa.float64()
+    assert schema.field("popularity").type == pa.int32()
+    assert make_schema("artist").field("genre").type == pa.list_(pa.string())
+
+    dictionary = make_schema("album", dictionary=True)
+    assert dictionary.field("artist_id").type == dictionary.field("artist_name").type == pa.dictionary(pa.int32(), pa.string())
+    assert dictionary.field("id").type == pa.string()
+
+
+def test_convert_value():
+    assert convert_value("", "int32") is None and convert_value(None, "string") is None
+    assert convert_value("12.0", "int32") == 12
+    assert convert_value("0.5", "float64") == 0.5
+    assert convert_value("['k-pop', 'pop']", "list<string>") == ["k-pop", "pop"]
+    assert convert_value(2023, "string") == "2023"
+
+
+def test_csv_to_parquet_row_groups(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "ROW_GROUP_SIZE", 2)
+    csv_path = str(tmp_path / "kpop_artist_album_data.csv")
+    rows = [[f"a{idx}", f"album {idx}", "url", "artist1", "artist", "", "2023-05-01", str(idx)] for idx in range(5)]
+    write_csv(csv_path, [name for name, _ in SCHEMAS["album"]], rows)
+
+    assert csv_to_parquet(csv_path, parquet_path(csv_path), "album", dictionary=True) == 5
+
+    parquet_file = pq.ParquetFile(parquet_path(csv_path))
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.schema_arrow == make_schema("album", dictionary=True)
+    table = parquet_file.read()
+    assert table.column("total_tracks").to_pylist() == list(range(5))
+    assert table.column("image_url").to_pylist() == [None] * 5
+
+
+def test_empty_csv_writes_schema(tmp_path):
+    csv_path = str(tmp_path / "kpop_artist_data.csv")
+    write_csv(csv_path, [name for name, _ in SCHEMAS["artist"]], [])
+
+    assert csv_to_parquet(csv_path, parquet_path(csv_path), "artist") == 0
+    assert pq.read_table(parquet_path(csv_path)).schema == make_schema("artist")
+
+
+def test_popularity_parquet(spotify_server):
+    result = run_once("popularity-bulk", spotify_server, FIXTURE_PATH, credentials=5, extra_args=["--parquet"], keep=True)
+    try:
+        assert result["returncode"] == 0
+        # workdir/result 에는 fixture 폴더도 있음 -> 실행한 날짜 폴더
+        ymd = next(name for name in os.listdir(os.path.join(result["workdir"], 'result')) if name != FIXTURE_YMD)
+        table = pq.read_table(os.path.join(result["workdir"], 'result', ymd, 'kpop_artist_album_track_data_v4.parquet'))
+
+        # 입력 track 컬럼 21개 + popularity, 타입은 schema 그대로
+        assert table.schema == make_schema("track_popularity")
+        assert table.num_rows == result["rows"]["kpop_artist_album_track_data_v4.csv"]
+        assert table.column("popularity").null_count == 0
+    finally:
+        shutil.rmtree(result["workdir"], ignore_errors=True)
@@ -0,0 +1,72 @@
+from dedup_index import DedupIndex, variant_key
+
+
+def make_album(album_id, name="Falling Blossoms", artist_id="artist1", release_date="2023-05-01", total_tracks=2):
+    return {"id": album_id, "name": name, "artists": [{"id": artist_id}], "release_date": release_date, "total_tracks": total_tracks}
+
+
+def album_row(album):
+    # make_album_result 형식 (csv 에서 읽으면 total_tracks 는 문자열)
+    return [album["id"], album["name"], "url", album["artists"][0]["id"], "artist", "image", album["release_date"], str(album["total_tracks"])]
+
+
+def test_claim_album_once():
+    index = DedupIndex()
+    assert index.claim_album(make_album("a1")) is True
+    assert index.claim_album(make_album("a1")) is False
+    assert index.claim_album(make_album("a2")) is True      # group_variants 가 아니면 variant 도 추출
+    assert index.stats() == {"album": 2, "track": 0, "album_duplicate": 1}
+
+
+def test_variants_of_same_artist_are_grouped():
+    index = DedupIndex(group_variants=True)
+    assert index.claim_album(make_album("a1", name="Falling Blossoms")) is True
+    assert index.claim_album(make_album("a2", name="FALLING  blossoms!")) is False
+    assert index.claim_album(make_album("a3", release_date="2023-05-02")) is True
+    assert index.claim_album(make_album("a4", total_tracks=3)) is True
+    assert index.stats()["album_variant"] == 1
+
+
+def test_variants_of_different_artists_are_kept():
+    index = DedupIndex(group_variants=True)
+    assert index.claim_album(make_album("a1", artist_id="kim_heechul")) is True
+    assert index.claim_album(make_album("a2", artist_id="min_kyunghoon")) is True
+    assert "album_variant" not in index.stats()
+
+
+def test_variant_key_matches_csv_row():
+    album = make_album("a1", total_tracks=12)
+    row = album_row(album)
+    assert variant_key(album["name"], album["release_date"], album["total_tracks"], album["artists"][0]["id"]) == \
+        variant_key(row[1], row[6], row[7], row[3])
+
+
+def test_claim_tracks_keeps_order():
+    index = DedupIndex()
+    assert index.claim_tracks(["t1", "t2", "t1"]) == [True, True, False]
+    assert index.claim_tracks(["t3", "t2"]) == [True, False]
+    assert index.stats() == {"album": 0, "track": 3, "track_duplicate": 2}
+
+
+def test_restore_from_csv_rows():
+    index = DedupIndex(group_variants=True)
+    index.restore([album_row(make_album("a1"))], ["t1", "t2"])
+
+    assert index.claim_album(make_album("a1")) is False
+    assert index.claim_album(make_album("a2", name="falling blossoms")) is False        # 복원한 variant
+    assert index.claim_album(make_album("a3", artist_id="artist2")) is True
+    assert index.claim_tracks(["t1", "t3"]) == [False, True]
+
+
+def test_release_lets_variant_claim():
+    index = DedupIndex(group_variants=True)
+    first, variant = make_album("a1"), make_album("a2", name="falling blossoms")
+    assert index.claim_album(first) is True
+    assert index.claim_album(variant) is False
+
+    # a1 의 tracklist 조회 실패 -> release 후 variant 로 다시 claim (중복 수는 다시 세지 않음)
+    assert index.claim_album(variant, retry=True) is False
+    index.release_album(first)
+    assert index.claim_album(variant, retry=True) is True
+    assert index.claim_album(first, retry=True) is False
+    assert index.stats() == {"album": 1, "track": 0, "album_variant": 1, "album_released": 1}
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import image_extract
+from image_extract import upload_thumbnails
+from s3_uploader import S3Uploader
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "spotify-kpop-analysis"
+
+
+@pytest.fixture
+def uploader(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        uploader = S3Uploader(BUCKET, prefix="image/")
+        uploader.client.create_bucket(Bucket=BUCKET)
+        yield uploader
+        uploader.close()
+
+
+def write_thumbnails(image_path, content_hashes):
+    os.makedirs(image_path, exist_ok=True)
+    for content_hash in content_hashes:
+        with open(os.path.join(image_path, content_hash + '.jpg'), 'wb') as f:
+            f.write(content_hash.encode() * 10)
+
+
+def test_upload_only_new_thumbnails(uploader, tmp_path, monkeypatch):
+    image_path = str(tmp_path / "image") + "/"
+    uploaded_path = str(tmp_path / "uploaded.txt")
+    monkeypatch.setattr(image_extract, "IMAGE_PATH", image_path)
+    write_thumbnails(image_path, ["h1", "h2", "h3"])
+
+    # 다른 url 이라도 같은 content_hash 면 1번만
+    thumbnail_map = {"url1": ("h1", "b1"), "url2": ("h2", "b2"), "url3": ("h1", "b1")}
+    assert upload_thumbnails(uploader, thumbnail_map, uploaded_path) == 2
+
+    put_count = []
+    put_file = uploader.put_file
+    monkeypatch.setattr(uploader, "put_file", lambda key, data: put_count.append(key) or put_file(key, data))
+
+    # 다음 실행에서는 새로 생긴 thumbnail 만
+    thumbnail_map["url4"] = ("h3", "b3")
+    assert upload_thumbnails(uploader, thumbnail_map, uploaded_path) == 1
+    assert put_count == ["image/h3.jpg"]
+    assert upload_thumbnails(uploader, thumbnail_map, uploaded_path) == 0
+
+    keys = [obj["Key"] for obj in uploader.client.list_objects_v2(Bucket=BUCKET)["Contents"]]
+    assert keys == ["image/h1.jpg", "image/h2.jpg", "image/h3.jpg"]
+    with open(uploaded_path) as f:
+        assert f.read().split() == ["h1", "h2", "h3"]
+
+
+def test_failed_upload_is_retried(uploader, tmp_path, monkeypatch):
+    image_path = str(tmp_path / "image") + "/"
+    uploaded_path = str(tmp_path / "uploaded.txt")
+    monkeypatch.setattr(image_extract, "IMAGE_PATH", image_path)
+    write_thumbnails(image_path, ["h1"])
+    put_file = uploader.put_file
+
+    def fail_put(key, data):
+        uploader.part_slots.release()
+        raise ConnectionError("upload 실패")
+
+    monkeypatch.setattr(uploader, "put_file", fail_put)
+    with pytest.raises(ConnectionError):
+        upload_thumbnails(uploader, {"url1": ("h1", "b1")}, uploaded_path)
+    assert not os.path.exists(uploaded_path)
+
+    monkeypatch.setattr(uploader, "put_file", put_file)
+    assert upload_thumbnails(uploader, {"url1": ("h1", "b1")}, uploaded_path) == 1
@@ -0,0 +1,27 @@
+from metrics import Metrics, endpoint_name, escape_label
+
+
+def test_endpoint_name():
+    assert endpoint_name("https://api.spotify.com/v1/artists/3Nrfpe0tUJi4K4DXYWgMUX/albums?limit=50") == "/v1/artists/{id}/albums"
+
+
+def test_escape_label():
+    assert escape_label('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+    assert escape_label(429) == "429"
+
+
+def test_prometheus_label_escaping(tmp_path):
+    metrics = Metrics()
+    metrics.observe_request('http://127.0.0.1/v1/search"q\\', 429, 0.02, client_id='client"a\nb')
+    metrics.add_retry('http://127.0.0.1/v1/search"q\\')
+    path = str(tmp_path / "metrics.prom")
+    metrics.write_prometheus(path)
+
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    # url 의 줄바꿈은 urlparse 가 제거 - client id 의 줄바꿈이 label 안에서 escape 되어 sample 은 한 줄, 따옴표 / backslash 도 escape
+    assert 'spotify_rate_limited_total{client_id="client\\"a\\nb"} 1' in lines
+    assert 'spotify_retries_total{endpoint="/v1/search\\"q\\\\"} 1' in lines
+    assert 'spotify_request_duration_seconds_count{endpoint="/v1/search\\"q\\\\"} 1' in lines
+    assert 'spotify_requests_total{endpoint="/v1/search\\"q\\\\",status="429"} 1' in lines
+    assert all(line.startswith(("# ", "spotify_")) for line in lines)
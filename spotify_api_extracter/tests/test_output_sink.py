@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from checkpoint import CheckpointJournal
+from output_sink import OutputSink
+
+
+def csv_bytes(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+@pytest.fixture
+def output_paths(tmp_path):
+    paths = {"album": str(tmp_path / "album.csv"), "track": str(tmp_path / "track.csv")}
+    for file_path in paths.values():
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("id,name\n")
+    return paths
+
+
+def read_entries(journal_path):
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_group_commit_offsets(tmp_path, output_paths):
+    journal = CheckpointJournal(str(tmp_path / "journal.jsonl"), output_paths)
+    journal.start()
+    sink = OutputSink(output_paths, journal, flush_rows=1000, flush_interval=60).start()
+
+    expected = {name: os.path.getsize(file_path) for name, file_path in output_paths.items()}
+    expected_offsets = []
+    for idx in range(5):
+        album_rows = [[f"a{idx}", f"album {idx}"]]
+        track_rows = [[f"t{idx}-{number}", f"track {number}"] for number in range(idx + 1)]
+        sink.write({"album": album_rows, "track": track_rows}, commit=(f"artist{idx}", [f"a{idx}"]))
+        expected["album"] += len(csv_bytes(album_rows))
+        expected["track"] += len(csv_bytes(track_rows))
+        expected_offsets.append(dict(expected))
+    sink.close()
+
+    # flush_rows / flush_interval 전에는 쓰지 않고, close 때 fsync 1번 후 5개 artist 를 한번에 journal 기록
+    assert sink.stats()["flush_count"] == 1
+    assert sink.stats()["row_count"] == 5 + 15
+    entries = read_entries(journal.path)[1:]
+    assert [entry["artist_id"] for entry in entries] == [f"artist{idx}" for idx in range(5)]
+    assert [entry["offsets"] for entry in entries] == expected_offsets
+    assert journal.offsets == expected_offsets[-1]
+    assert {name: os.path.getsize(file_path) for name, file_path in output_paths.items()} == expected_offsets[-1]
+
+
+def test_rows_of_one_write_stay_together(output_paths):
+    sink = OutputSink(output_paths, flush_rows=1000, flush_interval=60).start()
+    for idx in range(50):
+        sink.write({"track": [[f"t{idx}-{number}", idx] for number in range(3)]})
+    sink.close()
+
+    with open(output_paths["track"], 'r', encoding='utf-8') as f:
+        rows = list(csv.reader(f))[1:]
+    assert [row[1] for row in rows] == [str(idx) for idx in range(50) for _ in range(3)]
+
+
+def test_flush_rows_triggers_flush_and_on_flush(tmp_path, output_paths):
+    flushed = []
+    journal = CheckpointJournal(str(tmp_path / "journal.jsonl"), output_paths)
+    journal.start()
+    sink = OutputSink(output_paths, journal, flush_rows=4, flush_interval=60,
+                      on_flush=lambda: flushed.append(os.path.getsize(output_paths["track"]))).start()
+
+    for idx in range(6):
+        sink.write({"track": [[f"t{idx}-a", "x"], [f"t{idx}-b", "x"]]}, commit=(f"artist{idx}", []))
+    sink.close()
+
+    # 4 row (2 묶음) 마다 flush 3번 + close 때 마지막 flush
+    assert sink.stats()["flush_count"] == 4
+    assert len(flushed) == 4
+    assert flushed[-1] == os.path.getsize(output_paths["track"])
+    assert len(read_entries(journal.path)) == 1 + 6
+
+
+def test_write_error_is_raised(tmp_path):
+    # 폴더 경로라서 open 실패 -> writer thread 의 error 를 close / write 에서 raise
+    sink = OutputSink({"album": str(tmp_path)}, flush_rows=1, flush_interval=60).start()
+    sink.write({"album": [["a1", "album 1"]]})
+    with pytest.raises(IsADirectoryError):
+        sink.close()
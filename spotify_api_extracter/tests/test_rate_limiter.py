@@ -0,0 +1,48 @@
+import pytest
+
+from rate_limiter import RateLimiter, TokenBucket
+
+
+def test_token_bucket_allows_one_second_burst():
+    bucket = TokenBucket(10)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(10)] == [0] * 10
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+
+    # 0.5초 뒤에는 5개 다시 채워짐 (대기중인 2개 먼저)
+    assert bucket.reserve(now + 0.5) == 0
+    assert bucket.tokens == pytest.approx(2)
+
+
+def test_additive_increase():
+    limiter = RateLimiter(initial_rate=10, max_rate=12)
+    for _ in range(10):
+        limiter.update("client", 200)
+    # 요청 1개마다 1 / rate -> rate 만큼 (약 1초 분량) 성공하면 약 +1
+    assert 10.9 < limiter.rates()["client"] < 11.0
+
+    for _ in range(100):
+        limiter.update("client", 200)
+    assert limiter.rates()["client"] == 12
+
+
+def test_multiplicative_decrease_and_pause():
+    limiter = RateLimiter(initial_rate=10, min_rate=3)
+    limiter.acquire("client")
+    limiter.update("client", 429, retry_after=2)
+    assert limiter.rates()["client"] == 5
+
+    # Retry-After 동안 모든 credential 대기
+    assert limiter.acquire("client") >= 1.9
+    assert limiter.acquire("other") >= 1.9
+
+    limiter.update("client", 429)
+    assert limiter.rates()["client"] == 3      # min_rate 아래로는 내려가지 않음
+
+
+def test_429_drops_burst():
+    limiter = RateLimiter(initial_rate=8)
+    limiter.update("client", 429)
+    # 남아있던 burst 를 버림 -> 바로 다음 요청도 새 속도(4) 기준으로 대기
+    assert limiter.acquire("client") == pytest.approx(0.25, abs=0.01)
@@ -0,0 +1,83 @@
+import csv
+import gzip
+import json
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+import redshift_export
+from mock_spotify_server import FIXTURE_YMD
+from redshift_export import TABLES, export, part_count
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'result', FIXTURE_YMD)
+S3_URL = "s3://spotify-kpop-analysis/redshift/"
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def read_part(path):
+    if path.endswith(".parquet"):
+        table = pq.read_table(path)
+        return [[None if value is None else str(value) for value in row.values()] for row in table.to_pylist()]
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_part_count():
+    mb = 1024 * 1024
+    assert part_count(0) == 8
+    assert part_count(10 * mb, slices=8, target_size=64 * mb) == 8
+    assert part_count(64 * 8 * mb + 1, slices=8, target_size=64 * mb) == 16
+    assert part_count(100 * mb, slices=4, target_size=10 * mb) == 12
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_export_parts_sorted(tmp_path, monkeypatch, file_format):
+    monkeypatch.setattr(redshift_export, "SORT_RUN_ROWS", 1000)        # 임시 파일 run 여러 개로 merge
+    export_path = str(tmp_path / "export") + "/"
+    files = export(FIXTURE_PATH + "/", export_path, FIXTURE_YMD, file_format, S3_URL, "default", slices=4, target_size=100 * 1024)
+
+    for table_name, spec in TABLES.items():
+        header, *rows = read_csv(os.path.join(FIXTURE_PATH, spec["file"]))
+        table_path = os.path.join(export_path, table_name, f"ymd={FIXTURE_YMD}")
+        with open(os.path.join(table_path, "manifest")) as f:
+            entries = json.load(f)["entries"]
+        part_paths = sorted(os.path.join(table_path, name) for name in os.listdir(table_path) if name.startswith("part-"))
+
+        # part 수는 slice 배수 이하, 임시 run 파일은 남지 않음
+        count = part_count(os.path.getsize(os.path.join(FIXTURE_PATH, spec["file"])), 4, 100 * 1024)
+        assert count % 4 == 0 and 0 < len(part_paths) <= count
+        assert sorted(os.listdir(table_path)) == sorted([os.path.basename(path) for path in part_paths] + ["manifest"])
+
+        # manifest 는 part 별 s3 url + 실제 byte 수
+        assert entries == [{"url": S3_URL + os.path.relpath(path, export_path), "mandatory": True,
+                            "meta": {"content_length": os.path.getsize(path)}} for path in part_paths]
+        assert set(part_paths) <= set(files)
+
+        # part 를 이어붙이면 sort key 순서로 정렬된 전체 row (+ ymd)
+        exported = [row for path in part_paths for row in read_part(path)]
+        assert len(exported) == len(rows)
+        assert all(row[-1] == FIXTURE_YMD for row in exported)
+        sort_idx = [header.index(column) for column in spec["sort_key"] if column != "ymd"]
+        keys = [[row[idx] for idx in sort_idx] for row in exported]
+        assert keys == sorted(keys)
+        if file_format == "csv":
+            assert sorted(row[:-1] for row in exported) == sorted(rows)
+
+
+def test_sql_transaction(tmp_path):
+    export_path = str(tmp_path / "export") + "/"
+    export(FIXTURE_PATH + "/", export_path, FIXTURE_YMD, "csv", S3_URL, "default")
+
+    with open(os.path.join(export_path, f"redshift_{FIXTURE_YMD}.sql")) as f:
+        sql = f.read()
+    for table_name in TABLES:
+        # DELETE + COPY 가 같은 transaction 안에
+        block = sql[sql.index(f"DELETE FROM {table_name} "):]
+        block = block[:block.index("COMMIT;")]
+        assert f"COPY {table_name}\n" in block and "BEGIN;" not in block
+        assert sql[:sql.index(f"DELETE FROM {table_name} ")].endswith("BEGIN;\n")
@@ -0,0 +1,78 @@
+import pytest
+
+import spotify_api
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache, make_key
+from token_pool import TokenPool
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache" / "spotify_response.sqlite"))
+    yield cache
+    cache.close()
+
+
+def age(cache, seconds):
+    """
+    저장된 응답을 seconds 만큼 오래된 것으로
+    """
+    with cache.lock:
+        cache.conn.execute("UPDATE response_cache SET stored_at = stored_at - ?", (seconds,))
+        cache.conn.commit()
+
+
+def test_ttl(cache):
+    assert cache.enabled("albums") and not cache.enabled("tracks") and not cache.enabled(None)
+    assert cache.lookup("albums", "key") is None
+
+    cache.store("albums", "key", '{"id": "a1"}', '"etag"')
+    assert cache.lookup("albums", "key") == ('{"id": "a1"}', '"etag"', True)
+
+    age(cache, 31 * DAY)
+    assert cache.lookup("albums", "key") == ('{"id": "a1"}', '"etag"', False)
+
+    cache.touch("albums", "key")
+    assert cache.lookup("albums", "key")[2] is True
+    assert cache.stats() == {"albums_hit": 2, "albums_miss": 1, "albums_revalidated": 1, "albums_stale": 1}
+
+
+def test_items(cache):
+    cache.put_items("audio_features", {"t1": {"id": "t1"}, "t2": None})
+    assert cache.get_items("audio_features", ["t1", "t2", "t3"]) == {"t1": {"id": "t1"}, "t2": None}
+
+
+def test_make_key_sorts_params():
+    assert make_key("url", {"limit": 50, "offset": 0}) == make_key("url", {"offset": 0, "limit": 50}) == "url?limit=50&offset=0"
+    assert make_key("url") == "url"
+
+
+def test_etag_revalidation(spotify_server, server_url, server_stats, cache, monkeypatch):
+    monkeypatch.setattr(spotify_api, "token_pool", TokenPool([["client-a", "secret"]]))
+    monkeypatch.setattr(spotify_api, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(spotify_api, "response_cache", cache)
+
+    album_id = next(iter(spotify_server.RequestHandlerClass.fixture.albums))
+    url, params = f"{server_url}/v1/albums/{album_id}/tracks", {"limit": 50}
+
+    def album_tracks_requests():
+        stats = server_stats()
+        return stats.get("album_tracks 200", 0), stats.get("album_tracks 304", 0)
+
+    before = album_tracks_requests()
+    response = spotify_api.spotify_get(url, params, resource="album_tracks")
+    assert response.status_code == 200
+    items = response.json()["items"]
+
+    # TTL 안에서는 요청 없이 cache
+    assert spotify_api.spotify_get(url, params, resource="album_tracks").json()["items"] == items
+    assert album_tracks_requests() == (before[0] + 1, before[1])
+
+    # TTL 이 지나면 If-None-Match 로 재검증 -> 304 면 cache 재사용 + 다시 TTL 동안 사용
+    age(cache, 31 * DAY)
+    response = spotify_api.spotify_get(url, params, resource="album_tracks")
+    assert response.status_code == 200 and response.json()["items"] == items
+    assert album_tracks_requests() == (before[0] + 1, before[1] + 1)
+    assert cache.lookup("album_tracks", make_key(url, params))[2] is True
@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import os
+
+import pytest
+
+from s3_uploader import S3Uploader, content_type
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "spotify-kpop-analysis"
+PART_SIZE = 5 * 1024 * 1024         # S3 (moto) 최소 part 크기
+
+
+@pytest.fixture
+def uploader(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        uploader = S3Uploader(BUCKET, prefix="result_data/", part_size=PART_SIZE, workers=2)
+        uploader.client.create_bucket(Bucket=BUCKET)
+        yield uploader
+        uploader.close()
+
+
+def write_file(path, size):
+    data = os.urandom(size // 2).hex().encode()[:size]
+    with open(path, 'wb') as f:
+        f.write(data)
+    return data
+
+
+def test_content_type():
+    assert content_type("a.csv.gz") == "application/gzip"
+    assert content_type("a.csv") == "text/csv"
+    assert content_type("a.parquet") == "binary/octet-stream"
+
+
+def test_multipart_upload(uploader, tmp_path):
+    file_path = str(tmp_path / "kpop_artist_album_track_data.csv")
+    data = write_file(file_path, 2 * PART_SIZE + 1234)
+
+    uploader.upload(file_path)
+    assert uploader.wait() == [(f"s3://{BUCKET}/result_data/kpop_artist_album_track_data.csv", len(data))]
+
+    obj = uploader.client.get_object(Bucket=BUCKET, Key="result_data/kpop_artist_album_track_data.csv")
+    assert obj["Body"].read() == data
+    assert obj["ContentType"] == "text/csv"
+    # part 3개 multipart ETag
+    part_digests = b"".join(hashlib.md5(data[i:i + PART_SIZE]).digest() for i in range(0, len(data), PART_SIZE))
+    assert obj["ETag"] == f'"{hashlib.md5(part_digests).hexdigest()}-3"'
+
+
+def test_streaming_gzip_upload(uploader, tmp_path):
+    file_path = str(tmp_path / "kpop_artist_data.csv")
+    data = write_file(file_path, PART_SIZE)
+
+    # 파일이 커지는 동안 feed, 마지막에 finish
+    upload = uploader.stream(file_path, gzip=True)
+    upload.feed()
+    with open(file_path, 'ab') as f:
+        f.write(data)
+    uploader.feed()
+    (url, size), = uploader.wait()
+
+    obj = uploader.client.get_object(Bucket=BUCKET, Key="result_data/kpop_artist_data.csv.gz")
+    body = obj["Body"].read()
+    assert url == f"s3://{BUCKET}/result_data/kpop_artist_data.csv.gz" and size == len(body)
+    assert gzip.decompress(body) == data + data
+    assert obj["ContentType"] == "application/gzip"
+
+
+def test_small_file_single_put(uploader, tmp_path, monkeypatch):
+    file_path = str(tmp_path / "thumbnail.jpg")
+    data = write_file(file_path, 1000)
+    monkeypatch.setattr(uploader.client, "create_multipart_upload", None)      # multipart 를 쓰면 실패
+
+    uploader.upload(file_path, key="thumbnail/artist1.jpg")
+    assert uploader.wait() == [(f"s3://{BUCKET}/thumbnail/artist1.jpg", 1000)]
+
+    obj = uploader.client.get_object(Bucket=BUCKET, Key="thumbnail/artist1.jpg")
+    assert obj["Body"].read() == data
+    assert obj["ContentType"] == "image/jpeg"
+    assert obj["ETag"] == f'"{hashlib.md5(data).hexdigest()}"'
+
+
+def test_failed_part_aborts_upload(uploader, tmp_path, monkeypatch):
+    file_path = str(tmp_path / "kpop_artist_album_data.csv")
+    write_file(file_path, PART_SIZE + 10)
+
+    def fail_part(*args, **kwargs):
+        raise ConnectionError("part upload 실패")
+
+    monkeypatch.setattr(uploader.client, "upload_part", fail_part)
+    uploader.upload(file_path)
+    with pytest.raises(ConnectionError):
+        uploader.wait()
+    assert uploader.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+import spotify_api
+from rate_limiter import RateLimiter
+from token_pool import TokenPool
+
+
+class FailedResponse:
+    status_code = 500
+    text = "server error"
+
+
+@pytest.fixture
+def api(server_url, monkeypatch):
+    monkeypatch.setattr(spotify_api, "token_pool", TokenPool([["client-a", "secret"]]))
+    monkeypatch.setattr(spotify_api, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(spotify_api, "response_cache", None)
+    return f"{server_url}/v1/tracks"
+
+
+def test_chunk_list():
+    assert spotify_api.chunk_list([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert spotify_api.chunk_list([], 2) == []
+
+
+def test_several_items_null_holes(api, spotify_server, server_stats):
+    track_ids = list(spotify_server.RequestHandlerClass.fixture.tracks)[:5]
+    ids = [track_ids[0], "unknown-1", track_ids[1], track_ids[2], "unknown-2", track_ids[3], track_ids[4], track_ids[0]]
+    before = server_stats().get("tracks 200", 0)
+
+    items = spotify_api.get_several_items(api, "tracks", ids, 3)
+
+    # 중복 제거 후 요청 순서대로 매핑 -> null 자리는 None, 나머지는 밀리지 않고 자기 id
+    assert list(items) == list(dict.fromkeys(ids))
+    assert items["unknown-1"] is None and items["unknown-2"] is None
+    assert all(items[track_id]["id"] == track_id for track_id in track_ids)
+    assert server_stats()["tracks 200"] - before == math.ceil(7 / 3)
+
+
+def test_several_items_failed_batch(api, spotify_server, monkeypatch):
+    track_ids = list(spotify_server.RequestHandlerClass.fixture.tracks)[:7]
+    request_get = spotify_api.request_get
+    requested = []
+
+    def fail_second_batch(url, params=None, headers=None):
+        requested.append(params["ids"].split(","))
+        return FailedResponse() if len(requested) == 2 else request_get(url, params, headers)
+
+    monkeypatch.setattr(spotify_api, "request_get", fail_second_batch)
+    items = spotify_api.get_several_items(api, "tracks", track_ids, 3)
+
+    # 실패한 batch 의 id 만 None, 앞뒤 batch 는 정상 매핑
+    assert requested == [track_ids[0:3], track_ids[3:6], track_ids[6:7]]
+    assert [track_id for track_id, item in items.items() if item is None] == track_ids[3:6]
+    assert all(items[track_id]["id"] == track_id for track_id in track_ids[0:3] + track_ids[6:7])
+
+
+def test_several_tracks_reports_failed_batch(api, spotify_server, monkeypatch):
+    track_ids = list(spotify_server.RequestHandlerClass.fixture.tracks)[:60]
+    request_get = spotify_api.request_get
+
+    def fail_first_batch(url, params=None, headers=None):
+        return FailedResponse() if params["ids"].startswith(track_ids[0]) else request_get(url, params, headers)
+
+    monkeypatch.setattr(spotify_api, "request_get", fail_first_batch)
+    errors = {}
+    tracks = spotify_api.get_several_tracks(track_ids + ["unknown"], errors)
+
+    # 실패한 batch 의 track 만 errors 에 기록 - 없는 track 은 None 이지만 error 아님
+    assert errors == {track_id: (500, "server error") for track_id in track_ids[:50]}
+    assert tracks["unknown"] is None and "unknown" not in errors
+    assert all(tracks[track_id]["id"] == track_id for track_id in track_ids[50:])
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from token_pool import TokenPool
+
+CLIENT_INFO = [["client-a", "secret"], ["client-b", "secret"], ["client-c", "secret"]]
+
+
+def test_lease_spreads_over_credentials(server_url):
+    pool = TokenPool(CLIENT_INFO)
+    credentials = [pool.lease() for _ in range(3)]
+
+    assert sorted(credential.client_id for credential in credentials) == ["client-a", "client-b", "client-c"]
+    assert all(credential.headers["Authorization"].startswith("Bearer mock-token-") for credential in credentials)
+
+    for credential in credentials:
+        pool.release(credential, 200)
+    assert [stat["request_count"] for stat in pool.stats()] == [1, 1, 1]
+
+
+def test_concurrent_lease_refreshes_once(server_url, server_stats):
+    pool = TokenPool(CLIENT_INFO[:1])
+    before = server_stats().get("token 200", 0)
+    threads = [threading.Thread(target=pool.lease) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server_stats()["token 200"] - before == 1
+    assert pool.credentials[0].in_flight == 20
+
+
+def test_429_blocks_credential(server_url):
+    pool = TokenPool(CLIENT_INFO[:2])
+    blocked = pool.lease()
+    pool.release(blocked, 429, retry_after=30)
+    other = next(credential for credential in pool.credentials if credential is not blocked)
+
+    assert blocked.blocked_until == pytest.approx(time.time() + 30, abs=1)
+    assert blocked.rate_limit_count == 1
+
+    # 막혀있는 동안에는 다른 credential 이 바빠도 그쪽으로
+    assert all(pool.lease() is other for _ in range(5))
+    assert other.in_flight == 5
+
+
+def test_all_blocked_returns_first_unblocked(server_url):
+    pool = TokenPool(CLIENT_INFO[:2])
+    first, second = pool.lease(), pool.lease()
+    pool.release(first, 429, retry_after=30)
+    pool.release(second, 429, retry_after=10)
+
+    assert pool.lease() is second
+
+
+def test_401_refreshes_token(server_url, server_stats):
+    pool = TokenPool(CLIENT_INFO[:1])
+    credential = pool.lease()
+    headers = credential.headers
+    pool.release(credential, 401)
+
+    before = server_stats()["token 200"]
+    assert pool.lease().headers != headers
+    assert server_stats()["token 200"] - before == 1
+
+
+def test_empty_client_info():
+    with pytest.raises(ValueError):
+        TokenPool([])
@@ -0,0 +1,126 @@
+import base64
+import json
+import threading
+import time
+from collections import deque
+
+import http_client
+
+REFRESH_MARGIN = 300        # 만료 5분 전에 token 재발급
+RATE_WINDOW = 30            # 최근 요청 수를 계산할 구간(초)
+
+
+def get_access_token(client_id, client_secret):
+    """
+    Spotify API를 사용할 때 필요한 Token 인증 방식
+    - 1시간동안 유효한 토큰 발급
+    - return (Authorization header, 유효 시간(초))
+    """
+    auth_header = base64.b64encode("{}:{}".format(client_id, client_secret).encode('utf-8')).decode('ascii')    # Base64로 인코딩된 인증 헤더 생성
+    token_url = f"{http_client.ACCOUNTS_URL}/api/token"
+    headers = {
+        "Authorization": f'Basic {auth_header}'
+    }
+    payload = {
+        "grant_type": "client_credentials"
+    }
+
+    response = http_client.post(token_url, data=payload, headers=headers)
+    token = json.loads(response.text)
+
+    return {"Authorization": f"Bearer {token['access_token']}"}, token.get("expires_in", 3600)
+
+
+class Credential:
+    """
+    client id 1개에 해당하는 token 과 사용 이력
+    """
+
+    def __init__(self, client_id, client_secret):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.headers = None
+        self.expires_at = 0
+        self.in_flight = 0                  # 현재 사용중인 요청 수
+        self.request_times = deque()        # 최근 RATE_WINDOW 초 동안의 요청 시각
+        self.request_count = 0
+        self.rate_limit_count = 0           # 429 받은 횟수
+        self.blocked_until = 0              # Retry-After 로 막혀있는 시각
+        self.refresh_lock = threading.Lock()
+
+
+class TokenPool:
+    """
+    여러 client id 의 token 을 관리하는 pool
+    - 만료 전에 token 재발급
+    - 요청마다 가장 여유있는 credential 을 lease (429로 막혀있지 않고, 최근 요청 수가 적은 순)
+    """
+
+    def __init__(self, client_info, refresh_margin=REFRESH_MARGIN, window=RATE_WINDOW):
+        self.credentials = [Credential(client_id, client_secret) for client_id, client_secret in dict(client_info).items()]
+        self.refresh_margin = refresh_margin
+        self.window = window
+        self.lock = threading.Lock()
+
+        if len(self.credentials) == 0:
+            raise ValueError("client_info 가 비어있습니다")
+
+    def refresh(self, credential):
+        """
+        만료가 가까운 token 재발급 - 같은 credential 을 동시에 재발급하지 않도록 lock
+        """
+        with credential.refresh_lock:
+            if credential.expires_at - self.refresh_margin > time.time():
+                return
+            credential.headers, expires_in = get_access_token(credential.client_id, credential.client_secret)
+            credential.expires_at = time.time() + expires_in
+
+    def load(self, credential, now):
+        """
+        credential 의 현재 부하 - (429로 막혀있는지, 사용중 + 최근 요청 수, 429 횟수)
+        """
+        while credential.request_times and credential.request_times[0] < now - self.window:
+            credential.request_times.popleft()
+        return (credential.blocked_until > now, credential.in_flight + len(credential.request_times), credential.rate_limit_count)
+
+    def lease(self):
+        """
+        가장 여유있는 credential 을 빌려줌 - 사용 후 반드시 release
+        - 전부 막혀있다면 가장 빨리 풀리는 credential (blocked_until 까지 대기는 호출하는 쪽에서)
+        """
+        with self.lock:
+            now = time.time()
+            credential = min(self.credentials, key=lambda c: (self.load(c, now), c.blocked_until))
+            credential.in_flight += 1
+            credential.request_count += 1
+            credential.request_times.append(now)
+
+        if credential.expires_at - self.refresh_margin <= time.time():
+            self.refresh(credential)
+
+        return credential
+
+    def release(self, credential, status_code, retry_after=0):
+        """
+        lease 한 credential 반환 - 429 라면 Retry-After 동안 해당 credential 사용 중지
+        """
+        with self.lock:
+            credential.in_flight -= 1
+            if status_code == 429:
+                credential.rate_limit_count += 1
+                credential.blocked_until = max(credential.blocked_until, time.time() + retry_after)
+            elif status_code == 401:
+                credential.expires_at = 0       # token 만료 -> 다음 lease 때 재발급
+
+    def stats(self):
+        """
+        credential 별 요청 수 / 429 횟수
+        """
+        return [
+            {
+                "client_id": credential.client_id,
+                "request_count": credential.request_count,
+                "rate_limit_count": credential.rate_limit_count,
+            }
+            for credential in self.credentials
+        ]
@@ -0,0 +1,81 @@
+import csv
+import os
+import queue
+import threading
+from collections import Counter
+
+
+def find_previous_result(result_path, file_name, ymd):
+    """
+    result/<ymd>/ 중 오늘(ymd) 이전의 가장 최근 결과 파일 경로 반환
+    - 없으면 None
+    """
+    if not os.path.isdir(result_path):
+        return None
+
+    for result_ymd in sorted(os.listdir(result_path), reverse=True):
+        file_path = os.path.join(result_path, result_ymd, file_name)
+        if result_ymd < ymd and os.path.exists(file_path):
+            return file_path
+
+    return None
+
+
+def load_artist_cost(album_path):
+    """
+    이전 실행의 kpop_artist_album_data.csv 에서 artist 별 album 수 계산
+    - album 수가 많을수록 처리 시간이 긴 artist
+    """
+    artist_cost = Counter()
+    if album_path is None:
+        return artist_cost
+
+    with open(album_path, 'r', encoding='utf-8') as csvfile:
+        csvreader = csv.reader(csvfile)
+        header = next(csvreader)
+        artist_idx = header.index('artist_id')
+        for row in csvreader:
+            artist_cost[row[artist_idx]] += 1
+
+    return artist_cost
+
+
+def order_by_cost(items, cost):
+    """
+    cost 가 큰 순서로 정렬 (오래 걸리는 artist를 먼저 꺼내서 마지막에 몰리지 않도록)
+    - cost 정보가 없는 항목은 기존 순서대로 뒤에 배치
+    """
+    if not cost:
+        return list(items)
+    return sorted(items, key=lambda item: -cost.get(item, 0))
+
+
+def make_work_queue(items):
+    """
+    thread 들이 공유하는 작업 queue 생성 - 하나씩 꺼내서 처리
+    """
+    work_q = queue.Queue()
+    for item in items:
+        work_q.put(item)
+    return work_q
+
+
+def get_work(work_q):
+    """
+    작업 queue 에서 하나 꺼내기 - 비어있으면 None
+    """
+    try:
+        return work_q.get_nowait()
+    except queue.Empty:
+        return None
+
+
+def run_workers(target, thread_count, args):
+    """
+    thread_count 개의 thread 로 target(*args) 실행 후 전체 종료까지 대기
+    - 각 thread는 공유 작업 queue 가 빌 때까지 작업을 계속 꺼내감
+    """
+    thread_list = [threading.Thread(target=target, args=args) for _ in range(thread_count)]
+
+    [thread.start() for thread in thread_list]
+    [thread.join() for thread in thread_list]